@@ -0,0 +1,293 @@
+import argparse
+import array
+import csv
+import json
+import math
+import os
+import sys
+
+from archive_pack import DATED_FILE, ArchivePack, archive_path, iter_game_files
+
+GAMES_DIR = "games"
+MISSING = math.nan
+
+
+def _get(metadata, *path):
+    """Follow nested keys, returning None where any is missing"""
+    for key in path:
+        if not isinstance(metadata, dict):
+            return None
+        metadata = metadata.get(key)
+    return metadata
+
+
+def _stage_total(metadata, kind, field):
+    """Sum a field over the traced stages of one kind"""
+    stages = _get(metadata, 'trace', 'stages')
+    if not stages:
+        return None
+    return sum(stage[field] for stage in stages.values() if stage['kind'] == kind)
+
+
+def _repair_tokens(metadata):
+    tokens = metadata.get('repair_response_tokens')
+    if not tokens:
+        return None
+    return sum(value for value in tokens.values() if value)
+
+
+def _passing(metadata):
+    result = metadata.get('final_functionality') or metadata.get('functionality')
+    return None if result is None else float(result['passing'])
+
+
+# Table columns: (name, array typecode or None for text, extractor). The
+# extractor receives (metadata, final size of the game file).
+COLUMNS = [
+    ('date', None, lambda m, size: m['generated_date']),
+    ('theme', None, lambda m, size: m.get('theme')),
+    ('model', None, lambda m, size: m.get('model')),
+    ('repaired_size_bytes', 'd', lambda m, size: m.get('game_size_bytes')),
+    ('final_size_bytes', 'd', lambda m, size: size),
+    ('initial_tokens', 'd', lambda m, size: m.get('response_tokens')),
+    ('repair_tokens', 'd', lambda m, size: _repair_tokens(m)),
+    ('improve_tokens', 'd', lambda m, size: m.get('improve_response_tokens')),
+    ('formatting_tokens', 'd', lambda m, size: m.get('formatting_response_tokens')),
+    ('functionality_pct', 'd', lambda m, size: _get(m, 'functionality', 'percentage')),
+    ('final_functionality_pct', 'd', lambda m, size: _get(m, 'final_functionality', 'percentage')),
+    ('passing', 'd', lambda m, size: _passing(m)),
+    ('final_runtime_pct', 'd', lambda m, size: _get(m, 'final_runtime', 'percentage')),
+    ('chromebook_frame_ms', 'd', lambda m, size: _get(m, 'final_runtime', 'metrics', 'estimated_chromebook_frame_ms')),
+    ('performance_severe', 'd', lambda m, size: _get(m, 'final_performance', 'severe_count')),
+    ('performance_warnings', 'd', lambda m, size: _get(m, 'final_performance', 'warning_count')),
+    ('wall_seconds', 'd', lambda m, size: _get(m, 'trace', 'wall_seconds')),
+    ('model_seconds', 'd', lambda m, size: _stage_total(m, 'model', 'seconds')),
+    ('validator_seconds', 'd', lambda m, size: _stage_total(m, 'validator', 'seconds')),
+    ('cheap_calls', 'd', lambda m, size: _get(m, 'schedule', 'cheap_calls')),
+    ('skipped_calls', 'd', lambda m, size: _get(m, 'schedule', 'skipped_calls')),
+    ('tokens_saved', 'd', lambda m, size: _get(m, 'schedule', 'estimated_tokens_saved')),
+    ('seconds_saved', 'd', lambda m, size: _get(m, 'schedule', 'estimated_seconds_saved')),
+]
+
+
+def iter_metadata(games_dir=GAMES_DIR):
+    """Yield (metadata, final game size) for each meta.json in date order, loose or packed, one file at a time"""
+    with ArchivePack(archive_path(games_dir)) as pack:
+        for game_date, text in iter_game_files(games_dir, 'meta.json', pack=pack):
+            try:
+                metadata = json.loads(text)
+            except ValueError as e:
+                print(f"⚠️  Skipping {game_date}.meta.json: {e}", file=sys.stderr)
+                continue
+            metadata.setdefault('generated_date', game_date)
+            game_filename = metadata.get('game_filename') or f"{metadata['generated_date']}.js"
+            game_file = os.path.join(games_dir, game_filename)
+            if os.path.exists(game_file):
+                size = os.path.getsize(game_file)
+            else:
+                # Packed games: the size is in the pack's index, nothing is decompressed
+                match = DATED_FILE.match(game_filename)
+                size = pack.file_size(*match.groups()) if match else None
+            yield metadata, size
+
+
+class MetadataTable:
+    """Column-oriented table of the run history.
+
+    Numeric columns are array('d') with NaN for values a run did not record;
+    text columns are plain lists. Row i of every column is the same run.
+    """
+
+    def __init__(self):
+        self.columns = {name: (array.array(typecode) if typecode else []) for name, typecode, _ in COLUMNS}
+
+    def __len__(self):
+        return len(self.columns['date'])
+
+    def append(self, metadata, size):
+        for name, typecode, extract in COLUMNS:
+            value = extract(metadata, size)
+            if typecode:
+                value = MISSING if value is None else float(value)
+            self.columns[name].append(value)
+
+    @classmethod
+    def load(cls, games_dir=GAMES_DIR):
+        table = cls()
+        for metadata, size in iter_metadata(games_dir):
+            table.append(metadata, size)
+        return table
+
+    def rows(self):
+        """Iterate the rows as tuples in column order, with None for missing values"""
+        columns = [self.columns[name] for name, _, _ in COLUMNS]
+        for index in range(len(self)):
+            yield tuple(None if isinstance(value, float) and math.isnan(value) else value
+                        for value in (column[index] for column in columns))
+
+    def group_indices(self, key=lambda game_date: game_date[:7]):
+        """Row indices grouped by a key of the date (the month by default), in order"""
+        groups = {}
+        for index, game_date in enumerate(self.columns['date']):
+            groups.setdefault(key(game_date), []).append(index)
+        return groups
+
+
+def _mean(column, indices):
+    values = [column[index] for index in indices if not math.isnan(column[index])]
+    return sum(values) / len(values) if values else None
+
+
+def monthly_trends(table):
+    """Per-month averages of the tracked metrics"""
+    trends = []
+    columns = table.columns
+    # Final size over the size before the improve pass (NaN propagates)
+    ratios = array.array('d', (
+        final / repaired if repaired > 0 else MISSING
+        for final, repaired in zip(columns['final_size_bytes'], columns['repaired_size_bytes'])
+    ))
+    for month, indices in table.group_indices().items():
+        trends.append({
+            'month': month,
+            'games': len(indices),
+            'pass_rate': _mean(columns['passing'], indices),
+            'mean_final_size_bytes': _mean(columns['final_size_bytes'], indices),
+            'mean_improve_size_ratio': _mean(ratios, indices),
+            'mean_initial_tokens': _mean(columns['initial_tokens'], indices),
+            'mean_repair_tokens': _mean(columns['repair_tokens'], indices),
+            'mean_improve_tokens': _mean(columns['improve_tokens'], indices),
+            'mean_formatting_tokens': _mean(columns['formatting_tokens'], indices),
+            'mean_validator_seconds': _mean(columns['validator_seconds'], indices),
+            'mean_wall_seconds': _mean(columns['wall_seconds'], indices),
+            'mean_tokens_saved': _mean(columns['tokens_saved'], indices),
+            'mean_seconds_saved': _mean(columns['seconds_saved'], indices),
+        })
+    return trends
+
+
+def write_csv(table, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _, _ in COLUMNS])
+        writer.writerows(('' if value is None else value for value in row) for row in table.rows())
+
+
+def write_json(table, trends, path):
+    """Write the columns (null for missing values) and the monthly trends"""
+    columns = {
+        name: [None if isinstance(value, float) and math.isnan(value) else value for value in table.columns[name]]
+        for name, _, _ in COLUMNS
+    }
+    with open(path, 'w') as f:
+        json.dump({'columns': columns, 'monthly': trends}, f, indent=1)
+
+
+# Series drawn on the chart: (column, label, colour)
+CHART_SERIES = [
+    ('repaired_size_bytes', 'Size before improve (KB)', '#4e79a7'),
+    ('final_size_bytes', 'Final size (KB)', '#f28e2b'),
+    ('improve_tokens', 'Improve tokens (K)', '#59a14f'),
+]
+
+
+def render_svg(table, width=960, height=400):
+    """A static line chart of sizes and improvement tokens per game"""
+    margin_left, margin_right, margin_top, margin_bottom = 60, 20, 30, 70
+    plot_width = width - margin_left - margin_right
+    plot_height = height - margin_top - margin_bottom
+    count = len(table)
+    series = [(label, colour, [value / 1000 for value in table.columns[name]]) for name, label, colour in CHART_SERIES]
+    values = [value for _, _, points in series for value in points if not math.isnan(value)]
+    top = max(values) * 1.1 if values else 1
+
+    def x(index):
+        return margin_left + (plot_width * index / (count - 1) if count > 1 else plot_width / 2)
+
+    def y(value):
+        return margin_top + plot_height * (1 - value / top)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="11">',
+        f'<rect width="{width}" height="{height}" fill="#ffffff"/>',
+        f'<text x="{margin_left}" y="18" font-size="14">Game size and improvement tokens per game</text>',
+    ]
+    for step in range(5):
+        value = top * step / 4
+        parts.append(f'<line x1="{margin_left}" x2="{width - margin_right}" y1="{y(value):.1f}" y2="{y(value):.1f}" stroke="#e0e0e0"/>')
+        parts.append(f'<text x="{margin_left - 6}" y="{y(value) + 4:.1f}" text-anchor="end">{value:.0f}</text>')
+    label_every = max(1, count // 12)
+    for index, game_date in enumerate(table.columns['date']):
+        if index % label_every == 0:
+            parts.append(f'<text x="{x(index):.1f}" y="{height - margin_bottom + 16}" text-anchor="end" '
+                         f'transform="rotate(-45 {x(index):.1f} {height - margin_bottom + 16})">{game_date}</text>')
+    for number, (label, colour, points) in enumerate(series):
+        # Missing values break the line rather than dropping to zero
+        segment = []
+        segments = [segment]
+        for index, value in enumerate(points):
+            if math.isnan(value):
+                segment = []
+                segments.append(segment)
+            else:
+                segment.append(f"{x(index):.1f},{y(value):.1f}")
+        for points_text in segments:
+            if len(points_text) > 1:
+                parts.append(f'<polyline fill="none" stroke="{colour}" stroke-width="2" points="{" ".join(points_text)}"/>')
+            elif points_text:
+                cx, cy = points_text[0].split(',')
+                parts.append(f'<circle cx="{cx}" cy="{cy}" r="2.5" fill="{colour}"/>')
+        legend_x = margin_left + number * 200
+        parts.append(f'<rect x="{legend_x}" y="{height - 18}" width="12" height="12" fill="{colour}"/>')
+        parts.append(f'<text x="{legend_x + 16}" y="{height - 8}">{label}</text>')
+    parts.append('</svg>')
+    return '\n'.join(parts) + '\n'
+
+
+def _format(value, digits=0):
+    return '-' if value is None else f"{value:,.{digits}f}"
+
+
+def print_trends(trends):
+    print(f"{'Month':<9}{'Games':>6}{'Pass':>7}{'Final KB':>10}{'Improve x':>11}{'Init tok':>10}"
+          f"{'Repair tok':>12}{'Improve tok':>13}{'Valid. s':>10}{'Saved tok':>11}")
+    for row in trends:
+        pass_rate = None if row['pass_rate'] is None else row['pass_rate'] * 100
+        final_kb = None if row['mean_final_size_bytes'] is None else row['mean_final_size_bytes'] / 1024
+        pass_text = '-' if pass_rate is None else f"{pass_rate:.0f}%"
+        print(f"{row['month']:<9}{row['games']:>6}{pass_text:>7}{_format(final_kb, 1):>10}"
+              f"{_format(row['mean_improve_size_ratio'], 2):>11}{_format(row['mean_initial_tokens']):>10}"
+              f"{_format(row['mean_repair_tokens']):>12}{_format(row['mean_improve_tokens']):>13}"
+              f"{_format(row['mean_validator_seconds'], 2):>10}{_format(row['mean_tokens_saved']):>11}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report trends across the meta.json history of generated games")
+    parser.add_argument('--games-dir', default=GAMES_DIR, help="Directory holding the games and their metadata")
+    parser.add_argument('--csv', metavar='PATH', help="Write one row per game as CSV")
+    parser.add_argument('--json', metavar='PATH', help="Write the columns and monthly trends as JSON")
+    parser.add_argument('--svg', metavar='PATH', help="Write a static chart of size and improvement tokens")
+    args = parser.parse_args(argv)
+
+    table = MetadataTable.load(args.games_dir)
+    if not len(table):
+        print("No metadata files found")
+        return
+    trends = monthly_trends(table)
+    print(f"📊 {len(table)} runs from {table.columns['date'][0]} to {table.columns['date'][-1]}\n")
+    print_trends(trends)
+
+    if args.csv:
+        write_csv(table, args.csv)
+        print(f"\n✅ Wrote {args.csv}")
+    if args.json:
+        write_json(table, trends, args.json)
+        print(f"✅ Wrote {args.json}")
+    if args.svg:
+        with open(args.svg, 'w') as f:
+            f.write(render_svg(table))
+        print(f"✅ Wrote {args.svg}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+import argparse
+import bisect
+import contextlib
+import mmap
+import os
+import re
+import struct
+import zlib
+from datetime import date, timedelta
+
+GAMES_DIR = "games"
+ARCHIVE_NAME = "archive.pack"
+DEFAULT_KEEP_DAYS = 30  # Days before the newest game that stay loose in games/
+
+# Files of a day that are packed, by the suffix after the date
+KINDS = ('js', 'meta.json', 'meta.md')
+DATED_FILE = re.compile(r'^(\d{4}-\d{2}-\d{2})\.(js|meta\.json|meta\.md)$')
+
+# Layout: HEADER, then one zlib stream per file, appended and never rewritten,
+# then the index (INDEX_ENTRY per file, sorted by date and kind) and FOOTER,
+# which points at the index. Appending writes new streams over the old index
+# and a new index after them, in place, so offsets of packed files never
+# change and an append costs the new files plus the index, not the archive.
+HEADER = b'LTGPACK1'
+INDEX_ENTRY = struct.Struct('<10s10sQIII')  # date, kind, offset, stored bytes, size, CRC-32
+KEY_SIZE = 20  # date + kind, the sort key at the start of each index entry
+FOOTER = struct.Struct('<8sIQ')  # magic, entry count, index offset
+FOOTER_MAGIC = b'LTGINDEX'
+# Saved before an append overwrites the old index: its offset, then the old
+# index and footer, so an interrupted append can be rolled back
+UNDO_SUFFIX = '.undo'
+UNDO_HEADER = struct.Struct('<Q')
+
+
+class ArchiveError(Exception):
+    """Raised when a pack file is truncated, corrupt or of an unknown format"""
+
+
+def _key(game_date, kind):
+    return game_date.encode('ascii') + kind.encode('ascii').ljust(10, b'\0')
+
+
+class ArchivePack:
+    """Read-only view of games/archive.pack through mmap.
+
+    Lookups binary-search the fixed-size index in place and a file is
+    decompressed straight from the mapping, so reading one day, or every
+    day, costs one open file however long the archive grows. A missing pack
+    file reads as an empty archive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.index_offset = len(HEADER)
+        self._file = self._map = None
+        try:
+            self._file = open(path, 'rb')
+        except FileNotFoundError:
+            return
+        if os.path.exists(f"{path}{UNDO_SUFFIX}"):
+            # The index may be half written; the undo file goes only once the pack is complete
+            self.close()
+            raise ArchiveError(f"{path}: an append is in progress or was interrupted; "
+                               f"run archive_pack.py --recover if no pack is running")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(HEADER) + FOOTER.size:
+            self.close()
+            raise ArchiveError(f"{path} is too short to be a game archive")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.index_offset = FOOTER.unpack_from(self._map, size - FOOTER.size)
+        if self._map[:len(HEADER)] != HEADER or magic != FOOTER_MAGIC \
+                or self.index_offset + self.count * INDEX_ENTRY.size + FOOTER.size != size:
+            self.close()
+            raise ArchiveError(f"{path} is not a complete game archive")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def entry(self, position):
+        """(date, kind, offset, stored bytes, size, crc) of the index entry at `position`"""
+        game_date, kind, *rest = INDEX_ENTRY.unpack_from(self._map, self.index_offset + position * INDEX_ENTRY.size)
+        return (game_date.decode('ascii'), kind.rstrip(b'\0').decode('ascii'), *rest)
+
+    def entries(self):
+        for position in range(self.count):
+            yield self.entry(position)
+
+    def _position(self, game_date, kind):
+        key = _key(game_date, kind)
+        keys = _IndexKeys(self._map, self.index_offset, self.count)
+        position = bisect.bisect_left(keys, key)
+        return position if position < self.count and keys[position] == key else None
+
+    def __contains__(self, item):
+        return self.count > 0 and self._position(*item) is not None
+
+    def dates(self, kind='js'):
+        """Dates with a packed file of `kind`, in order"""
+        return [game_date for game_date, entry_kind, *_ in self.entries() if entry_kind == kind]
+
+    def read_bytes(self, game_date, kind='js'):
+        """The packed file of `kind` for `game_date`, or None if it is not packed"""
+        position = self._position(game_date, kind) if self.count else None
+        if position is None:
+            return None
+        _, _, offset, stored, size, crc = self.entry(position)
+        try:
+            with memoryview(self._map) as view:
+                data = zlib.decompress(view[offset:offset + stored], bufsize=max(size, 1))
+        except zlib.error as e:
+            raise ArchiveError(f"{self.path}: {game_date}.{kind} is corrupt ({e})") from e
+        if len(data) != size or zlib.crc32(data) != crc:
+            raise ArchiveError(f"{self.path}: {game_date}.{kind} is corrupt")
+        return data
+
+    def file_size(self, game_date, kind='js'):
+        """Uncompressed size of a packed file, read from the index alone; None if it is not packed"""
+        position = self._position(game_date, kind) if self.count else None
+        return None if position is None else self.entry(position)[4]
+
+    def read_text(self, game_date, kind='js'):
+        data = self.read_bytes(game_date, kind)
+        return None if data is None else data.decode('utf-8')
+
+
+class _IndexKeys:
+    """The index's sort keys as a sequence, read from the mapping on demand for bisect"""
+
+    def __init__(self, mapping, start, count):
+        self.mapping = mapping
+        self.start = start
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position):
+        offset = self.start + position * INDEX_ENTRY.size
+        return self.mapping[offset:offset + KEY_SIZE]
+
+
+def archive_path(games_dir=GAMES_DIR):
+    return os.path.join(games_dir, ARCHIVE_NAME)
+
+
+def loose_files(games_dir=GAMES_DIR):
+    """{(date, kind): path} of the dated files sitting loose in games/"""
+    files = {}
+    for name in os.listdir(games_dir):
+        match = DATED_FILE.match(name)
+        if match:
+            files[match.groups()] = os.path.join(games_dir, name)
+    return files
+
+
+def game_dates(games_dir=GAMES_DIR, kind='js', pack=None):
+    """Every date with a file of `kind`, loose or packed, in order"""
+    with contextlib.nullcontext(pack) if pack is not None else ArchivePack(archive_path(games_dir)) as pack:
+        packed = pack.dates(kind)
+    return sorted(set(packed) | {game_date for game_date, file_kind in loose_files(games_dir) if file_kind == kind})
+
+
+def read_game_file(games_dir, game_date, kind='js', pack=None):
+    """Text of a day's file, preferring the loose copy over the packed one; None if there is neither"""
+    try:
+        with open(os.path.join(games_dir, f"{game_date}.{kind}"), 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    if pack is not None:
+        return pack.read_text(game_date, kind)
+    with ArchivePack(archive_path(games_dir)) as pack:
+        return pack.read_text(game_date, kind)
+
+
+def iter_game_files(games_dir=GAMES_DIR, kind='js', pack=None):
+    """Yield (date, text) for every day's file of `kind` in date order, loose or packed.
+
+    The pack is opened once for the whole iteration, or `pack` is used if given.
+    """
+    loose = loose_files(games_dir)
+    with contextlib.nullcontext(pack) if pack is not None else ArchivePack(archive_path(games_dir)) as pack:
+        dates = sorted(set(pack.dates(kind)) | {game_date for game_date, file_kind in loose if file_kind == kind})
+        for game_date in dates:
+            path = loose.get((game_date, kind))
+            if path is not None:
+                with open(path, 'r') as f:
+                    yield game_date, f.read()
+            else:
+                yield game_date, pack.read_text(game_date, kind)
+
+
+def _write_bytes_durably(path, data):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def recover(path):
+    """Roll back an append to the pack at `path` that was interrupted; returns whether there was one"""
+    undo_path = f"{path}{UNDO_SUFFIX}"
+    try:
+        with open(undo_path, 'rb') as f:
+            saved = f.read()
+    except FileNotFoundError:
+        return False
+    index_offset, = UNDO_HEADER.unpack_from(saved)
+    with open(path, 'r+b') as f:
+        f.truncate(index_offset)
+        f.seek(index_offset)
+        f.write(saved[UNDO_HEADER.size:])
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(undo_path)
+    return True
+
+
+def _write_files(f, files, entries):
+    """Write the streams of `files` at the current position, then the index of `entries` plus them and the footer"""
+    for (game_date, kind), data in sorted(files.items()):
+        stored = zlib.compress(data, 9)
+        entries[(game_date, kind)] = (f.tell(), len(stored), len(data), zlib.crc32(data))
+        f.write(stored)
+    index_offset = f.tell()
+    for (game_date, kind), (offset, stored, size, crc) in sorted(entries.items()):
+        f.write(INDEX_ENTRY.pack(game_date.encode('ascii'), kind.encode('ascii'), offset, stored, size, crc))
+    f.write(FOOTER.pack(FOOTER_MAGIC, len(entries), index_offset))
+    f.truncate()
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def append_files(path, files):
+    """Add {(date, kind): bytes} to the pack at `path`, replacing earlier copies in the index.
+
+    Packed streams are never rewritten: the new streams and a new index are
+    written in place over the old index. The old index and footer are saved
+    to `path`.undo first and the undo file is removed once the pack is synced,
+    so an interrupted append is rolled back by recover(). A new pack is
+    written beside its final name and renamed into place.
+    """
+    recover(path)
+    with ArchivePack(path) as pack:
+        entries = {(game_date, kind): rest for game_date, kind, *rest in pack.entries()}
+        index_offset = pack.index_offset
+    if not entries:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER)
+            _write_files(f, files, entries)
+        os.replace(temp_path, path)
+        return
+    undo_path = f"{path}{UNDO_SUFFIX}"
+    with open(path, 'r+b') as f:
+        f.seek(index_offset)
+        _write_bytes_durably(undo_path, UNDO_HEADER.pack(index_offset) + f.read())
+        f.seek(index_offset)
+        _write_files(f, files, entries)
+    os.remove(undo_path)
+
+
+def pack_games(games_dir=GAMES_DIR, keep_days=DEFAULT_KEEP_DAYS, remove=True):
+    """Move the days more than `keep_days` before the newest game into the pack.
+
+    Every file is read back from the new pack and compared before its loose
+    copy is removed. Returns (days packed, loose bytes, bytes added to the pack).
+    """
+    loose = loose_files(games_dir)
+    dates = game_dates(games_dir)
+    if not dates:
+        return 0, 0, 0
+    cutoff = (date.fromisoformat(dates[-1]) - timedelta(days=keep_days)).isoformat()
+    selected = {key: path for key, path in loose.items() if key[0] < cutoff}
+    if not selected:
+        return 0, 0, 0
+    files = {}
+    for key, path in selected.items():
+        with open(path, 'rb') as f:
+            files[key] = f.read()
+    path = archive_path(games_dir)
+    before = os.path.getsize(path) if os.path.exists(path) else 0
+    append_files(path, files)
+    with ArchivePack(path) as pack:
+        for (game_date, kind), data in files.items():
+            if pack.read_bytes(game_date, kind) != data:
+                raise ArchiveError(f"{game_date}.{kind} did not read back from {path} unchanged")
+    if remove:
+        for file_path in selected.values():
+            os.remove(file_path)
+    packed_days = len({game_date for game_date, _ in files})
+    return packed_days, sum(map(len, files.values())), os.path.getsize(path) - before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack older games into games/archive.pack and read them back")
+    parser.add_argument('--pack', action='store_true', help="move older days' .js, .meta.json and .meta.md files into the pack")
+    parser.add_argument('--keep-days', type=int, default=DEFAULT_KEEP_DAYS,
+                        help=f"days before the newest game kept loose (default: {DEFAULT_KEEP_DAYS})")
+    parser.add_argument('--keep-loose', action='store_true', help="pack without removing the loose files")
+    parser.add_argument('--list', action='store_true', help="list the packed files")
+    parser.add_argument('--extract', metavar='YYYY-MM-DD', help="write a packed day's files back to games/")
+    parser.add_argument('--recover', action='store_true', help="roll back an interrupted append")
+    args = parser.parse_args(argv)
+    if args.keep_days < 1:
+        parser.error("--keep-days must be at least 1: the newest game always stays loose")
+
+    if args.recover:
+        rolled_back = recover(archive_path())
+        print(f"✅ {'Rolled back an interrupted append to' if rolled_back else 'Nothing to recover in'} {archive_path()}")
+    elif args.pack:
+        days, loose_bytes, added = pack_games(keep_days=args.keep_days, remove=not args.keep_loose)
+        print(f"✅ Packed {days} day(s): {loose_bytes:,} bytes of files -> {added:,} bytes in {archive_path()}")
+    elif args.list:
+        with ArchivePack(archive_path()) as pack:
+            for game_date, kind, offset, stored, size, _ in pack.entries():
+                print(f"{game_date}.{kind:<10} {size:>9,} bytes, {stored:>8,} packed at {offset}")
+            print(f"{len(pack)} files, {len(set(pack.dates()))} games")
+    elif args.extract:
+        with ArchivePack(archive_path()) as pack:
+            for kind in KINDS:
+                data = pack.read_bytes(args.extract, kind)
+                if data is not None:
+                    with open(os.path.join(GAMES_DIR, f"{args.extract}.{kind}"), 'wb') as f:
+                        f.write(data)
+                    print(f"✅ Extracted games/{args.extract}.{kind}")
+    else:
+        parser.error("give --pack, --list, --extract or --recover")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from archive_pack import ArchivePack, archive_path, game_dates, read_game_file
+from runtime_harness import FRAME_BUDGET_MS, estimate_chromebook_frame_ms, run_game
+
+GAMES_DIR = "games"
+BENCHMARK_DIR = "games/benchmarks"
+# Bump when the harness or the recorded fields change so old results are re-measured
+BENCHMARK_VERSION = 1
+FRAMES_PER_SECOND = 60
+DEFAULT_SECONDS = 5
+DEFAULT_WINDOW = 7  # Earlier games forming the rolling baseline
+DEFAULT_TOLERANCE = 1.0  # Allowed increase over the baseline median (100%, i.e. double)
+
+
+# Metrics compared against the rolling baseline, with the smallest absolute
+# increase that counts, so noise on tiny values is not reported
+REGRESSION_METRICS = {
+    'estimated_chromebook_frame_ms': 1.0,
+    'draw_calls_per_frame': 50,
+    'listeners': 2,
+    'heap_growth_bytes': 1024 * 1024,
+}
+
+
+def result_path(benchmark_dir, game_date):
+    return os.path.join(benchmark_dir, f"{game_date}.json")
+
+
+def load_result(benchmark_dir, game_date):
+    try:
+        with open(result_path(benchmark_dir, game_date), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_result(benchmark_dir, result):
+    """Write one game's result atomically"""
+    path = result_path(benchmark_dir, result['date'])
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(result, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def benchmark_game(game_date, code, seconds):
+    """Run one game for `seconds` of animation and summarize the harness report"""
+    frames = seconds * FRAMES_PER_SECOND
+    report = run_game(code, frames)
+    result = {
+        'date': game_date,
+        'game_filename': f"{game_date}.js",
+        'source_sha256': hashlib.sha256(code.encode('utf-8')).hexdigest(),
+        'benchmark_version': BENCHMARK_VERSION,
+        'benchmarked_at': datetime.now().isoformat(),
+        'seconds': seconds,
+        'available': report['available'],
+        'loaded': report.get('loaded', False),
+        'load_error': report.get('load_error'),
+        'error_count': report.get('error_count', 0),
+    }
+    if not report['available'] or report.get('timed_out'):
+        return result
+
+    estimated_ms = estimate_chromebook_frame_ms(report)
+    mean_ms = report['frame_ms']['mean']
+    result.update({
+        'frames_run': report['frames_run'],
+        'fps': round(1000 / mean_ms, 1) if mean_ms else None,
+        'estimated_chromebook_fps': round(min(FRAMES_PER_SECOND, 1000 / estimated_ms), 1) if estimated_ms else FRAMES_PER_SECOND,
+        'frame_ms': report['frame_ms'],
+        'estimated_chromebook_frame_ms': round(estimated_ms, 3),
+        'draw_calls_per_frame': report['draw_calls']['per_frame_mean'],
+        'draw_calls_max': report['draw_calls']['max'],
+        'listeners': report['listeners']['count'],
+        'heap_growth_bytes': report['heap']['growth_bytes'],
+        'over_frame_budget': estimated_ms > FRAME_BUDGET_MS,
+    })
+    return result
+
+
+def is_current(result, code_hash, seconds):
+    """Whether a stored result measured this exact source with the current settings"""
+    return (result is not None
+            and result.get('source_sha256') == code_hash
+            and result.get('benchmark_version') == BENCHMARK_VERSION
+            and result.get('seconds') == seconds
+            and result.get('available'))
+
+
+def find_regressions(results, window=DEFAULT_WINDOW, tolerance=DEFAULT_TOLERANCE):
+    """Compare every game with the median of the `window` games before it.
+
+    `results` maps date to result; only games that loaded and were measured
+    take part. Returns {date: [regression descriptions]}.
+    """
+    measured = [(game_date, result) for game_date, result in sorted(results.items())
+                if result.get('loaded') and 'frame_ms' in result]
+    regressions = {}
+    for index, (game_date, result) in enumerate(measured):
+        baseline_results = [previous for _, previous in measured[max(0, index - window):index]]
+        if len(baseline_results) < min(3, window):
+            continue
+        found = []
+        for metric, min_increase in REGRESSION_METRICS.items():
+            baseline = statistics.median(previous[metric] for previous in baseline_results)
+            value = result[metric]
+            if value > baseline * (1 + tolerance) and value - baseline >= min_increase:
+                found.append(f"{metric} {value:g} vs baseline {baseline:g}")
+        if found:
+            regressions[game_date] = found
+    return regressions
+
+
+def run_benchmarks(dates=None, seconds=DEFAULT_SECONDS, jobs=None, games_dir=GAMES_DIR,
+                   benchmark_dir=BENCHMARK_DIR, force=False):
+    """Benchmark games whose stored result is missing or stale and return all results"""
+    os.makedirs(benchmark_dir, exist_ok=True)
+    games = game_dates(games_dir)
+    selected = set(dates) if dates else set(games)
+    unknown = selected - set(games)
+    if unknown:
+        raise ValueError(f"No game file for: {', '.join(sorted(unknown))}")
+
+    results = {}
+    pending = []
+    with ArchivePack(archive_path(games_dir)) as pack:
+        for game_date in games:
+            stored = load_result(benchmark_dir, game_date)
+            if game_date in selected:
+                code = read_game_file(games_dir, game_date, pack=pack)
+                code_hash = hashlib.sha256(code.encode('utf-8')).hexdigest()
+                if force or not is_current(stored, code_hash, seconds):
+                    pending.append((game_date, code))
+                    continue
+            if stored is not None:
+                results[game_date] = stored
+
+    print(f"⏱️  Benchmarking {len(pending)} game(s) for {seconds}s each, reusing {len(results)} stored result(s)")
+    # Each benchmark runs in its own node process, so threads are enough
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        for result in executor.map(lambda item: benchmark_game(item[0], item[1], seconds), pending):
+            if result['available']:
+                save_result(benchmark_dir, result)
+            results[result['date']] = result
+    return results
+
+
+def print_report(results, selected, regressions):
+    print(f"\n{'Date':<12}{'FPS':>9}{'Est. CB ms':>12}{'Draws/frame':>13}{'Listeners':>11}{'Heap +KB':>10}")
+    for game_date in sorted(selected):
+        result = results.get(game_date)
+        if result is None or not result.get('available'):
+            reason = result.get('load_error') if result else 'not measured'
+            print(f"{game_date:<12}  ⚠️  not measured: {reason}")
+            continue
+        if not result['loaded'] or 'frame_ms' not in result:
+            print(f"{game_date:<12}  ❌ failed to load: {result['load_error']}")
+            continue
+        flags = []
+        if result['over_frame_budget']:
+            flags.append('🐢 over frame budget')
+        if result['error_count']:
+            flags.append(f"❌ {result['error_count']} errors")
+        if game_date in regressions:
+            flags.append('📈 regression')
+        print(f"{game_date:<12}{result['fps'] or 0:>9.0f}{result['estimated_chromebook_frame_ms']:>12.2f}"
+              f"{result['draw_calls_per_frame']:>13.0f}{result['listeners']:>11}"
+              f"{result['heap_growth_bytes'] / 1024:>10.0f}  {' '.join(flags)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the runtime cost of the games and flag regressions")
+    parser.add_argument('--dates', nargs='+', metavar='YYYY-MM-DD',
+                        help="Games to benchmark (default: all); 'latest' selects the newest game")
+    parser.add_argument('--seconds', type=int, default=DEFAULT_SECONDS, help="Seconds of animation to run each game for")
+    parser.add_argument('--jobs', type=int, default=None, help="Games to run in parallel (default: one per CPU)")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help="Earlier games in the rolling baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed increase over the baseline median, as a fraction")
+    parser.add_argument('--benchmark-dir', default=BENCHMARK_DIR, help="Where per-date results are stored")
+    parser.add_argument('--force', action='store_true', help="Re-measure games even if a current result is stored")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="Exit with status 1 if a selected game regressed or is over the frame budget")
+    args = parser.parse_args(argv)
+
+    dates = args.dates
+    if dates == ['latest']:
+        dates = [game_dates()[-1]]
+
+    results = run_benchmarks(dates, seconds=args.seconds, jobs=args.jobs,
+                             benchmark_dir=args.benchmark_dir, force=args.force)
+    selected = dates or sorted(results)
+    regressions = find_regressions(results, args.window, args.tolerance)
+    print_report(results, selected, regressions)
+
+    flagged = [game_date for game_date in selected if game_date in regressions]
+    hogs = [game_date for game_date in selected if results.get(game_date, {}).get('over_frame_budget')]
+    print(f"\n📊 {len(selected)} game(s): {len(hogs)} over the {FRAME_BUDGET_MS:.1f} ms frame budget, "
+          f"{len(flagged)} regressed against the median of the previous {args.window} games")
+    for game_date in flagged:
+        for regression in regressions[game_date]:
+            print(f"  - {game_date}: {regression}")
+
+    if args.fail_on_regression and (flagged or hogs):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
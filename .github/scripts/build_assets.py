@@ -0,0 +1,219 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from archive_pack import ArchivePack, archive_path, read_game_file
+from js_format import JSSyntaxError, tokenize
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only the gzip variants are built
+    brotli = None
+
+GAMES_DIR = "games"
+DIST_DIR = "games/dist"
+MANIFEST_FILE = "games/dist/manifest.json"
+# Bump when the minifier changes so every game is rebuilt
+BUILD_VERSION = 1
+HASH_LENGTH = 10
+
+GAME_FILE = re.compile(r'^(?:\d{4}-\d{2}-\d{2}|latest)\.js$')
+
+# A line break after these tokens never changes how the next line parses, so
+# it can be dropped. Everywhere else it is kept for automatic semicolon
+# insertion and the restricted productions (return, break, ++, ...).
+NEWLINE_OPTIONAL_AFTER = {';', '{', ',', '(', '[', ':', '=', '=>', '&&', '||', '??', '?'}
+NEWLINE_OPTIONAL_BEFORE = {'}', ')', ']', ',', ';'}
+
+
+def _is_word_end(token):
+    return token.kind == 'regex' or re.match(r'[\w$\\]', token.text[-1]) is not None
+
+
+def _is_word_start(token):
+    return re.match(r'[\w$#\\]', token.text[0]) is not None
+
+
+def _needs_space(previous, token):
+    """Whether two tokens written back to back would lex differently"""
+    if _is_word_end(previous) and _is_word_start(token):
+        return True
+    if previous.kind == 'number' and token.text.startswith('.'):
+        return True
+    if previous.kind == 'punct' and token.kind == 'punct':
+        # a + +b, a - -b, a++ + b
+        if previous.text[-1] in '+-' and token.text[0] == previous.text[-1]:
+            return True
+    if previous.text.endswith('/') and token.text[0] in '/*':
+        return True  # Would start a comment
+    if previous.text.endswith('<') and token.text.startswith('!--'):
+        return True  # Would start an HTML-style comment
+    return False
+
+
+def minify_js(code):
+    """Strip comments and layout whitespace from JavaScript.
+
+    Tokens are re-joined with a space only where they would otherwise merge,
+    and a line break is kept wherever the source had one unless the tokens on
+    either side make it meaningless (e.g. after ';' or before '}').
+    Strings, templates and regexes are copied verbatim.
+    """
+    output = []
+    previous = None
+    pending_newline = False
+    for token in tokenize(code):
+        if token.newlines_before:
+            pending_newline = True
+        if token.kind == 'comment':
+            # A multi-line block comment counts as a line break for ASI
+            if '\n' in token.text or '\r' in token.text:
+                pending_newline = True
+            continue
+        if previous is not None:
+            if pending_newline and not (
+                    previous.kind == 'punct' and previous.text in NEWLINE_OPTIONAL_AFTER
+                    or token.kind == 'punct' and token.text in NEWLINE_OPTIONAL_BEFORE):
+                output.append('\n')
+            elif _needs_space(previous, token):
+                output.append(' ')
+        output.append(token.text)
+        previous = token
+        pending_newline = False
+    return ''.join(output) + '\n'
+
+
+def code_tokens(code):
+    """The non-comment token texts of `code`"""
+    return [token.text for token in tokenize(code) if token.kind != 'comment']
+
+
+def minify_verified(code):
+    """Minify and check the result lexes to the same tokens; None if that is not possible"""
+    try:
+        minified = minify_js(code)
+        if code_tokens(minified) == code_tokens(code):
+            return minified
+    except JSSyntaxError as e:
+        print(f"⚠️  Minifier could not parse the game: {e}")
+        return None
+    print("⚠️  Minified code does not match the original token stream")
+    return None
+
+
+def load_manifest(path=MANIFEST_FILE):
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'version': BUILD_VERSION, 'files': {}}
+    if manifest.get('version') != BUILD_VERSION:
+        return {'version': BUILD_VERSION, 'files': {}}
+    return manifest
+
+
+def _write_bytes(path, data):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def build_game(filename, source, dist_dir=DIST_DIR):
+    """Write the minified, gzip and brotli variants of one game; return its manifest entry"""
+    source_bytes = source.encode('utf-8')
+    minified = minify_verified(source)
+    # A game the minifier cannot handle is still served from dist, just unminified
+    body = (minified if minified is not None else source).encode('utf-8')
+    content_hash = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+    stem = filename[:-len('.js')]
+    name = f"{stem}.{content_hash}.min.js"
+    path = os.path.join(dist_dir, name)
+
+    _write_bytes(path, body)
+    # mtime=0 keeps the gzip output byte-identical between builds
+    _write_bytes(f"{path}.gz", gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write_bytes(f"{path}.br", brotli.compress(body, quality=11))
+
+    return {
+        'path': os.path.relpath(path, GAMES_DIR),
+        'source_sha256': hashlib.sha256(source_bytes).hexdigest(),
+        'minified': minified is not None,
+        'source_bytes': len(source_bytes),
+        'min_bytes': len(body),
+        'gzip_bytes': os.path.getsize(f"{path}.gz"),
+        'brotli_bytes': os.path.getsize(f"{path}.br") if brotli is not None else None,
+    }
+
+
+def remove_build(entry, dist_dir=DIST_DIR):
+    """Delete the files of a superseded build"""
+    path = os.path.join(dist_dir, os.path.basename(entry['path']))
+    for variant in (path, f"{path}.gz", f"{path}.br"):
+        if os.path.exists(variant):
+            os.remove(variant)
+
+
+def build_assets(filenames=None, games_dir=GAMES_DIR, dist_dir=DIST_DIR, manifest_file=MANIFEST_FILE, force=False):
+    """Build the games whose source changed since the last build and update the manifest"""
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = load_manifest(manifest_file)
+    files = manifest['files']
+    built = 0
+    with ArchivePack(archive_path(games_dir)) as pack:
+        if filenames is None:
+            # Packed games are still served from dist, so they keep their builds
+            filenames = sorted({name for name in os.listdir(games_dir) if GAME_FILE.match(name)}
+                               | {f"{game_date}.js" for game_date in pack.dates()})
+        for filename in filenames:
+            source = read_game_file(games_dir, filename[:-len('.js')], 'js', pack)
+            if source is None:
+                raise FileNotFoundError(f"No game {filename} in {games_dir}")
+            source_hash = hashlib.sha256(source.encode('utf-8')).hexdigest()
+            previous = files.get(filename)
+            variants_present = previous is not None and os.path.exists(os.path.join(games_dir, previous['path'])) and (
+                brotli is None or previous['brotli_bytes'] is not None)
+            if not force and variants_present and previous['source_sha256'] == source_hash:
+                continue
+            entry = build_game(filename, source, dist_dir)
+            if previous is not None and previous['path'] != entry['path']:
+                remove_build(previous, dist_dir)
+            files[filename] = entry
+            built += 1
+
+    temp_file = f"{manifest_file}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temp_file, manifest_file)
+    return manifest, built
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build minified and pre-compressed variants of the games")
+    parser.add_argument('files', nargs='*', help="Game files in games/ to build (default: every dated game and latest.js)")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the source is unchanged")
+    args = parser.parse_args(argv)
+
+    if brotli is None:
+        print("⚠️  brotli is not installed, building gzip variants only (pip install brotli)")
+    manifest, built = build_assets([os.path.basename(name) for name in args.files] or None, force=args.force)
+
+    entries = manifest['files'].values()
+    source_total = sum(entry['source_bytes'] for entry in entries)
+    min_total = sum(entry['min_bytes'] for entry in entries)
+    gzip_total = sum(entry['gzip_bytes'] for entry in entries)
+    print(f"✅ Built {built} game(s), {len(manifest['files'])} in {MANIFEST_FILE}")
+    if source_total:
+        print(f"📦 {source_total / 1024:.0f} KB source -> {min_total / 1024:.0f} KB minified "
+              f"({100 * min_total / source_total:.0f}%) -> {gzip_total / 1024:.0f} KB gzip ({100 * gzip_total / source_total:.0f}%)")
+        if brotli is not None:
+            brotli_total = sum(entry['brotli_bytes'] for entry in entries)
+            print(f"📦 {brotli_total / 1024:.0f} KB brotli ({100 * brotli_total / source_total:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import argparse
+import bisect
+import hashlib
+import json
+import os
+
+from archive_pack import ArchivePack, archive_path, iter_game_files, read_game_file
+
+GAMES_DIR = "games"
+CATALOG_FILE = "games/catalog.json"
+INDEX_FILE = "games/index.json"
+CATALOG_VERSION = 1
+HASH_LENGTH = 16  # Hex digits of the SHA-256 kept per game
+
+# Column order of the rows in catalog.json. Rows are plain arrays so the file
+# stays small enough for the site to fetch on every page load.
+CATALOG_FIELDS = ['date', 'theme', 'model', 'size', 'hash', 'functionality', 'runtime', 'external_deps']
+
+def catalog_entry(game_date, code, metadata=None):
+    """Build the catalog row for one game from its source and meta.json contents.
+
+    Scores are the final (post-improvement) results when present, rounded to
+    whole percentages; anything the metadata does not record is null.
+    """
+    metadata = metadata or {}
+    functionality = metadata.get('final_functionality') or metadata.get('functionality')
+    runtime = metadata.get('final_runtime') or metadata.get('runtime')
+    dependencies = metadata.get('dependencies')
+    encoded = code.encode('utf-8')
+    return [
+        game_date,
+        metadata.get('theme'),
+        metadata.get('model'),
+        len(encoded),
+        hashlib.sha256(encoded).hexdigest()[:HASH_LENGTH],
+        round(functionality['percentage']) if functionality else None,
+        round(runtime['percentage']) if runtime and runtime.get('available', True) else None,
+        dependencies['has_external_deps'] if dependencies else None,
+    ]
+
+
+def load_catalog(path=CATALOG_FILE):
+    """Return the catalog rows sorted by date, or [] if missing or from another version"""
+    try:
+        with open(path, 'r') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if catalog.get('version') != CATALOG_VERSION or catalog.get('fields') != CATALOG_FIELDS:
+        return []
+    return sorted(catalog['games'])
+
+
+def _write_json(path, data, **kwargs):
+    """Write JSON atomically so the site never serves a half-written file"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, **kwargs)
+    os.replace(temp_path, path)
+
+
+def save_catalog(rows, path=CATALOG_FILE):
+    # One row per line keeps diffs of the committed file readable
+    body = ',\n'.join(json.dumps(row, separators=(',', ':')) for row in rows)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(f'{{"version":{CATALOG_VERSION},"fields":{json.dumps(CATALOG_FIELDS, separators=(",", ":"))},"games":[\n{body}\n]}}\n')
+    os.replace(temp_path, path)
+
+
+def upsert_rows(rows, entries):
+    """Insert or replace `entries` in the date-sorted `rows`, in place"""
+    dates = [row[0] for row in rows]
+    for entry in entries:
+        position = bisect.bisect_left(dates, entry[0])
+        if position < len(dates) and dates[position] == entry[0]:
+            rows[position] = entry
+        else:
+            dates.insert(position, entry[0])
+            rows.insert(position, entry)
+    return rows
+
+
+def update_index(dates, path=INDEX_FILE):
+    """Add dates to index.json, keeping existing entries and their order"""
+    try:
+        with open(path, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = []
+    known = set(index)
+    for game_date in sorted(dates):
+        if game_date not in known:
+            bisect.insort(index, game_date)
+            known.add(game_date)
+    _write_json(path, index)
+    return index
+
+
+def upsert_games(entries, catalog_file=CATALOG_FILE, index_file=INDEX_FILE):
+    """Record new or regenerated games in catalog.json and index.json.
+
+    Only the given entries are touched; the games directory is not rescanned.
+    """
+    rows = upsert_rows(load_catalog(catalog_file), entries)
+    save_catalog(rows, catalog_file)
+    update_index([entry[0] for entry in entries], index_file)
+    return rows
+
+
+def read_metadata(games_dir, game_date, pack=None):
+    """A dated game's meta.json contents, loose or packed; None if it has none"""
+    try:
+        return json.loads(read_game_file(games_dir, game_date, 'meta.json', pack) or 'null')
+    except ValueError:
+        return None
+
+
+def read_game(games_dir, game_date):
+    """Return (code, metadata) for a dated game, loose or packed; metadata is None without a meta.json"""
+    with ArchivePack(archive_path(games_dir)) as pack:
+        code = read_game_file(games_dir, game_date, 'js', pack)
+        if code is None:
+            raise FileNotFoundError(f"No game for {game_date} in {games_dir}")
+        return code, read_metadata(games_dir, game_date, pack)
+
+
+def rebuild(games_dir=GAMES_DIR, catalog_file=CATALOG_FILE, index_file=INDEX_FILE):
+    """Rebuild catalog.json and index.json from every dated game in the directory and its pack"""
+    with ArchivePack(archive_path(games_dir)) as pack:
+        rows = [catalog_entry(game_date, code, read_metadata(games_dir, game_date, pack))
+                for game_date, code in iter_game_files(games_dir, pack=pack)]
+    dates = [row[0] for row in rows]
+    save_catalog(rows, catalog_file)
+    _write_json(index_file, dates)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain games/catalog.json and games/index.json")
+    parser.add_argument('dates', nargs='*', metavar='YYYY-MM-DD', help="Games to add or refresh")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild both files from the games directory")
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        rows = rebuild()
+        print(f"✅ Rebuilt {CATALOG_FILE} and {INDEX_FILE} with {len(rows)} games")
+    elif args.dates:
+        rows = upsert_games([catalog_entry(game_date, *read_game(GAMES_DIR, game_date)) for game_date in args.dates])
+        print(f"✅ Updated {len(args.dates)} game(s), catalog now lists {len(rows)} games")
+    else:
+        parser.error("give the dates to update, or --rebuild")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import shutil
+
+RUNS_DIR = ".runs"
+# Bump when the checkpointed data changes shape so old runs are not resumed
+CHECKPOINT_VERSION = 2
+PUBLISH_MANIFEST = "publish"
+
+
+def atomic_write(path, content):
+    """Write text through a temporary file and a rename, so a crash never leaves half a file"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def atomic_copy(source, destination):
+    """Copy a file so the destination switches from the old contents to the new in one step"""
+    temp_path = f"{destination}.tmp"
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, destination)
+
+
+def run_key(**settings):
+    """Name of the run directory: runs with the same settings resume each other"""
+    payload = json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def prune_runs(keep=None, runs_dir=RUNS_DIR):
+    """Remove the run directories other than `keep`, left by interrupted runs with other arguments"""
+    try:
+        names = os.listdir(runs_dir)
+    except FileNotFoundError:
+        return []
+    pruned = [name for name in names if name != keep and os.path.isdir(os.path.join(runs_dir, name))]
+    for name in pruned:
+        shutil.rmtree(os.path.join(runs_dir, name), ignore_errors=True)
+    return pruned
+
+
+class CheckpointScope:
+    """Checkpoints of one candidate, named '<scope>.<stage>'"""
+
+    def __init__(self, checkpoints, name):
+        self.checkpoints = checkpoints
+        self.name = name
+
+    def load(self, stage):
+        return self.checkpoints.load(f"{self.name}.{stage}")
+
+    def save(self, stage, data):
+        self.checkpoints.save(f"{self.name}.{stage}", data)
+
+
+class RunCheckpoints:
+    """Stage results and staged artifacts of one generator run, under .runs/<key>/.
+
+    Checkpoints are JSON files written atomically as each stage completes.
+    Artifacts are written to staged/ and only reach games/ in the publish
+    step, so an interrupted run leaves games/ untouched and running again
+    with the same arguments resumes from the last completed stage.
+    """
+
+    def __init__(self, key, runs_dir=RUNS_DIR):
+        self.directory = os.path.join(runs_dir, key)
+        self.staging_dir = os.path.join(self.directory, 'staged')
+        self.resumed = os.path.isdir(self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self, name):
+        """The checkpointed data, or None if missing, unreadable or from another version"""
+        try:
+            with open(self.path(name), 'r') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get('version') != CHECKPOINT_VERSION:
+            return None
+        return checkpoint['data']
+
+    def save(self, name, data):
+        atomic_write(self.path(name), json.dumps({'version': CHECKPOINT_VERSION, 'data': data}))
+
+    def remove(self, name):
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def scope(self, name):
+        return CheckpointScope(self, name)
+
+    def staged_path(self, path):
+        """Where the artifact destined for `path` is written before publishing"""
+        return os.path.join(self.staging_dir, path)
+
+    def discard(self):
+        """Remove the run directory once everything it produced is published"""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from fake_openai import SAMPLE_GAME
+from mock_openai_server import MockOpenAIServer, Scenario
+
+GAME_DATE = "2030-01-15"
+NEXT_DATE = "2030-01-16"
+RETRY_BACKOFF_SECONDS = 0.01  # Keeps retry scenarios fast; the schedule still doubles
+
+# The sample game with an external image, so the dependency repair has work to do
+GAME_WITH_EXTERNAL_IMAGE = SAMPLE_GAME.replace(
+    "  const ctx = canvas.getContext('2d');\n",
+    "  const ctx = canvas.getContext('2d');\n"
+    "  const sparkImage = new Image();\n"
+    "  sparkImage.src = 'https://example.com/spark.png';\n",
+)
+# ... that also has no input handling or game loop, so it fails the functionality check too
+BROKEN_GAME_WITH_EXTERNAL_IMAGE = GAME_WITH_EXTERNAL_IMAGE.replace(
+    "window.addEventListener('keydown', (event) => {", "const onKey = ((event) => {",
+).replace("    requestAnimationFrame(update);\n", "")
+# The functionality repair restores the game, keeping the image URL if the code it was given had one
+FUNCTIONALITY_REPAIR = 'improve its basic functionality and playability'
+
+# Each scenario: the mock server's behaviour, the generator arguments, what the
+# run must produce, and whether a second run must replay it from the response
+# cache offline or resume it from its checkpoints once the faults are gone
+SCENARIOS = {
+    'happy': {
+        'scenario': {},
+        'args': [],
+        'expect_exit': 0,
+    },
+    'flaky': {
+        # One failure short of STAGE_RETRIES, so the first stage still succeeds
+        'scenario': {'faults': [{'status': 500, 'times': 1}, {'status': 429, 'times': 1}]},
+        'args': [],
+        'expect_exit': 0,
+        'expect_failed_requests': 2,
+    },
+    'slow': {
+        'scenario': {'faults': [{'delay': 0.25, 'times': 1000}]},
+        'args': ['--candidates', '3', '--max-concurrency', '3'],
+        'expect_exit': 0,
+    },
+    'streaming': {
+        'scenario': {},
+        'args': ['--stream'],
+        'expect_exit': 0,
+    },
+    'dependency_repair': {
+        'scenario': {'game': GAME_WITH_EXTERNAL_IMAGE},
+        'args': [],
+        'expect_exit': 0,
+        'expect_no_urls': True,
+        # The mechanical repair runs on the cheap model and resolves the problem first time
+        'expect_cheap_calls': 1,
+    },
+    'combined_repair': {
+        # The concurrent dependency repair wins but still fails the functionality
+        # check, so the functionality repair is chained onto it; every run's
+        # game must pass the functionality check and this one must lose its URL
+        'scenario': {'game': BROKEN_GAME_WITH_EXTERNAL_IMAGE,
+                     'responses': [{'match': f"{FUNCTIONALITY_REPAIR}(?s:.*)example\\.com", 'output_text': GAME_WITH_EXTERNAL_IMAGE},
+                                   {'match': FUNCTIONALITY_REPAIR, 'output_text': SAMPLE_GAME}]},
+        'args': [],
+        'expect_exit': 0,
+        'expect_no_urls': True,
+    },
+    'stream_abort': {
+        # The redraft of the aborted stream is answered with a clean game, as the model would
+        'scenario': {'game': GAME_WITH_EXTERNAL_IMAGE,
+                     'responses': [{'match': 'previous attempt at this game was stopped', 'output_text': SAMPLE_GAME}],
+                     # The first streamed event reaches the generator well after the server sends it
+                     'event_delay': 0.25},
+        'args': ['--stream'],
+        'expect_exit': 0,
+        'expect_no_urls': True,
+        'expect_aborted_streams': 1,
+    },
+    'escalation': {
+        # The repair echoes the game unchanged, so the cheap model's attempt is retried on the standard model
+        'scenario': {'game': GAME_WITH_EXTERNAL_IMAGE},
+        'args': ['--full-repairs'],
+        'expect_exit': 0,
+        'expect_tiers': ['standard', 'cheap', 'standard', 'standard'],
+    },
+    'economy': {
+        # The sample game passes every validator with full marks, so there is nothing to improve
+        'scenario': {},
+        'args': ['--schedule', 'economy'],
+        'expect_exit': 0,
+        'expect_requests': 1,
+        'expect_skipped_calls': 1,
+    },
+    'budget': {
+        # The initial generation alone uses up the budget, so the improvement is skipped
+        'scenario': {},
+        'args': ['--token-budget', '1'],
+        'expect_exit': 0,
+        'expect_requests': 1,
+        'expect_skipped_calls': 1,
+    },
+    'outage': {
+        'scenario': {'faults': [{'status': 500, 'times': 1000}]},
+        'args': [],
+        'expect_exit': 1,
+    },
+    'replay': {
+        'scenario': {},
+        'args': [],
+        'expect_exit': 0,
+        'replay_offline': True,
+    },
+    'resume': {
+        # The second date fails, the rerun must redo only its model calls
+        'scenario': {'faults': [{'match': 'magnetism', 'status': 500, 'times': 1000}]},
+        'args': ['--dates', GAME_DATE, NEXT_DATE, '--themes', 'electricity', 'magnetism', '--no-cache'],
+        'expect_exit': 1,
+        'resume': True,
+    },
+}
+
+EXPECTED_OUTPUTS = [
+    f"games/{GAME_DATE}.js",
+    f"games/{GAME_DATE}.meta.json",
+    f"games/{GAME_DATE}.meta.md",
+    f"games/traces/{GAME_DATE}.jsonl",
+    "games/latest.js",
+    "games/catalog.json",
+    "games/index.json",
+    "games/similarity.json",
+]
+
+
+def run_generator(generator, argv, quiet=True):
+    """Run the generator's main() in-process and return its exit code"""
+    output = io.StringIO() if quiet else sys.stdout
+    try:
+        with contextlib.redirect_stdout(output):
+            asyncio.run(generator.main(argv))
+    except SystemExit as e:
+        return e.code or 0
+    return 0
+
+
+def check_outputs(spec):
+    """Problems with the files written by a successful run"""
+    problems = [f"missing {path}" for path in EXPECTED_OUTPUTS if not os.path.exists(path)]
+    if problems:
+        return problems
+    with open(f"games/{GAME_DATE}.meta.json", 'r') as f:
+        metadata = json.load(f)
+    with open(f"games/{GAME_DATE}.js", 'r') as f:
+        code = f.read()
+    with open("games/index.json", 'r') as f:
+        if GAME_DATE not in json.load(f):
+            problems.append(f"{GAME_DATE} missing from games/index.json")
+    if metadata['trace']['model_calls'] < 1:
+        problems.append("trace records no model calls")
+    if not metadata['functionality']['passing']:
+        problems.append("generated game failed the functionality checks")
+    if spec.get('expect_no_urls') and 'https://' in code:
+        problems.append("external URL survived the dependency repair")
+    for field in ('skipped_calls', 'cheap_calls'):
+        expected = spec.get(f"expect_{field}")
+        if expected is not None and metadata['schedule'][field] != expected:
+            problems.append(f"scheduler recorded {metadata['schedule'][field]} {field.replace('_', ' ')}, expected {expected}")
+    return problems
+
+
+def check_resume(generator, server, argv, quiet=True):
+    """Problems with rerunning an interrupted run once the mock server recovers"""
+    problems = []
+    if not os.path.exists(f"games/{GAME_DATE}.js"):
+        problems.append("the date that succeeded was not published by the interrupted run")
+    if not os.listdir(".runs"):
+        problems.append("the interrupted run kept no checkpoints")
+    server.scenario.faults = []
+    served = len(server.requests)
+    if run_generator(generator, argv, quiet) != 0:
+        return problems + ["resumed run failed"]
+    resent = [request for request in server.requests[served:] if 'electricity' in request['prompt']]
+    if resent:
+        problems.append(f"resumed run repeated {len(resent)} model calls for the date that had succeeded")
+    if not os.path.exists(f"games/{NEXT_DATE}.js"):
+        problems.append("resumed run did not publish the failed date")
+    if os.listdir(".runs"):
+        problems.append("checkpoints left behind after a complete run")
+    return problems
+
+
+def run_scenario(generator, name, spec, quiet=True):
+    """Run one scenario in a fresh working directory and return its report"""
+    scenario = Scenario(spec['scenario'].get('responses', ()), spec['scenario'].get('faults', ()),
+                        spec['scenario'].get('game', SAMPLE_GAME), spec['scenario'].get('event_delay', 0))
+    argv = spec['args'] if '--dates' in spec['args'] else ['--dates', GAME_DATE] + spec['args']
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"e2e-{name}-") as work_dir, MockOpenAIServer(scenario) as server:
+        os.chdir(work_dir)
+        os.environ['OPENAI_BASE_URL'] = server.base_url
+        try:
+            os.makedirs("games")
+            argv += ['--cache-dir', os.path.join(work_dir, 'cache')]
+            started = time.perf_counter()
+            exit_code = run_generator(generator, argv, quiet)
+            seconds = time.perf_counter() - started
+            problems = []
+            if exit_code != spec['expect_exit']:
+                problems.append(f"exit code {exit_code}, expected {spec['expect_exit']}")
+            elif exit_code == 0:
+                problems += check_outputs(spec)
+            failed = sum(1 for request in server.requests if request['status'] not in (200, 'aborted'))
+            if 'expect_failed_requests' in spec and failed != spec['expect_failed_requests']:
+                problems.append(f"{failed} failed requests, expected {spec['expect_failed_requests']}")
+            aborted = sum(1 for request in server.requests if request['status'] == 'aborted')
+            if aborted < spec.get('expect_aborted_streams', 0):
+                problems.append(f"{aborted} aborted streams, expected at least {spec['expect_aborted_streams']}")
+            if 'expect_requests' in spec and len(server.requests) != spec['expect_requests']:
+                problems.append(f"{len(server.requests)} requests, expected {spec['expect_requests']}")
+            if 'expect_tiers' in spec:
+                tiers = {generator.CHEAP_MODEL_NAME: 'cheap', generator.MODEL_NAME: 'standard'}
+                sent = [tiers.get(request['model'], request['model']) for request in server.requests]
+                if sent != spec['expect_tiers']:
+                    problems.append(f"requests went to {sent}, expected {spec['expect_tiers']}")
+            if spec.get('replay_offline'):
+                served = len(server.requests)
+                os.remove(f"games/{GAME_DATE}.js")
+                if run_generator(generator, argv + ['--offline'], quiet) != 0:
+                    problems.append("offline replay from the response cache failed")
+                elif len(server.requests) != served:
+                    problems.append(f"offline replay sent {len(server.requests) - served} requests")
+                elif not os.path.exists(f"games/{GAME_DATE}.js"):
+                    problems.append("offline replay did not rewrite the game")
+            if spec.get('resume'):
+                problems += check_resume(generator, server, argv, quiet)
+        finally:
+            os.environ.pop('OPENAI_BASE_URL', None)
+            os.chdir(previous_dir)
+    durations = sorted(request['seconds'] for request in server.requests)
+    return {
+        'scenario': name,
+        'passing': not problems,
+        'problems': problems,
+        'seconds': round(seconds, 3),
+        'requests': len(server.requests),
+        'failed_requests': failed,
+        'streamed_requests': sum(1 for request in server.requests if request['stream']),
+        'aborted_streams': aborted,
+        'slowest_request_seconds': durations[-1] if durations else 0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the generator end to end against a local mock OpenAI server")
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--verbose', action='store_true', help="show the generator's output")
+    parser.add_argument('--json', metavar='FILE', help="also write the reports as JSON")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    # The real SDK talks to the mock server; nothing here may reach the network
+    os.environ.pop('GAME_GENERATOR_FAKE_OPENAI', None)
+    os.environ['OPENAI_API_KEY'] = 'test'
+    with contextlib.redirect_stdout(io.StringIO()):
+        import generate_game_with_assistant as generator
+    generator.RETRY_BACKOFF_SECONDS = RETRY_BACKOFF_SECONDS
+
+    reports = []
+    for name in args.scenarios or SCENARIOS:
+        report = run_scenario(generator, name, SCENARIOS[name], quiet=not args.verbose)
+        reports.append(report)
+        status = '✅' if report['passing'] else '❌'
+        print(f"{status} {name}: {report['seconds']:.2f}s, {report['requests']} requests "
+              f"({report['failed_requests']} failed, {report['streamed_requests']} streamed, "
+              f"{report['aborted_streams']} aborted), slowest {report['slowest_request_seconds']:.2f}s")
+        for problem in report['problems']:
+            print(f"    ❌ {problem}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+    failures = sum(not report['passing'] for report in reports)
+    print(f"\n{len(reports) - failures} of {len(reports)} scenarios passed")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import re
+
+# A small but complete canvas game returned for fresh generation prompts, so the
+# whole pipeline can run without network access or an API key.
+SAMPLE_GAME = """// Spark Counter - offline sample game used by the fake OpenAI client
+(function () {
+  const stage = document.getElementById('game-of-the-day-stage');
+  const canvas = document.createElement('canvas');
+  canvas.width = 720;
+  canvas.height = 480;
+  canvas.setAttribute('aria-label', 'Spark Counter: add the sparks to light the bulb');
+  stage.appendChild(canvas);
+  const ctx = canvas.getContext('2d');
+
+  let audioCtx = null;
+  try {
+    audioCtx = new (window.AudioContext || window.webkitAudioContext)();
+  } catch (error) {
+    console.warn('Audio unavailable', error);
+  }
+
+  function beep(frequency) {
+    if (!audioCtx) return;
+    const oscillator = audioCtx.createOscillator();
+    const gain = audioCtx.createGain();
+    oscillator.frequency.value = frequency;
+    gain.gain.value = 0.05;
+    oscillator.connect(gain).connect(audioCtx.destination);
+    oscillator.start();
+    oscillator.stop(audioCtx.currentTime + 0.15);
+  }
+
+  const state = { score: 0, lives: 3, a: 2, b: 3, answer: '' };
+
+  function newQuestion() {
+    state.a = 1 + Math.floor(Math.random() * 9);
+    state.b = 1 + Math.floor(Math.random() * 9);
+    state.answer = '';
+  }
+
+  window.addEventListener('keydown', (event) => {
+    if (/^[0-9]$/.test(event.key)) {
+      state.answer += event.key;
+    } else if (event.key === 'Backspace') {
+      state.answer = state.answer.slice(0, -1);
+    } else if (event.key === 'Enter') {
+      if (Number(state.answer) === state.a + state.b) {
+        state.score += 1;
+        beep(660);
+      } else {
+        state.lives -= 1;
+        beep(220);
+      }
+      newQuestion();
+    }
+  });
+
+  function draw() {
+    ctx.fillStyle = '#10213a';
+    ctx.fillRect(0, 0, 720, 480);
+    ctx.fillStyle = '#ffd84d';
+    ctx.beginPath();
+    ctx.arc(360, 160, 60, 0, Math.PI * 2);
+    ctx.fill();
+    ctx.fillStyle = '#ffffff';
+    ctx.font = '32px sans-serif';
+    ctx.fillText(`${state.a} + ${state.b} = ${state.answer}`, 270, 320);
+    ctx.font = '18px sans-serif';
+    ctx.fillText(`Score: ${state.score}  Lives: ${state.lives}`, 20, 30);
+    ctx.fillText('Type the answer and press Enter', 230, 440);
+  }
+
+  function update() {
+    draw();
+    requestAnimationFrame(update);
+  }
+
+  newQuestion();
+  update();
+})();
+"""
+
+# Prompts that embed an existing game put it between two lines of '---'
+EMBEDDED_CODE = re.compile(r'\n---\n(.*)\n---\n?$', re.DOTALL)
+# Targeted repair prompts list excerpts as <<<REGION n (lines a-b) ... >>>
+PATCH_REGION = re.compile(r'^<<<REGION (\d+) \(lines \d+-\d+\)\n(.*?)\n>>>$', re.DOTALL | re.MULTILINE)
+EXTERNAL_URL = re.compile(r'https?://[^\s\'"`)]+')
+
+
+def patch_reply(regions):
+    """Answer a targeted repair prompt by dropping the URLs from each region"""
+    return json.dumps([
+        {'region': int(number), 'replacement': EXTERNAL_URL.sub('', text)}
+        for number, text in regions
+    ])
+
+
+def fake_reply(prompt, game=SAMPLE_GAME):
+    """The answer to a prompt: a patch for region prompts, the embedded game echoed back, else `game`"""
+    regions = PATCH_REGION.findall(prompt)
+    if regions:
+        return patch_reply(regions)
+    embedded = EMBEDDED_CODE.search(prompt)
+    return embedded.group(1) if embedded else game
+
+
+class FakeUsage:
+    def __init__(self, input_tokens, output_tokens):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.total_tokens = input_tokens + output_tokens
+
+
+class FakeResponse:
+    def __init__(self, output_text, prompt):
+        self.output_text = output_text
+        # Roughly four characters per token, like the real tokenizer on code
+        self.usage = FakeUsage(len(prompt) // 4, len(output_text) // 4)
+
+
+class FakeStreamEvent:
+    def __init__(self, type, delta=None, response=None):
+        self.type = type
+        self.delta = delta
+        self.response = response
+
+
+class FakeStream:
+    """Async iterator over text deltas followed by a response.completed event"""
+
+    def __init__(self, owner, response, chunk_size):
+        self.owner = owner
+        self.response = response
+        self.chunk_size = chunk_size
+        self.closed = False
+
+    async def __aiter__(self):
+        text = self.response.output_text
+        chunk_count = max(1, -(-len(text) // self.chunk_size))
+        for start in range(0, len(text), self.chunk_size):
+            if self.closed:
+                return
+            if self.owner.latency:
+                # Spread the call's latency over the chunks like a real stream
+                await asyncio.sleep(self.owner.latency / chunk_count)
+            yield FakeStreamEvent('response.output_text.delta', delta=text[start:start + self.chunk_size])
+        yield FakeStreamEvent('response.completed', response=self.response)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeResponses:
+    def __init__(self, owner):
+        self.owner = owner
+
+    async def create(self, model, input, stream=False, **kwargs):
+        """Answer like responses.create: patch regions, echo embedded code, else the configured game"""
+        owner = self.owner
+        owner.calls.append({'model': model, 'input': input, 'stream': stream, **kwargs})
+        if owner.latency and not stream:
+            await asyncio.sleep(owner.latency)
+        if owner.failures > 0:
+            owner.failures -= 1
+            raise ConnectionError("Simulated connection failure from fake OpenAI client")
+
+        prompt = input[-1]['content']
+        response = FakeResponse(fake_reply(prompt, owner.game), prompt)
+        if stream:
+            return FakeStream(owner, response, owner.chunk_size)
+        return response
+
+
+class FakeAsyncOpenAI:
+    """Local stand-in for openai.AsyncOpenAI used for offline runs and tests.
+
+    `latency` delays every call (spread over the chunks when streaming), the
+    first `failures` calls raise ConnectionError so retry handling can be
+    exercised, and `game` is returned for prompts without embedded code.
+    Every request is recorded in `calls`.
+    """
+
+    def __init__(self, latency=0.0, failures=0, game=SAMPLE_GAME, chunk_size=256):
+        self.latency = latency
+        self.failures = failures
+        self.game = game
+        self.chunk_size = chunk_size
+        self.calls = []
+        self.responses = FakeResponses(self)
+
+    async def close(self):
+        pass
@@ -0,0 +1,661 @@
+// Headless execution harness for generated games.
+//
+// Usage: node --expose-gc game_harness.js <game.js> [frames]
+//
+// Loads the game into a vm context with a stubbed DOM, 2D canvas and Web Audio
+// API (the page provides a 720x480 #game-of-the-day-stage), drives a fixed
+// number of animation frames on a virtual 60 fps clock while feeding a few
+// keyboard and mouse events, and prints one JSON report with exceptions, frame
+// times, draw calls, listeners and heap usage.
+
+'use strict';
+
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const FRAME_MS = 1000 / 60;
+const STAGE_WIDTH = 720;
+const STAGE_HEIGHT = 480;
+const MAX_REPORTED_ERRORS = 5;
+
+const gamePath = process.argv[2];
+const frameCount = parseInt(process.argv[3] || '120', 10);
+
+const report = {
+  loaded: false,
+  load_error: null,
+  errors: [],
+  error_count: 0,
+  console_errors: 0,
+  frames_run: 0,
+  frame_ms: { mean: 0, p95: 0, max: 0 },
+  draw_calls: { total: 0, per_frame_mean: 0, max: 0 },
+  listeners: { count: 0, types: {} },
+  audio_contexts: 0,
+  animating: false,
+  heap: { before_bytes: 0, after_bytes: 0, growth_bytes: 0 },
+};
+
+// "TypeError: message (at game.js:12:5)" without the source line V8 echoes
+function describeError(error) {
+  if (!error || typeof error !== 'object') return String(error);
+  const frame = String(error.stack || '').split('\n').find((line) => line.trim().startsWith('at '));
+  const message = `${error.name || 'Error'}: ${String(error.message).slice(0, 300)}`;
+  return frame ? `${message} (${frame.trim()})` : message;
+}
+
+function recordError(error) {
+  report.error_count += 1;
+  if (report.errors.length < MAX_REPORTED_ERRORS) {
+    report.errors.push(describeError(error));
+  }
+}
+
+// --- Virtual clock, timers and animation frames ---------------------------
+
+let now = 0;
+let nextId = 1;
+let rafCallbacks = new Map();
+const timers = new Map();
+
+function requestAnimationFrame(callback) {
+  const id = nextId++;
+  rafCallbacks.set(id, callback);
+  return id;
+}
+
+function cancelAnimationFrame(id) {
+  rafCallbacks.delete(id);
+}
+
+function addTimer(callback, delay, args, repeat) {
+  const id = nextId++;
+  const interval = Math.max(0, Number(delay) || 0);
+  timers.set(id, { callback, args, due: now + interval, interval, repeat });
+  return id;
+}
+
+function clearTimer(id) {
+  timers.delete(id);
+}
+
+function guarded(callback, args) {
+  try {
+    if (typeof callback === 'function') callback(...args);
+  } catch (error) {
+    recordError(error);
+  }
+}
+
+function runDueTimers() {
+  // Bound the work per frame so a zero-delay interval cannot spin forever
+  for (let pass = 0; pass < 100; pass++) {
+    const due = [...timers.entries()].filter(([, timer]) => timer.due <= now);
+    if (!due.length) return;
+    for (const [id, timer] of due) {
+      if (!timers.has(id)) continue;
+      if (timer.repeat) timer.due += Math.max(timer.interval, 1);
+      else timers.delete(id);
+      guarded(timer.callback, timer.args);
+    }
+  }
+}
+
+// --- Generic stubs --------------------------------------------------------
+
+// A callable object that absorbs any property access, call or assignment, for
+// browser APIs the harness does not model explicitly.
+function universalStub() {
+  const values = {};
+  const target = function () {};
+  return new Proxy(target, {
+    get(_, prop) {
+      if (prop === Symbol.toPrimitive) return () => 0;
+      if (prop === 'then') return undefined;
+      if (prop in values) return values[prop];
+      if (prop === 'connect') return (destination) => destination;
+      return (values[prop] = universalStub());
+    },
+    set(_, prop, value) {
+      values[prop] = value;
+      return true;
+    },
+    apply() {
+      return universalStub();
+    },
+    construct() {
+      return universalStub();
+    },
+  });
+}
+
+function withFallback(object) {
+  return new Proxy(object, {
+    get(target, prop, receiver) {
+      if (prop in target || typeof prop === 'symbol') return Reflect.get(target, prop, receiver);
+      return (target[prop] = universalStub());
+    },
+  });
+}
+
+const listenerTargets = [];
+
+class EventTarget {
+  constructor(name) {
+    this._name = name;
+    this._listeners = {};
+    listenerTargets.push(this);
+  }
+
+  addEventListener(type, listener) {
+    (this._listeners[type] = this._listeners[type] || []).push(listener);
+  }
+
+  removeEventListener(type, listener) {
+    const list = this._listeners[type] || [];
+    const index = list.indexOf(listener);
+    if (index >= 0) list.splice(index, 1);
+  }
+
+  dispatchEvent(event) {
+    event.target = event.target || this;
+    event.currentTarget = this;
+    for (const listener of [...(this._listeners[event.type] || [])]) {
+      guarded(typeof listener === 'function' ? listener : listener && listener.handleEvent, [event]);
+    }
+    const handler = this['on' + event.type];
+    if (typeof handler === 'function') guarded(handler, [event]);
+    return true;
+  }
+}
+
+// --- Canvas ---------------------------------------------------------------
+
+let drawCallsThisFrame = 0;
+
+function gradientStub() {
+  return { addColorStop() {} };
+}
+
+// Games polyfill methods such as roundRect on the prototype, so contexts look
+// there before treating a property as a draw call
+function CanvasRenderingContext2D() {}
+
+function createContext2d(canvas) {
+  const state = {
+    canvas,
+    fillStyle: '#000',
+    strokeStyle: '#000',
+    lineWidth: 1,
+    font: '10px sans-serif',
+    textAlign: 'start',
+    textBaseline: 'alphabetic',
+    globalAlpha: 1,
+    globalCompositeOperation: 'source-over',
+    shadowBlur: 0,
+    shadowColor: 'transparent',
+    lineCap: 'butt',
+    lineJoin: 'miter',
+    imageSmoothingEnabled: true,
+  };
+  const methods = {
+    measureText(text) {
+      const match = String(state.font).match(/(\d+)px/);
+      const size = match ? parseInt(match[1], 10) : 10;
+      return { width: String(text).length * size * 0.55, actualBoundingBoxAscent: size * 0.8, actualBoundingBoxDescent: size * 0.2 };
+    },
+    createLinearGradient: gradientStub,
+    createRadialGradient: gradientStub,
+    createConicGradient: gradientStub,
+    createPattern: () => ({}),
+    getImageData(x, y, width, height) {
+      return { width, height, data: new Uint8ClampedArray(Math.max(0, width * height * 4)) };
+    },
+    createImageData(width, height) {
+      return { width, height, data: new Uint8ClampedArray(Math.max(0, width * height * 4)) };
+    },
+    getTransform: () => ({ a: 1, b: 0, c: 0, d: 1, e: 0, f: 0 }),
+    isPointInPath: () => false,
+    isPointInStroke: () => false,
+    getLineDash: () => [],
+  };
+  return new Proxy(state, {
+    get(target, prop) {
+      if (prop in methods) {
+        drawCallsThisFrame += 1;
+        return methods[prop];
+      }
+      if (prop in target || typeof prop === 'symbol') return target[prop];
+      if (Object.prototype.hasOwnProperty.call(CanvasRenderingContext2D.prototype, prop)) {
+        return CanvasRenderingContext2D.prototype[prop];
+      }
+      // Every other context method (fillRect, arc, fillText, save, ...) is a draw call
+      return () => {
+        drawCallsThisFrame += 1;
+      };
+    },
+    set(target, prop, value) {
+      target[prop] = value;
+      return true;
+    },
+  });
+}
+
+// --- DOM ------------------------------------------------------------------
+
+class Element extends EventTarget {
+  constructor(tagName) {
+    super(tagName);
+    this.tagName = String(tagName).toUpperCase();
+    this.children = [];
+    this.childNodes = this.children;
+    this.parentNode = null;
+    this.style = {};
+    this.dataset = {};
+    this.attributes = {};
+    this.innerHTML = '';
+    this.textContent = '';
+    this.id = '';
+    this.className = '';
+    this.tabIndex = -1;
+    const classes = new Set();
+    this.classList = {
+      add: (...names) => names.forEach((name) => classes.add(name)),
+      remove: (...names) => names.forEach((name) => classes.delete(name)),
+      toggle: (name) => (classes.has(name) ? (classes.delete(name), false) : (classes.add(name), true)),
+      contains: (name) => classes.has(name),
+    };
+    if (this.tagName === 'CANVAS') {
+      this.width = 300;
+      this.height = 150;
+      this._context = null;
+    }
+  }
+
+  get clientWidth() {
+    return this.width || STAGE_WIDTH;
+  }
+
+  get clientHeight() {
+    return this.height || STAGE_HEIGHT;
+  }
+
+  get offsetWidth() {
+    return this.clientWidth;
+  }
+
+  get offsetHeight() {
+    return this.clientHeight;
+  }
+
+  get firstChild() {
+    return this.children[0] || null;
+  }
+
+  getContext(kind) {
+    if (this.tagName !== 'CANVAS' || kind !== '2d') return null;
+    return (this._context = this._context || createContext2d(this));
+  }
+
+  appendChild(child) {
+    if (child && typeof child === 'object') {
+      child.parentNode = this;
+      this.children.push(child);
+    }
+    return child;
+  }
+
+  append(...children) {
+    children.forEach((child) => this.appendChild(child));
+  }
+
+  prepend(...children) {
+    children.forEach((child) => this.appendChild(child));
+  }
+
+  insertBefore(child) {
+    return this.appendChild(child);
+  }
+
+  removeChild(child) {
+    const index = this.children.indexOf(child);
+    if (index >= 0) this.children.splice(index, 1);
+    return child;
+  }
+
+  remove() {
+    if (this.parentNode) this.parentNode.removeChild(this);
+  }
+
+  replaceChildren(...children) {
+    this.children.length = 0;
+    this.append(...children);
+  }
+
+  setAttribute(name, value) {
+    this.attributes[name] = String(value);
+    if (name === 'id') this.id = String(value);
+  }
+
+  getAttribute(name) {
+    return name in this.attributes ? this.attributes[name] : null;
+  }
+
+  removeAttribute(name) {
+    delete this.attributes[name];
+  }
+
+  hasAttribute(name) {
+    return name in this.attributes;
+  }
+
+  getBoundingClientRect() {
+    const width = this.clientWidth;
+    const height = this.clientHeight;
+    return { left: 0, top: 0, x: 0, y: 0, right: width, bottom: height, width, height };
+  }
+
+  querySelector() {
+    return null;
+  }
+
+  querySelectorAll() {
+    return [];
+  }
+
+  focus() {}
+
+  blur() {}
+
+  click() {
+    this.dispatchEvent(makeEvent('click', { clientX: 0, clientY: 0 }));
+  }
+
+  contains() {
+    return false;
+  }
+}
+
+function createElement(tagName) {
+  return withFallback(new Element(tagName));
+}
+
+const stage = createElement('div');
+stage.id = 'game-of-the-day-stage';
+stage.width = STAGE_WIDTH;
+stage.height = STAGE_HEIGHT;
+
+const body = createElement('body');
+body.appendChild(stage);
+
+function findById(element, id) {
+  if (element.id === id) return element;
+  for (const child of element.children) {
+    if (child && child.children) {
+      const found = findById(child, id);
+      if (found) return found;
+    }
+  }
+  return null;
+}
+
+const documentObject = withFallback(Object.assign(new EventTarget('document'), {
+  body,
+  head: createElement('head'),
+  documentElement: body,
+  readyState: 'complete',
+  hidden: false,
+  visibilityState: 'visible',
+  getElementById: (id) => findById(body, id),
+  createElement,
+  createElementNS: (_, tagName) => createElement(tagName),
+  createTextNode: (text) => ({ textContent: String(text) }),
+  querySelector: (selector) => (selector === '#game-of-the-day-stage' ? stage : null),
+  querySelectorAll: () => [],
+  hasFocus: () => true,
+}));
+
+// --- Web Audio ------------------------------------------------------------
+
+class AudioContextStub {
+  constructor() {
+    report.audio_contexts += 1;
+    this.sampleRate = 44100;
+    this.state = 'running';
+    this.destination = universalStub();
+    this.listener = universalStub();
+    return withFallback(this);
+  }
+
+  get currentTime() {
+    return now / 1000;
+  }
+
+  createBuffer(channels, length, sampleRate) {
+    const data = [];
+    for (let i = 0; i < channels; i++) data.push(new Float32Array(Math.max(0, length)));
+    return { numberOfChannels: channels, length, sampleRate, duration: length / sampleRate, getChannelData: (i) => data[i] };
+  }
+
+  resume() {
+    this.state = 'running';
+    return Promise.resolve();
+  }
+
+  suspend() {
+    this.state = 'suspended';
+    return Promise.resolve();
+  }
+
+  close() {
+    this.state = 'closed';
+    return Promise.resolve();
+  }
+
+  decodeAudioData() {
+    return Promise.reject(new Error('decodeAudioData is not available in the harness'));
+  }
+}
+
+// Every create* node is a universal stub: params, connect() chaining, start()/stop()
+for (const name of ['createOscillator', 'createGain', 'createBiquadFilter', 'createBufferSource', 'createDynamicsCompressor',
+  'createStereoPanner', 'createDelay', 'createConvolver', 'createAnalyser', 'createWaveShaper', 'createPanner',
+  'createChannelMerger', 'createChannelSplitter', 'createPeriodicWave', 'createConstantSource', 'createMediaElementSource']) {
+  AudioContextStub.prototype[name] = function () {
+    return universalStub();
+  };
+}
+
+// --- Page globals ---------------------------------------------------------
+// A vm context only gives the game its own globals; it is not a security
+// boundary (the game can reach `process` through any host function), so
+// runtime_harness.py confines the whole node process instead.
+
+function makeEvent(type, fields) {
+  return Object.assign({
+    type,
+    preventDefault() {},
+    stopPropagation() {},
+    stopImmediatePropagation() {},
+    timeStamp: now,
+    repeat: false,
+    shiftKey: false,
+    ctrlKey: false,
+    altKey: false,
+    metaKey: false,
+    button: 0,
+    buttons: 0,
+    touches: [],
+    changedTouches: [],
+  }, fields);
+}
+
+function makeGlobals() {
+  const windowTarget = new EventTarget('window');
+  const globals = {
+    console: {
+      log() {},
+      info() {},
+      debug() {},
+      warn() {},
+      error() {
+        report.console_errors += 1;
+      },
+    },
+    document: documentObject,
+    navigator: withFallback({ userAgent: 'game-harness', language: 'en-US', maxTouchPoints: 0, vibrate: () => false }),
+    location: withFallback({ href: 'http://localhost/', hostname: 'localhost', search: '', hash: '' }),
+    localStorage: withFallback({ _data: {}, getItem(k) { return k in this._data ? this._data[k] : null; }, setItem(k, v) { this._data[k] = String(v); }, removeItem(k) { delete this._data[k]; } }),
+    performance: { now: () => now },
+    requestAnimationFrame,
+    cancelAnimationFrame,
+    setTimeout: (callback, delay, ...args) => addTimer(callback, delay, args, false),
+    setInterval: (callback, delay, ...args) => addTimer(callback, delay, args, true),
+    clearTimeout: clearTimer,
+    clearInterval: clearTimer,
+    queueMicrotask,
+    CanvasRenderingContext2D,
+    AudioContext: AudioContextStub,
+    webkitAudioContext: AudioContextStub,
+    Image: function Image() { return createElement('img'); },
+    Audio: function Audio() { return withFallback({ play: () => Promise.resolve(), pause() {}, volume: 1, currentTime: 0 }); },
+    fetch: () => Promise.reject(new Error('Network access is disabled in the harness')),
+    matchMedia: () => ({ matches: false, addEventListener() {}, removeEventListener() {}, addListener() {}, removeListener() {} }),
+    getComputedStyle: () => withFallback({ getPropertyValue: () => '' }),
+    devicePixelRatio: 1,
+    innerWidth: 1280,
+    innerHeight: 800,
+    addEventListener: windowTarget.addEventListener.bind(windowTarget),
+    removeEventListener: windowTarget.removeEventListener.bind(windowTarget),
+    dispatchEvent: windowTarget.dispatchEvent.bind(windowTarget),
+    KeyboardEvent: function KeyboardEvent(type, init) { return makeEvent(type, init); },
+    MouseEvent: function MouseEvent(type, init) { return makeEvent(type, init); },
+    Event: function Event(type, init) { return makeEvent(type, init); },
+    alert() {},
+    confirm: () => true,
+    prompt: () => null,
+  };
+  globals.window = globals;
+  globals.self = globals;
+  globals.globalThis = globals;
+  globals._windowTarget = windowTarget;
+  return globals;
+}
+
+// Scripted input so input handlers run at least once
+const INPUT_SCRIPT = [
+  [10, 'keydown', { key: 'ArrowRight', code: 'ArrowRight', keyCode: 39 }],
+  [11, 'keyup', { key: 'ArrowRight', code: 'ArrowRight', keyCode: 39 }],
+  [20, 'keydown', { key: ' ', code: 'Space', keyCode: 32 }],
+  [21, 'keyup', { key: ' ', code: 'Space', keyCode: 32 }],
+  [30, 'keydown', { key: '1', code: 'Digit1', keyCode: 49 }],
+  [40, 'keydown', { key: 'Enter', code: 'Enter', keyCode: 13 }],
+  [50, 'mousedown', { clientX: 360, clientY: 240, offsetX: 360, offsetY: 240 }],
+  [51, 'mouseup', { clientX: 360, clientY: 240, offsetX: 360, offsetY: 240 }],
+  [52, 'click', { clientX: 360, clientY: 240, offsetX: 360, offsetY: 240 }],
+  [60, 'mousemove', { clientX: 200, clientY: 120, offsetX: 200, offsetY: 120 }],
+];
+
+function dispatchInput(globals, type, fields) {
+  const event = makeEvent(type, fields);
+  const canvases = [];
+  (function collect(element) {
+    for (const child of element.children) {
+      if (child && child.tagName === 'CANVAS') canvases.push(child);
+      if (child && child.children) collect(child);
+    }
+  })(body);
+  const targets = type.startsWith('key') ? [documentObject, globals._windowTarget] : [...canvases, stage, documentObject, globals._windowTarget];
+  for (const target of targets) target.dispatchEvent(event);
+}
+
+function countListeners() {
+  let count = 0;
+  const types = {};
+  for (const target of listenerTargets) {
+    for (const [type, list] of Object.entries(target._listeners)) {
+      count += list.length;
+      types[type] = (types[type] || 0) + list.length;
+    }
+  }
+  report.listeners = { count, types };
+}
+
+function percentile(values, fraction) {
+  if (!values.length) return 0;
+  const sorted = [...values].sort((a, b) => a - b);
+  return sorted[Math.min(sorted.length - 1, Math.floor(fraction * sorted.length))];
+}
+
+function round(value) {
+  return Math.round(value * 1000) / 1000;
+}
+
+async function main() {
+  process.on('uncaughtException', recordError);
+  process.on('unhandledRejection', recordError);
+
+  const code = fs.readFileSync(gamePath, 'utf8');
+  const globals = makeGlobals();
+  vm.createContext(globals);
+
+  if (global.gc) global.gc();
+  report.heap.before_bytes = process.memoryUsage().heapUsed;
+
+  try {
+    // Same isolation the site uses: the game runs inside a function scope
+    // Errors name the file by its basename, at line numbers of the original source
+    vm.runInContext(`(function() {\n${code}\n})();`, globals, { filename: path.basename(gamePath), lineOffset: -1, timeout: 5000 });
+    report.loaded = true;
+  } catch (error) {
+    report.load_error = describeError(error);
+  }
+  globals.dispatchEvent(makeEvent('load', {}));
+  documentObject.dispatchEvent(makeEvent('DOMContentLoaded', {}));
+
+  const frameTimes = [];
+  const drawCalls = [];
+  for (let frame = 0; frame < frameCount; frame++) {
+    for (const [at, type, fields] of INPUT_SCRIPT) {
+      if (at === frame) dispatchInput(globals, type, fields);
+    }
+    drawCallsThisFrame = 0;
+    const started = process.hrtime.bigint();
+    now += FRAME_MS;
+    runDueTimers();
+    const callbacks = rafCallbacks;
+    rafCallbacks = new Map();
+    for (const callback of callbacks.values()) guarded(callback, [now]);
+    frameTimes.push(Number(process.hrtime.bigint() - started) / 1e6);
+    drawCalls.push(drawCallsThisFrame);
+    report.frames_run += 1;
+    // Let promise callbacks scheduled by the game settle between frames
+    await new Promise((resolve) => setImmediate(resolve));
+  }
+  report.animating = rafCallbacks.size > 0 || [...timers.values()].some((timer) => timer.repeat);
+
+  const totalDraws = drawCalls.reduce((a, b) => a + b, 0);
+  report.frame_ms = {
+    mean: round(frameTimes.reduce((a, b) => a + b, 0) / Math.max(1, frameTimes.length)),
+    p95: round(percentile(frameTimes, 0.95)),
+    max: round(Math.max(0, ...frameTimes)),
+  };
+  report.draw_calls = {
+    total: totalDraws,
+    per_frame_mean: round(totalDraws / Math.max(1, drawCalls.length)),
+    max: Math.max(0, ...drawCalls),
+  };
+  countListeners();
+
+  if (global.gc) global.gc();
+  report.heap.after_bytes = process.memoryUsage().heapUsed;
+  report.heap.growth_bytes = report.heap.after_bytes - report.heap.before_bytes;
+
+  process.stdout.write(JSON.stringify(report));
+}
+
+main().catch((error) => {
+  report.load_error = report.load_error || String(error);
+  process.stdout.write(JSON.stringify(report));
+});
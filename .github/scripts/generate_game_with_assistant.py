@@ -1,10 +1,10 @@
-import openai
+import asyncio
 import os
 import json
 from datetime import date, datetime
-import shutil
-import glob
 import sys
+import argparse
+import time
 
 # Add the scripts directory to the path so we can import test_functionality
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -28,6 +28,26 @@ except ImportError as e:
             'warnings': ['Functionality testing module not found']
         }
 
+from rule_engine import RuleSet, url_rule
+from js_analyzer import analyze
+from js_format import format_code_locally
+from response_cache import DEFAULT_CACHE_DIR, CachedResponse, CachingClient, ResponseCache, cache_variant, response_entry
+from checkpoints import PUBLISH_MANIFEST, RunCheckpoints, atomic_copy, atomic_write, prune_runs, run_key
+from prompt_store import PROMPT_STORE_DIR, PromptStore
+from runtime_harness import validate_runtime
+from perf_lint import lint_performance
+from catalog import catalog_entry, upsert_games
+from tracing import TRACE_DIR, Tracer, current_tracer, span, traced
+from targeted_repair import MAX_REGION_SHARE, PatchError, apply_patch, build_outline, build_regions, format_regions, parse_patch, region_share
+from similarity_index import DEFAULT_THRESHOLD as SIMILARITY_THRESHOLD, SIMILARITY_FILE, SimilarityIndex, minhash
+from stage_scheduler import DEFAULT_POLICY, REPAIR_RESOLVED, SCHEDULE_POLICIES, StageScheduler
+
+# Validators from other modules, traced like the stages defined here
+validate_accessibility = traced("validate.functionality", "validator")(validate_accessibility)
+validate_runtime = traced("validate.runtime", "validator")(validate_runtime)
+lint_performance = traced("validate.performance", "validator")(lint_performance)
+
+@traced("strip_code_blocks", "transform")
 def strip_code_blocks(code):
     """Remove markdown code blocks from the beginning and end of code"""
     # Remove leading ```javascript, ```js, or ``` markers
@@ -39,61 +59,88 @@ def strip_code_blocks(code):
         lines = lines[:-1]
     return '\n'.join(lines)
 
+# Declarative dependency rules, all matched in a single scan of the game source.
+# Each URL rule reports the same matches re.findall(pattern, code, re.IGNORECASE)
+# would, grouped by the kind of external resource it detects.
+DEPENDENCY_CHECKS = {
+    'image': {
+        'patterns': [
+            r'https?://[^\s\'"]+\.(png|jpg|jpeg|gif|svg|webp)',
+            r'https?://i\.imgur\.com/[^\s\'"]+',
+            r'https?://[^\s\'"]+\.imgur\.com/[^\s\'"]+',
+            r'https?://cdn\.discordapp\.com/[^\s\'"]+',
+            r'https?://[^\s\'"]+\.cloudinary\.com/[^\s\'"]+'
+        ],
+        'issue': "External image URLs found: {count} instances",
+        'warning': "External images may cause 403/404 errors: {sample}...",
+    },
+    'audio': {
+        'patterns': [
+            r'https?://[^\s\'"]+\.(mp3|wav|ogg|m4a|aac)',
+            r'https?://actions\.google\.com/sounds/[^\s\'"]+',
+            r'https?://[^\s\'"]+\.freesound\.org/[^\s\'"]+'
+        ],
+        'issue': "External audio URLs found: {count} instances",
+        'warning': "External audio may cause 403/404 errors: {sample}...",
+    },
+    'script': {
+        'patterns': [
+            r'https?://[^\s\'"]+\.js',
+            r'https?://cdn\.jsdelivr\.net/[^\s\'"]+',
+            r'https?://unpkg\.com/[^\s\'"]+',
+            r'https?://cdnjs\.cloudflare\.com/[^\s\'"]+'
+        ],
+        'issue': "External script dependencies found: {count} instances",
+        'warning': "External scripts may cause loading issues: {sample}...",
+    },
+}
+
+AUDIO_API_NAMES = ['AudioContext', 'webkitAudioContext']
+CANVAS_METHODS = ['fillRect', 'strokeRect', 'arc', 'fillText', 'drawImage', 'fillStyle', 'strokeStyle']
+
+DEPENDENCY_RULES = RuleSet(
+    url_rule(f"{kind}:{index}", pattern)
+    for kind, check in DEPENDENCY_CHECKS.items()
+    for index, pattern in enumerate(check['patterns'])
+)
+
+@traced("validate.dependencies", "validator")
 def validate_no_external_dependencies(code):
     """Check for external dependencies that could cause 403/404 errors"""
     issues = []
     warnings = []
+    spans = []
     
-    # Check for external image URLs
-    import re
-    image_patterns = [
-        r'https?://[^\s\'"]+\.(png|jpg|jpeg|gif|svg|webp)',
-        r'https?://i\.imgur\.com/[^\s\'"]+',
-        r'https?://[^\s\'"]+\.imgur\.com/[^\s\'"]+',
-        r'https?://cdn\.discordapp\.com/[^\s\'"]+',
-        r'https?://[^\s\'"]+\.cloudinary\.com/[^\s\'"]+'
-    ]
-    
-    for pattern in image_patterns:
-        matches = re.findall(pattern, code, re.IGNORECASE)
-        if matches:
-            issues.append(f"External image URLs found: {len(matches)} instances")
-            warnings.append(f"External images may cause 403/404 errors: {matches[:3]}...")
-    
-    # Check for external audio URLs
-    audio_patterns = [
-        r'https?://[^\s\'"]+\.(mp3|wav|ogg|m4a|aac)',
-        r'https?://actions\.google\.com/sounds/[^\s\'"]+',
-        r'https?://[^\s\'"]+\.freesound\.org/[^\s\'"]+'
-    ]
+    # URLs are matched with comments blanked out; the API checks use the parsed names
+    analysis = analyze(code)
+    hits = DEPENDENCY_RULES.scan(analysis.masked_code, spans=True)
     
-    for pattern in audio_patterns:
-        matches = re.findall(pattern, code, re.IGNORECASE)
-        if matches:
-            issues.append(f"External audio URLs found: {len(matches)} instances")
-            warnings.append(f"External audio may cause 403/404 errors: {matches[:3]}...")
-    
-    # Check for external script dependencies
-    script_patterns = [
-        r'https?://[^\s\'"]+\.js',
-        r'https?://cdn\.jsdelivr\.net/[^\s\'"]+',
-        r'https?://unpkg\.com/[^\s\'"]+',
-        r'https?://cdnjs\.cloudflare\.com/[^\s\'"]+'
-    ]
+    # Check for external image, audio and script URLs
+    for kind, check in DEPENDENCY_CHECKS.items():
+        for index in range(len(check['patterns'])):
+            located = hits[f"{kind}:{index}"]
+            matches = [item for _, _, item in located]
+            if matches:
+                issues.append(check['issue'].format(count=len(matches)))
+                warnings.append(check['warning'].format(sample=matches[:3]))
+            spans.extend({'kind': kind, 'start': start, 'end': end, 'url': code[start:end]} for start, end, _ in located)
     
-    for pattern in script_patterns:
-        matches = re.findall(pattern, code, re.IGNORECASE)
-        if matches:
-            issues.append(f"External script dependencies found: {len(matches)} instances")
-            warnings.append(f"External scripts may cause loading issues: {matches[:3]}...")
+    # Remote URLs handed to fetch, Image, Audio, .src and the like that no pattern above caught
+    covered = [(span['start'], span['end']) for span in spans]
+    uncovered = [load for load in analysis.remote_loads
+                 if not any(start < load['end'] and load['start'] < end for start, end in covered)]
+    if uncovered:
+        issues.append(f"Remote resource loads found: {len(uncovered)} instances")
+        warnings.append(f"Remote resources may fail to load: {[load['url'] for load in uncovered[:3]]}...")
+        spans.extend({'kind': load['kind'], 'start': load['start'], 'end': load['end'], 'url': code[load['start']:load['end']]}
+                     for load in uncovered)
     
     # Check for proper Web Audio API usage
-    if 'AudioContext' not in code and 'webkitAudioContext' not in code:
+    if not any(name in analysis.names for name in AUDIO_API_NAMES):
         warnings.append("No Web Audio API usage detected - consider adding sound effects")
     
     # Check for canvas drawing methods
-    canvas_methods = ['fillRect', 'strokeRect', 'arc', 'fillText', 'drawImage', 'fillStyle', 'strokeStyle']
-    canvas_usage = sum(1 for method in canvas_methods if method in code)
+    canvas_usage = sum(method in analysis.properties for method in CANVAS_METHODS)
     if canvas_usage < 3:
         warnings.append("Limited canvas drawing methods detected - consider more visual elements")
     
@@ -101,23 +148,182 @@ def validate_no_external_dependencies(code):
         'has_external_deps': len(issues) > 0,
         'issues': issues,
         'warnings': warnings,
-        'canvas_methods_used': canvas_usage
+        'canvas_methods_used': canvas_usage,
+        # Where each offending URL is, for targeted repairs
+        'spans': sorted(spans, key=lambda span: span['start'])
     }
 
+# Only the URL rules, with groups made non-capturing so every hit is a whole
+# URL: any hit means the game would fail to load a resource
+FATAL_DEPENDENCY_RULES = RuleSet(
+    url_rule(rule['name'], rule['pattern'].replace('(', '(?:'), rule['flags'])
+    for rule in DEPENDENCY_RULES.rules if rule['kind'] == 'url'
+)
+
+def find_fatal_dependencies(code):
+    """List the distinct external resource URLs in code as 'kind: url' strings.
+    
+    Used on partial streamed output, which does not parse, so this stays a text scan.
+    """
+    hits = FATAL_DEPENDENCY_RULES.scan(code)
+    found = [f"{name.split(':')[0]}: {match}" for name, matches in hits.items() for match in matches]
+    return list(dict.fromkeys(found))
+
 # Configuration variables
 MODEL_NAME = "gpt-5-mini" 
+CHEAP_MODEL_NAME = "gpt-5-nano"  # Mechanical repairs, when the stage scheduler allows it
 THEME_OF_THE_DAY = "electricity"
 ACCESSIBILITY_THRESHOLD = 60  # Minimum accessibility score required
+STAGE_TIMEOUT_SECONDS = 600  # Per model call, generous for full-game outputs
+STAGE_RETRIES = 3  # Attempts per model call before the stage fails
+RETRY_BACKOFF_SECONDS = 5  # Doubled after every failed attempt
+SIMILARITY_REGENERATIONS = 1  # Extra rounds of candidates when every one repeats a recent game
+
+# Failures worth retrying: timeouts and dropped connections, plus the SDK's
+# connection, rate limit and 5xx errors (see retryable_errors)
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    ConnectionError,
+)
 
-# Load your OpenAI API key from GitHub Secrets or environment
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# Read a file and include its contents in the prompt
-with open('games/latest.js', 'r') as f:
-    file_content = f.read()
-
-# Step 1: Send a prompt to the Responses API
-prompt = f"""You are an expert educational game designer. Each day, you will generate a fun, playable math game in JavaScript for children ages 7 to 9, focused on foundational concepts. Today's theme: {THEME_OF_THE_DAY}
+def retryable_errors():
+    """RETRYABLE_ERRORS plus the OpenAI SDK's retryable exceptions.
+
+    The SDK takes about a second to import, so it is only loaded by
+    make_client; until then no call can raise its exceptions.
+    """
+    openai = sys.modules.get('openai')
+    if openai is None:
+        return RETRYABLE_ERRORS
+    return RETRYABLE_ERRORS + (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+def make_client(use_cache=True, offline=False, cache_dir=DEFAULT_CACHE_DIR):
+    """Create the async OpenAI client behind the on-disk response cache.
+
+    The local fake client is used when GAME_GENERATOR_FAKE_OPENAI is set. In
+    offline mode no client is created and only cached responses are replayed.
+    """
+    if offline:
+        print(f"📼 Offline mode: replaying cached responses from {cache_dir}")
+        return CachingClient(None, ResponseCache(cache_dir), offline=True)
+    if os.getenv("GAME_GENERATOR_FAKE_OPENAI"):
+        from fake_openai import FakeAsyncOpenAI
+        print("🧪 Using the local fake OpenAI client")
+        client = FakeAsyncOpenAI()
+    else:
+        import openai
+        # Retries are handled per stage by call_model
+        client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    if not use_cache:
+        return client
+    return CachingClient(client, ResponseCache(cache_dir))
+
+class DependencyViolation(Exception):
+    """Raised when a streamed response is aborted because it loads external resources"""
+
+    def __init__(self, stage, partial_text, violations):
+        super().__init__(f"{stage} aborted mid-stream: {'; '.join(violations)}")
+        self.stage = stage
+        self.partial_text = partial_text
+        self.violations = violations
+
+class DependencyMonitor:
+    """Check a streamed response for external resource URLs as it arrives.
+
+    URLs cannot span whitespace, so each complete line is scanned exactly once
+    and only the unfinished last line is held back.
+    """
+
+    def __init__(self):
+        self.pending = ''
+
+    def feed(self, delta):
+        """Add streamed text and return the violations found in newly completed lines"""
+        self.pending += delta
+        cut = self.pending.rfind('\n')
+        if cut < 0:
+            return []
+        complete, self.pending = self.pending[:cut + 1], self.pending[cut + 1:]
+        return find_fatal_dependencies(complete)
+
+    def finish(self):
+        """Scan whatever is left once the stream ends"""
+        remaining, self.pending = self.pending, ''
+        return find_fatal_dependencies(remaining)
+
+async def consume_stream(client, prompt, model=MODEL_NAME):
+    """Stream one response, raising DependencyViolation as soon as a fatal URL appears"""
+    stream = await client.responses.create(
+        model=model,
+        input=[{"role": "user", "content": prompt}],
+        stream=True
+    )
+    monitor = DependencyMonitor()
+    chunks = []
+    response = None
+    try:
+        async for event in stream:
+            if event.type == 'response.output_text.delta':
+                chunks.append(event.delta)
+                violations = monitor.feed(event.delta)
+                if violations:
+                    raise DependencyViolation(None, ''.join(chunks), violations)
+            elif event.type == 'response.completed':
+                response = event.response
+            elif event.type in ('response.failed', 'error'):
+                raise ConnectionError(f"Streamed response failed: {event.type}")
+    finally:
+        # Closing early cancels the generation on the server side
+        await stream.close()
+    if response is None:
+        raise ConnectionError("Stream ended without a completed response")
+    return response
+
+async def call_model(client, stage, prompt, timeout=STAGE_TIMEOUT_SECONDS, retries=STAGE_RETRIES, stream=False, model=MODEL_NAME):
+    """Run one responses.create call with a timeout, retrying with exponential backoff.
+
+    With stream=True the output is consumed incrementally and the call is
+    cancelled with DependencyViolation as soon as it references an external
+    image, audio or script URL.
+    """
+    with span(f"model:{stage}", "model", model=model, streamed=stream,
+              input_bytes=len(prompt.encode('utf-8'))) as model_span:
+        for attempt in range(1, retries + 1):
+            model_span.set(attempts=attempt)
+            try:
+                if stream:
+                    response = await asyncio.wait_for(consume_stream(client, prompt, model), timeout)
+                else:
+                    response = await asyncio.wait_for(
+                        client.responses.create(
+                            model=model,
+                            input=[{"role": "user", "content": prompt}]
+                        ),
+                        timeout
+                    )
+                model_span.record_response(response)
+                return response
+            except DependencyViolation as e:
+                violation = DependencyViolation(stage, e.partial_text, e.violations)
+                model_span.set(output_bytes=len(e.partial_text.encode('utf-8')))
+                print(f"⛔ {violation}")
+                raise violation from None
+            except retryable_errors() as e:
+                if attempt == retries:
+                    print(f"❌ {stage} failed after {retries} attempts: {e!r}")
+                    raise
+                delay = RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                print(f"⚠️  {stage} attempt {attempt} failed ({e!r}), retrying in {delay}s...")
+                await asyncio.sleep(delay)
+
+def response_tokens(response):
+    """Total tokens reported for a response, if any"""
+    return response.usage.total_tokens if hasattr(response, 'usage') else None
+
+@traced("prompt.initial", "prompt")
+def build_prompt(theme):
+    """Prompt for a fresh game on the given theme"""
+    return f"""You are an expert educational game designer. Each day, you will generate a fun, playable math game in JavaScript for children ages 7 to 9, focused on foundational concepts. Today's theme: {theme}
 
 The game must:
 • Be engaging and fun first by having a primary visually interesting game mechanic, age-appropriate, and suitable for early learners.
@@ -138,34 +344,10 @@ The game must:
 • Output only JavaScript code. No extra explanation, no markdown formatting, no code blocks, no HTML, no CSS.
 • Do not wrap the code in ```javascript or any other markdown formatting."""
 
-response = client.responses.create(
-    model=MODEL_NAME,
-    input=[{"role": "user", "content": prompt}]
-)
-
-# Step 2: Extract the assistant's reply
-response_text = response.output_text
-
-# Strip markdown code blocks if present
-response_text = strip_code_blocks(response_text)
-
-# Step 3: Test basic functionality and check for external dependencies
-print("🔍 Testing basic functionality of generated game...")
-accessibility_result = validate_accessibility(response_text, f"{date.today().isoformat()}.js")
-
-print("🔍 Checking for external dependencies...")
-dependency_result = validate_no_external_dependencies(response_text)
-
-if dependency_result['has_external_deps']:
-    print("❌ External dependencies detected that may cause 403/404 errors:")
-    for issue in dependency_result['issues']:
-        print(f"  - {issue}")
-    for warning in dependency_result['warnings']:
-        print(f"  - ⚠️ {warning}")
-    
-    # Try to fix external dependencies with a second prompt
-    print("🔄 Attempting to remove external dependencies...")
-    dependency_fix_prompt = f"""You are an expert educational game designer. 
+@traced("prompt.dependency_fix", "prompt")
+def build_dependency_fix_prompt(code):
+    """Prompt asking the model to remove external dependencies from a game"""
+    return f"""You are an expert educational game designer. 
 Take the following JavaScript game code and remove ALL external dependencies (images, audio, scripts).
 Replace external images with canvas-drawn graphics using fillRect, arc, fillText, etc.
 Replace external audio with Web Audio API using oscillators and filters.
@@ -183,44 +365,43 @@ The game must:
 • Do not wrap the code in ```javascript or any other markdown formatting
 
 ---
-{response_text}
+{code}
 ---
 """
 
-    dependency_fix_response = client.responses.create(
-        model=MODEL_NAME,
-        input=[{"role": "user", "content": dependency_fix_prompt}]
-    )
-    fixed_dependency_code = dependency_fix_response.output_text
-    
-    # Strip markdown code blocks from fixed code
-    fixed_dependency_code = strip_code_blocks(fixed_dependency_code)
-    
-    # Test the fixed version
-    fixed_dependency_result = validate_no_external_dependencies(fixed_dependency_code)
-    
-    if not fixed_dependency_result['has_external_deps']:
-        print("✅ External dependencies removed successfully")
-        response_text = fixed_dependency_code
-        dependency_result = fixed_dependency_result
-    else:
-        print("⚠️  External dependencies still present after fix attempt")
-        print("Proceeding with original version but logging dependency issues...")
-else:
-    print("✅ No external dependencies detected")
-
-if not accessibility_result['passing']:
-    print(f"❌ Game failed functionality test: {accessibility_result['percentage']:.1f}% (threshold: {ACCESSIBILITY_THRESHOLD}%)")
-    print("Issues found:")
-    for issue in accessibility_result['issues']:
-        print(f"  - {issue}")
-    print("Warnings:")
-    for warning in accessibility_result['warnings']:
-        print(f"  - {warning}")
-    
-    # Try to improve functionality with a second prompt
-    print("🔄 Attempting to improve functionality...")
-    functionality_improve_prompt = f"""You are an expert educational game designer. 
+@traced("prompt.targeted_dependency_fix", "prompt")
+def build_targeted_dependency_fix_prompt(regions, outline):
+    """Prompt asking for replacements of only the regions that load external resources"""
+    return f"""You are an expert educational game designer. 
+The regions below are excerpts of a JavaScript game that load external resources (images, audio or scripts), which fail with 403/404 errors.
+Rewrite each region so it no longer references any external URL:
+• Replace external images with canvas-drawn graphics using fillRect, arc, fillText, etc.
+• Replace external audio with Web Audio API oscillators and filters, with error handling for audio context creation.
+• Remove external script dependencies.
+• Keep every variable and function the rest of the game uses (see the outline) with the same names and behaviour.
+• Each replacement must be complete JavaScript lines that replace the whole region, in the same code style.
+
+Return ONLY a JSON array, one entry per region, with no markdown formatting:
+[{{"region": 1, "replacement": "...the new lines..."}}]
+
+Outline of the game (line: declaration):
+{outline or "(no declarations found)"}
+
+Regions:
+{format_regions(regions)}
+"""
+
+@traced("prompt.functionality_fix", "prompt")
+def build_functionality_improve_prompt(code, runtime_issues=None):
+    """Prompt asking the model to fix basic functionality problems in a game.
+
+    Problems observed by the headless harness are listed so the model can fix
+    the actual crash rather than guess.
+    """
+    observed = ""
+    if runtime_issues:
+        observed = "\nProblems observed when running the game:\n" + "".join(f"- {issue}\n" for issue in runtime_issues)
+    return f"""You are an expert educational game designer. 
 Take the following JavaScript game code and improve its basic functionality and playability. 
 Do not change the core game mechanics or math logic.
 
@@ -230,7 +411,7 @@ Functionality improvements needed:
 - Include a game loop or animation system
 - Add basic error handling
 - Include game state management (score, lives, levels, etc.)
-
+{observed}
 The game must:
 • Render entirely inside the existing HTML element with ID game-of-the-day-stage. You may create a <canvas> inside it.
 • Have a game area exactly 720px wide by 480px tall.
@@ -241,74 +422,373 @@ The game must:
 • Do not wrap the code in ```javascript or any other markdown formatting.
 
 ---
-{response_text}
+{code}
 ---
 """
 
-    functionality_improve_response = client.responses.create(
-        model=MODEL_NAME,
-        input=[{"role": "user", "content": functionality_improve_prompt}]
-    )
-    improved_functionality_code = functionality_improve_response.output_text
-    
-    # Strip markdown code blocks from improved code
-    improved_functionality_code = strip_code_blocks(improved_functionality_code)
-    
-    # Test the improved version
-    improved_functionality_result = validate_accessibility(improved_functionality_code, f"{date.today().isoformat()}.js")
+@traced("prompt.performance_fix", "prompt")
+def build_performance_fix_prompt(code, findings):
+    """Prompt asking the model to fix the work the performance lint found repeated every frame"""
+    problems = "".join(f"- {finding['message']}\n" for finding in findings)
+    return f"""You are an expert educational game designer and JavaScript performance engineer. 
+Take the following JavaScript game code and fix the performance problems listed below. 
+The game must run smoothly on a low-end Chromebook, so nothing expensive may be repeated every animation frame. 
+Do not change the game mechanics, math logic, visuals or audio.
+
+Performance problems found:
+{problems}
+Fix them by:
+• Creating gradients, patterns and other canvas objects once and reusing them.
+• Sharing one AudioContext for every sound.
+• Removing particles and other per-frame entries once they are no longer needed, or capping their number.
+• Registering event listeners once, outside the animation loop.
+• Never reading pixels back with getImageData inside the animation loop.
+
+The game must:
+• Render entirely inside the existing HTML element with ID game-of-the-day-stage.
+• Have a game area exactly 720px wide by 480px tall.
+• Output only JavaScript code. No extra explanation, no markdown formatting, no code blocks.
+• Do not wrap the code in ```javascript or any other markdown formatting.
+
+---
+{code}
+---
+"""
+
+@traced("prompt.improve", "prompt")
+def build_improve_prompt(code):
+    """Prompt asking the model to improve only the visuals and audio of a game"""
+    return f"""You are an expert educational game designer. 
+Take the following JavaScript game code and improve ONLY the visuals and audio. 
+Do not change the game mechanics or math logic. 
+Enhance the visual appeal (colors, animations, backgrounds, characters), avoid overstimulation with sounds and visuals, and add or improve sound effects and background audio. 
+Render entirely inside the existing HTML element with ID game-of-the-day-stage. You may create a <canvas> inside it.
+Have a game area exactly 720px wide by 480px tall.
+Be written in clean, readable JavaScript with proper formatting, indentation, and comments.
+Use modern JavaScript practices and avoid minification.
+Include proper error handling for audio and resource loading.
+Use ONLY canvas-drawn graphics and Web Audio API - NO external image URLs, NO external audio files, NO external dependencies.
+Create all visual elements using canvas drawing methods (rect, arc, fillText, etc.).
+Generate all sounds using Web Audio API oscillators and filters.
+Include proper error handling for audio context creation.
+Output only JavaScript code. No extra explanation, no markdown formatting, no code blocks.
+Do not wrap the code in ```javascript or any other markdown formatting.
+
+---
+{code}
+---
+"""
+
+@traced("prompt.aborted_draft", "prompt")
+def build_aborted_draft_prompt(prompt, partial_code, violations):
+    """Prompt asking the model to finish a draft that was stopped for loading external resources"""
+    found = "\n".join(f"- {violation}" for violation in violations)
+    return f"""{prompt}
+
+A previous attempt at this game was stopped because it referenced external resources:
+{found}
+
+Write the complete game again following every requirement above. Keep what works in the partial draft below, but draw every visual with canvas methods and generate every sound with the Web Audio API. Do not reference any URL.
+
+---
+{partial_code}
+---
+"""
+
+# Pipeline stages. Each model stage returns the stripped code plus the raw
+# response so callers can record token usage.
+
+@traced("stage.initial_generation")
+async def generate_initial(client, prompt, stream=False):
+    """Stage 1: generate a fresh game.
+
+    When a streamed generation is aborted for loading external resources, the
+    partial draft goes straight to a repair call instead of being finished.
+    """
+    try:
+        response = await call_model(client, "Initial generation", prompt, stream=stream)
+        return strip_code_blocks(response.output_text), response, None
+    except DependencyViolation as e:
+        print("🔄 Repairing the aborted draft without external dependencies...")
+        response = await call_model(client, "Aborted draft repair",
+                                    build_aborted_draft_prompt(prompt, e.partial_text, e.violations))
+        return strip_code_blocks(response.output_text), response, {"stage": e.stage, "violations": e.violations}
+
+@traced("stage.dependency_fix")
+async def repair_dependencies(client, code, stream=False, model=MODEL_NAME):
+    """Stage 2a: ask the model to remove external dependencies"""
+    print("🔄 Attempting to remove external dependencies...")
+    response = await call_model(client, "Dependency fix", build_dependency_fix_prompt(code), stream=stream, model=model)
+    return strip_code_blocks(response.output_text), response
+
+@traced("stage.targeted_dependency_fix")
+async def repair_dependencies_targeted(client, code, spans, stream=False, model=MODEL_NAME):
+    """Stage 2a, targeted: send only the offending regions plus an outline and patch locally.
+
+    Falls back to the full-game repair when the regions cover most of the
+    game or the model's patch cannot be applied.
+    """
+    regions = build_regions(code, spans)
+    share = region_share(code, regions)
+    if not regions or share > MAX_REGION_SHARE:
+        print(f"🔄 Dependencies are spread over {share:.0%} of the game, repairing the whole game...")
+        return await repair_dependencies(client, code, stream=stream, model=model)
     
-    if improved_functionality_result['passing']:
-        print(f"✅ Functionality improved: {improved_functionality_result['percentage']:.1f}%")
-        response_text = improved_functionality_code
-        accessibility_result = improved_functionality_result
-    else:
-        print(f"⚠️  Functionality still below threshold: {improved_functionality_result['percentage']:.1f}%")
-        print("Proceeding with original version but logging functionality issues...")
-        accessibility_result = improved_functionality_result
-else:
-    print(f"✅ Game passed functionality test: {accessibility_result['percentage']:.1f}%")
-
-# Step 4: Save the output to a file
-today = date.today().isoformat()
-os.makedirs("games", exist_ok=True)
-with open(f"games/{today}.js", "w") as f:
-    f.write(response_text)
-
-# Also copy to games/latest.js
-shutil.copyfile(f"games/{today}.js", "games/latest.js")
-
-# Step 5: Create metadata
-metadata = {
-    "generated_date": today,
-    "generated_timestamp": datetime.now().isoformat(),
-    "model": MODEL_NAME,
-    "theme": THEME_OF_THE_DAY,
-    "prompt": prompt,
-    "response_tokens": response.usage.total_tokens if hasattr(response, 'usage') else None,
-    "game_filename": f"{today}.js",
-    "game_size_bytes": len(response_text.encode('utf-8')),
-    "functionality": {
-        "score": accessibility_result['score'],
-        "max_score": accessibility_result['max_score'],
-        "percentage": accessibility_result['percentage'],
-        "passing": accessibility_result['passing'],
-        "issues": accessibility_result['issues'],
-        "warnings": accessibility_result['warnings']
-    },
-    "dependencies": {
-        "has_external_deps": dependency_result['has_external_deps'],
-        "issues": dependency_result['issues'],
-        "warnings": dependency_result['warnings'],
-        "canvas_methods_used": dependency_result['canvas_methods_used']
+    print(f"🔄 Repairing {len(regions)} region(s) ({share:.0%} of the game) that load external resources...")
+    prompt = build_targeted_dependency_fix_prompt(regions, build_outline(code))
+    response = await call_model(client, "Targeted dependency fix", prompt, stream=stream, model=model)
+    try:
+        patched = apply_patch(code, regions, parse_patch(response.output_text))
+    except PatchError as e:
+        print(f"⚠️  Could not apply the targeted patch ({e}), repairing the whole game...")
+        return await repair_dependencies(client, code, stream=stream, model=model)
+    return patched, response
+
+@traced("stage.functionality_fix")
+async def repair_functionality(client, code, runtime_issues=None, stream=False, model=MODEL_NAME):
+    """Stage 2b: ask the model to improve basic functionality"""
+    print("🔄 Attempting to improve functionality...")
+    response = await call_model(client, "Functionality fix", build_functionality_improve_prompt(code, runtime_issues), stream=stream,
+                                model=model)
+    return strip_code_blocks(response.output_text), response
+
+@traced("stage.performance_fix")
+async def repair_performance(client, code, findings, stream=False, model=MODEL_NAME):
+    """Stage 2c: ask the model to fix severe per-frame performance problems"""
+    print("🔄 Attempting to fix per-frame performance problems...")
+    response = await call_model(client, "Performance fix", build_performance_fix_prompt(code, findings), stream=stream, model=model)
+    return strip_code_blocks(response.output_text), response
+
+@traced("stage.improve")
+async def improve_visuals(client, code, stream=False, model=MODEL_NAME):
+    """Stage 3: improve visuals and audio"""
+    improve_prompt = build_improve_prompt(code)
+    response = await call_model(client, "Visuals & audio improvement", improve_prompt, stream=stream, model=model)
+    return strip_code_blocks(response.output_text), response, improve_prompt
+
+@traced("stage.format")
+def format_code(code):
+    """Stage 4: pretty-print the improved game locally, verifying the token stream is unchanged"""
+    print("🔧 Ensuring proper code formatting...")
+    started = time.perf_counter()
+    formatted_code, verified = format_code_locally(code)
+    elapsed = time.perf_counter() - started
+    print(f"{'✅' if verified else '⚠️ '} Local formatting {'verified' if verified else 'skipped'} in {elapsed * 1000:.0f} ms")
+    return formatted_code, {"engine": "js_format", "verified": verified, "reformatted": formatted_code != code,
+                            "seconds": round(elapsed, 4)}
+
+def candidate_rank(candidate):
+    """Sort key preferring no external deps, then a game that runs, then passing, then higher scores"""
+    return (
+        not candidate['dependencies']['has_external_deps'],
+        candidate['runtime']['passing'],
+        candidate['functionality']['passing'],
+        candidate['performance']['passing'],
+        candidate['runtime']['percentage'],
+        candidate['functionality']['percentage'],
+    )
+
+@traced("stage.repairs")
+async def run_repairs(client, code, game_name, accessibility_result, dependency_result, runtime_result, performance_result,
+                      scheduler, decisions, stream=False, targeted=True):
+    """Stage 2: run the needed repairs concurrently and keep the best candidate.
+
+    The dependency, functionality and performance repairs are independent, so
+    all start from the same code. With targeted=True the dependency repair only sends
+    the regions around the offending URLs. A game that fails in the
+    headless harness gets the functionality repair too, and one with severe
+    performance lint findings gets the performance repair. Every resulting candidate is re-validated with
+    all validators; the original wins ties so code is only replaced when a
+    repair actually helps.
+
+    Each concurrent repair fixes its own problem only, so the winner is then
+    given, one after another, the repairs for the problems it still has; a
+    follow-up is kept only if it ranks higher than the code it started from.
+
+    The scheduler picks each repair's model and records the decision in
+    `decisions`. A repair run on the cheap model that does not resolve its
+    problem is run once more on the standard model.
+    """
+    original = {
+        'source': 'original',
+        'code': code,
+        'functionality': accessibility_result,
+        'dependencies': dependency_result,
+        'runtime': runtime_result,
+        'performance': performance_result,
     }
-}
 
-# Save JSON metadata
-with open(f"games/{today}.meta.json", "w") as f:
-    json.dump(metadata, f, indent=2)
+    def start(source, decision, base=original):
+        """The repair coroutine for `source` applied to the `base` candidate, on the model chosen in `decision`"""
+        model = decision['model']
+        if source == 'dependency_fix':
+            if targeted:
+                repair = repair_dependencies_targeted(client, base['code'], base['dependencies']['spans'], stream=stream, model=model)
+            else:
+                repair = repair_dependencies(client, base['code'], stream=stream, model=model)
+        elif source == 'functionality_fix':
+            repair = repair_functionality(client, base['code'], base['runtime']['issues'], stream=stream, model=model)
+        else:
+            severe = [finding for finding in base['performance']['findings'] if finding['severity'] == 'severe']
+            repair = repair_performance(client, base['code'], severe, stream=stream, model=model)
+        return scheduler.track(decision, repair)
+
+    def revalidate(source, repaired_code):
+        print(f"🔍 Re-validating {source} candidate...")
+        return {
+            'source': source,
+            'code': repaired_code,
+            'functionality': validate_accessibility(repaired_code, game_name),
+            'dependencies': validate_no_external_dependencies(repaired_code),
+            'runtime': validate_runtime(repaired_code, game_name),
+            'performance': lint_performance(repaired_code),
+        }
+
+    repairs = []
+    if dependency_result['has_external_deps']:
+        print("❌ External dependencies detected that may cause 403/404 errors:")
+        for issue in dependency_result['issues']:
+            print(f"  - {issue}")
+        for warning in dependency_result['warnings']:
+            print(f"  - ⚠️ {warning}")
+        repairs.append('dependency_fix')
+    else:
+        print("✅ No external dependencies detected")
+
+    if not accessibility_result['passing']:
+        print(f"❌ Game failed functionality test: {accessibility_result['percentage']:.1f}% (threshold: {ACCESSIBILITY_THRESHOLD}%)")
+        print("Issues found:")
+        for issue in accessibility_result['issues']:
+            print(f"  - {issue}")
+        print("Warnings:")
+        for warning in accessibility_result['warnings']:
+            print(f"  - {warning}")
+    else:
+        print(f"✅ Game passed functionality test: {accessibility_result['percentage']:.1f}%")
+
+    if not runtime_result['passing']:
+        print(f"❌ Game failed in the headless harness: {runtime_result['percentage']:.1f}%")
+        for issue in runtime_result['issues']:
+            print(f"  - {issue}")
+    else:
+        print(f"✅ Game ran in the headless harness: {runtime_result['percentage']:.1f}%")
+
+    if not accessibility_result['passing'] or not runtime_result['passing']:
+        repairs.append('functionality_fix')
+
+    if not performance_result['passing']:
+        print(f"❌ Performance lint found {performance_result['severe_count']} severe problem(s):")
+        for issue in performance_result['issues']:
+            print(f"  - {issue}")
+        repairs.append('performance_fix')
+    else:
+        print(f"✅ No severe performance problems ({performance_result['warning_count']} warnings)")
+
+    if not repairs:
+        return original, {}
+
+    candidates = [original]
+    responses = {}
+    # One round on the scheduled models, then one for the cheap repairs that need escalating
+    round_decisions = {source: scheduler.plan_repair(decisions, source) for source in repairs}
+    while round_decisions:
+        for source, decision in round_decisions.items():
+            print(f"🗓️  {source} on {decision['model']} ({decision['reason']})")
+        outcomes = await asyncio.gather(*(start(source.removesuffix('_escalated'), decision)
+                                          for source, decision in round_decisions.items()), return_exceptions=True)
+        escalations = {}
+        for (source, decision), outcome in zip(round_decisions.items(), outcomes):
+            repaired = None
+            if isinstance(outcome, Exception):
+                print(f"⚠️  {source} failed, keeping the other candidates: {outcome!r}")
+            else:
+                repaired_code, response = outcome
+                responses[source] = response
+                repaired = revalidate(source, repaired_code)
+                candidates.append(repaired)
+            if decision['tier'] == 'cheap':
+                escalation = scheduler.plan_escalation(decisions, source, repaired)
+                if escalation and escalation['action'] == 'run':
+                    escalations[escalation['stage']] = escalation
+        round_decisions = escalations
+
+    best = max(candidates, key=candidate_rank)
+
+    # Chain the repairs for what the winner still has onto it. The winner's
+    # own repair already had its attempt, and if every repair lost to the
+    # original there is nothing to build on.
+    if best is not original:
+        winner_stage = best['source'].removesuffix('_escalated')
+        for source in [stage for stage, resolved in REPAIR_RESOLVED.items() if not resolved(best) and stage != winner_stage]:
+            decision = scheduler.plan_followup(decisions, source)
+            if decision['action'] != 'run':
+                print(f"🗓️  Skipping the {source} follow-up ({decision['reason']})")
+                continue
+            print(f"🗓️  {source} follow-up on {decision['model']} for the {best['source']} candidate")
+            try:
+                repaired_code, response = await start(source, decision, best)
+            except Exception as e:
+                print(f"⚠️  {source} follow-up failed, keeping the {best['source']} candidate: {e!r}")
+                continue
+            responses[decision['stage']] = response
+            repaired = revalidate(f"{best['source']}+{source}", repaired_code)
+            if candidate_rank(repaired) > candidate_rank(best):
+                best = repaired
+
+    if best is original:
+        print("⚠️  Repairs did not improve the game, proceeding with original version but logging issues...")
+    else:
+        print(f"✅ Using {best['source']} candidate: {best['functionality']['percentage']:.1f}% functionality, "
+              f"{best['runtime']['percentage']:.1f}% runtime, "
+              f"{'external deps remain' if best['dependencies']['has_external_deps'] else 'no external deps'}")
+    return best, responses
+
+def build_runtime_markdown(runtime_result, heading):
+    """Markdown section describing a validate_runtime result"""
+    if not runtime_result['available']:
+        return f"""
+{heading}
+- **Status:** ⚠️  Not run ({runtime_result['warnings'][0]})
+"""
+    metrics = runtime_result['metrics'] or {}
+    return f"""
+{heading}
+- **Score:** {runtime_result['score']}/{runtime_result['max_score']} ({runtime_result['percentage']:.1f}%)
+- **Status:** {'✅ PASSING' if runtime_result['passing'] else '❌ FAILING'}
+- **Frame Time:** {metrics.get('frame_ms_mean', 'Unknown')} ms mean, {metrics.get('frame_ms_p95', 'Unknown')} ms p95 (estimated {metrics.get('estimated_chromebook_frame_ms', 'Unknown')} ms on a Chromebook)
+- **Draw Calls per Frame:** {metrics.get('draw_calls_per_frame', 'Unknown')}
+- **Heap Growth:** {metrics.get('heap_growth_bytes', 'Unknown')} bytes
+
+{chr(10).join([f"- ❌ {issue}" for issue in runtime_result['issues']] + [f"- ⚠️  {warning}" for warning in runtime_result['warnings']]) or "- No runtime problems"}
+"""
+
+def build_performance_markdown(performance_result, heading):
+    """Markdown section describing a lint_performance result"""
+    findings = [f"- {'❌' if finding['severity'] == 'severe' else '⚠️ '} {finding['message']}" for finding in performance_result['findings']]
+    return f"""
+{heading}
+- **Status:** {'✅ PASSING' if performance_result['passing'] else '❌ FAILING'} ({performance_result['severe_count']} severe, {performance_result['warning_count']} warnings)
+
+{chr(10).join(findings) or "- No per-frame performance problems found"}
+"""
+
+def build_schedule_markdown(schedule):
+    """Markdown section listing the stage scheduler's decisions"""
+    lines = [
+        f"- **{decision['stage']}:** {'ran on ' + decision['model'] if decision['action'] == 'run' else '⏭️  skipped'} ({decision['reason']})"
+        for decision in schedule['decisions']
+    ]
+    return f"""
+## Model Calls
+- **Policy:** {schedule['policy']}
+- **Calls:** {schedule['model_calls']} ({schedule['cheap_calls']} on the cheap model, {schedule['skipped_calls']} skipped)
+- **Estimated Savings:** {schedule['estimated_tokens_saved']} tokens, {schedule['estimated_seconds_saved']} s
+{chr(10).join(lines)}
+"""
 
-# Save Markdown metadata (for human readability)
-markdown_content = f"""# Game of the Day - {today}
+def build_markdown(today, metadata, accessibility_result, dependency_result, prompt):
+    """Human-readable metadata for the game after the repair stage"""
+    return f"""# Game of the Day - {today}
 
 ## Metadata
 - **Generated Date:** {today}
@@ -338,12 +818,14 @@ markdown_content = f"""# Game of the Day - {today}
 
 ### Dependency Warnings
 {chr(10).join([f"- ⚠️  {warning}" for warning in dependency_result['warnings']]) if dependency_result['warnings'] else "- None"}
-
+{build_runtime_markdown(metadata['runtime'], "## Headless Run")}
+{build_performance_markdown(metadata['performance'], "## Performance Lint")}
+{build_schedule_markdown(metadata['schedule'])}
 ## Prompt Used
 {prompt}
 
 ## Game Description
-This game was automatically generated using OpenAI's {MODEL_NAME} model with the theme: "{THEME_OF_THE_DAY}".
+This game was automatically generated using OpenAI's {metadata['model']} model with the theme: "{metadata['theme']}".
 
 ## Files Generated
 - `{today}.js` - The playable game
@@ -351,104 +833,9 @@ This game was automatically generated using OpenAI's {MODEL_NAME} model with the
 - `{today}.meta.md` - This human-readable documentation
 """
 
-with open(f"games/{today}.meta.md", "w") as f:
-    f.write(markdown_content)
-
-print(f"✅ Game of the Day saved to games/{today}.js and games/latest.js")
-print(f"✅ Metadata saved to games/{today}.meta.json and games/{today}.meta.md")
-print(f"✅ Dependency analysis: {'❌ External deps detected' if dependency_result['has_external_deps'] else '✅ No external deps'}")
-
-# Step 6: Improve visuals and audio with a second model call
-improve_prompt = f"""You are an expert educational game designer. 
-Take the following JavaScript game code and improve ONLY the visuals and audio. 
-Do not change the game mechanics or math logic. 
-Enhance the visual appeal (colors, animations, backgrounds, characters), avoid overstimulation with sounds and visuals, and add or improve sound effects and background audio. 
-Render entirely inside the existing HTML element with ID game-of-the-day-stage. You may create a <canvas> inside it.
-Have a game area exactly 720px wide by 480px tall.
-Be written in clean, readable JavaScript with proper formatting, indentation, and comments.
-Use modern JavaScript practices and avoid minification.
-Include proper error handling for audio and resource loading.
-Use ONLY canvas-drawn graphics and Web Audio API - NO external image URLs, NO external audio files, NO external dependencies.
-Create all visual elements using canvas drawing methods (rect, arc, fillText, etc.).
-Generate all sounds using Web Audio API oscillators and filters.
-Include proper error handling for audio context creation.
-Output only JavaScript code. No extra explanation, no markdown formatting, no code blocks.
-Do not wrap the code in ```javascript or any other markdown formatting.
-
----
-{response_text}
----
-"""
-
-improve_response = client.responses.create(
-    model=MODEL_NAME,
-    input=[{"role": "user", "content": improve_prompt}]
-)
-improved_code = improve_response.output_text
-
-# Strip markdown code blocks if present
-improved_code = strip_code_blocks(improved_code)
-
-# Ensure the improved code maintains proper formatting
-print("🔧 Ensuring proper code formatting...")
-formatting_prompt = f"""You are a JavaScript code formatter. 
-Take the following JavaScript game code and format it with proper indentation, spacing, and readability.
-Do not change any functionality, only improve the formatting.
-
-Requirements:
-- Use 2-space indentation
-- Add proper spacing around operators
-- Add line breaks for readability
-- Keep all comments and functionality intact
-- Maintain clean, readable structure
-- Output ONLY the JavaScript code - no markdown formatting, no code blocks, no explanations
-
-Output only the formatted JavaScript code. No extra explanation or formatting.
-
----
-{improved_code}
----
-"""
-
-formatting_response = client.responses.create(
-    model=MODEL_NAME,
-    input=[{"role": "user", "content": formatting_prompt}]
-)
-formatted_code = formatting_response.output_text
-
-# Strip markdown code blocks from formatted code as well
-formatted_code = strip_code_blocks(formatted_code)
-
-# Test functionality of the improved version
-print("🔍 Testing functionality of improved game...")
-improved_functionality_result = validate_accessibility(formatted_code, f"{today}.js")
-
-# Overwrite the game file and latest.js with the improved version
-with open(f"games/{today}.js", "w") as f:
-    f.write(formatted_code)
-shutil.copyfile(f"games/{today}.js", "games/latest.js")
-
-# Update metadata to reflect the improvement step
-metadata["improved_visuals_audio"] = True
-metadata["improve_prompt"] = improve_prompt
-metadata["improve_response_tokens"] = improve_response.usage.total_tokens if hasattr(improve_response, 'usage') else None
-metadata["formatted_code"] = True
-metadata["formatting_response_tokens"] = formatting_response.usage.total_tokens if hasattr(formatting_response, 'usage') else None
-metadata["final_functionality"] = {
-    "score": improved_functionality_result['score'],
-    "max_score": improved_functionality_result['max_score'],
-    "percentage": improved_functionality_result['percentage'],
-    "passing": improved_functionality_result['passing'],
-    "issues": improved_functionality_result['issues'],
-    "warnings": improved_functionality_result['warnings']
-}
-
-# Save updated JSON metadata
-with open(f"games/{today}.meta.json", "w") as f:
-    json.dump(metadata, f, indent=2)
-
-# Update Markdown metadata
-markdown_content += f"""
+def build_improvement_markdown(metadata, improved_functionality_result, improved_runtime_result, improve_prompt_outline):
+    """Markdown section appended after the visuals/audio and formatting stages"""
+    return f"""
 
 ---
 
@@ -458,9 +845,10 @@ A second model call was made to enhance visuals and audio.
 - **Tokens Used (improvement):** {metadata['improve_response_tokens'] or 'Unknown'}
 
 ## Code Formatting
-A third model call was made to ensure proper code formatting and readability.
+The improved game was pretty-printed locally with a deterministic formatter (missing line breaks added, 2-space indentation).
 
-- **Tokens Used (formatting):** {metadata['formatting_response_tokens'] or 'Unknown'}
+- **Token Stream Verified:** {'✅ Yes' if metadata['formatting']['verified'] else '⚠️  No (left unformatted)'}
+- **Code Changed:** {'Yes' if metadata['formatting'].get('reformatted') else 'No'}
 
 ### Final Functionality Score After Improvement
 - **Score:** {improved_functionality_result['score']}/{improved_functionality_result['max_score']} ({improved_functionality_result['percentage']:.1f}%)
@@ -471,21 +859,487 @@ A third model call was made to ensure proper code formatting and readability.
 
 ### Final Functionality Warnings
 {chr(10).join([f"- ⚠️  {warning}" for warning in improved_functionality_result['warnings']]) if improved_functionality_result['warnings'] else "- None"}
-
+{build_runtime_markdown(improved_runtime_result, "### Final Headless Run After Improvement")}
+{build_performance_markdown(metadata['final_performance'], "### Final Performance Lint After Improvement")}
 ### Prompt Used for Improvement
-{improve_prompt}
+{improve_prompt_outline}
 """
 
-with open(f"games/{today}.meta.md", "w") as f:
-    f.write(markdown_content)
+def functionality_metadata(result):
+    """The subset of a validate_accessibility result stored in metadata"""
+    return {
+        "score": result['score'],
+        "max_score": result['max_score'],
+        "percentage": result['percentage'],
+        "passing": result['passing'],
+        "issues": result['issues'],
+        "warnings": result['warnings']
+    }
 
-print(f"✅ Visuals and audio improved for games/{today}.js and games/latest.js")
-print(f"✅ Code formatting ensured for games/{today}.js and games/latest.js")
-print(f"✅ Final functionality score: {improved_functionality_result['percentage']:.1f}%")
-print(f"✅ Metadata updated for games/{today}.meta.json and games/{today}.meta.md")
+def runtime_metadata(result):
+    """The subset of a validate_runtime result stored in metadata"""
+    return {
+        "available": result['available'],
+        "score": result['score'],
+        "max_score": result['max_score'],
+        "percentage": result['percentage'],
+        "passing": result['passing'],
+        "issues": result['issues'],
+        "warnings": result['warnings'],
+        "metrics": result['metrics']
+    }
+
+def performance_metadata(result):
+    """The subset of a lint_performance result stored in metadata"""
+    return {
+        "passing": result['passing'],
+        "severe_count": result['severe_count'],
+        "warning_count": result['warning_count'],
+        "findings": result['findings']
+    }
+
+def dependency_metadata(result):
+    """The subset of a validate_no_external_dependencies result stored in metadata"""
+    return {
+        "has_external_deps": result['has_external_deps'],
+        "issues": result['issues'],
+        "warnings": result['warnings'],
+        "canvas_methods_used": result['canvas_methods_used']
+    }
+
+def candidate_to_checkpoint(candidate):
+    """The candidate as JSON-ready data, with model responses reduced to the fields the pipeline reads"""
+    data = dict(candidate)
+    data['response'] = response_entry(candidate['response'])
+    data['repair_responses'] = {source: response_entry(response) for source, response in candidate['repair_responses'].items()}
+    if candidate['improve_response'] is not None:
+        data['improve_response'] = response_entry(candidate['improve_response'])
+    return data
+
+def candidate_from_checkpoint(data):
+    candidate = dict(data)
+    candidate['response'] = CachedResponse(data['response'])
+    candidate['repair_responses'] = {source: CachedResponse(entry) for source, entry in data['repair_responses'].items()}
+    if data['improve_response'] is not None:
+        candidate['improve_response'] = CachedResponse(data['improve_response'])
+    return candidate
+
+async def generate_candidate(client, theme, game_name, scheduler, stream=False, targeted=True, checkpoint=None):
+    """Run the full pipeline for one candidate game and return everything it produced.
+
+    With a `checkpoint` scope the candidate is saved after the repairs and
+    again once finished, and a later run resumes from the last of the two.
+    """
+    for stage in ('final', 'repaired'):
+        data = checkpoint.load(stage) if checkpoint else None
+        if data is not None:
+            with span("checkpoint.resume", "checkpoint", stage=stage):
+                print(f"⏭️  Resuming {game_name} from its '{stage}' checkpoint")
+                candidate = candidate_from_checkpoint(data)
+            if stage == 'final':
+                return candidate
+            break
+    else:
+        candidate = await generate_repaired_candidate(client, theme, game_name, scheduler, stream=stream, targeted=targeted)
+        if checkpoint:
+            checkpoint.save('repaired', candidate_to_checkpoint(candidate))
+    
+    # Step 4: Improve visuals and audio, then ensure proper formatting. A failure
+    # here, or the scheduler skipping the stage, keeps the repaired game.
+    decision = scheduler.plan_improve(candidate['schedule'], candidate)
+    if decision['action'] == 'skip':
+        print(f"⏭️  Skipping the improvement of {game_name}: {decision['reason']}")
+    else:
+        try:
+            improved_code, improve_response, improve_prompt = await scheduler.track(
+                decision, improve_visuals(client, candidate['repaired_code'], stream=stream, model=decision['model']))
+            candidate['improve_prompt'] = improve_prompt
+            candidate['improve_response'] = improve_response
+            candidate['code'], candidate['formatting'] = format_code(improved_code)
+        except DependencyViolation as e:
+            candidate['stream_aborts'].append({"stage": e.stage, "violations": e.violations})
+            print(f"⚠️  Improvement introduced external dependencies for {game_name}, keeping the repaired game")
+        except retryable_errors() as e:
+            print(f"⚠️  Improvement stages failed for {game_name}, keeping the repaired game: {e!r}")
+    
+    # Test functionality of the final version
+    print(f"🔍 Testing functionality of improved game {game_name}...")
+    candidate['final_functionality'] = validate_accessibility(candidate['code'], game_name)
+    candidate['final_dependencies'] = validate_no_external_dependencies(candidate['code'])
+    candidate['final_runtime'] = validate_runtime(candidate['code'], game_name)
+    candidate['final_performance'] = lint_performance(candidate['code'])
+    if checkpoint:
+        checkpoint.save('final', candidate_to_checkpoint(candidate))
+    return candidate
+
+async def generate_repaired_candidate(client, theme, game_name, scheduler, stream=False, targeted=True):
+    """Steps 1-3 of a candidate: generate the game, validate it and keep the best repair"""
+    # Step 1: Generate the game
+    prompt = build_prompt(theme)
+    decisions = []
+    decision = scheduler.plan_stage(decisions, 'initial')
+    response_text, response, stream_abort = await scheduler.track(decision, generate_initial(client, prompt, stream=stream))
+    
+    # Step 2: Test basic functionality and check for external dependencies
+    print(f"🔍 Testing basic functionality of generated game {game_name}...")
+    accessibility_result = validate_accessibility(response_text, game_name)
+    
+    print(f"🔍 Checking for external dependencies in {game_name}...")
+    dependency_result = validate_no_external_dependencies(response_text)
+    
+    runtime_result = validate_runtime(response_text, game_name)
+    performance_result = lint_performance(response_text)
+    
+    # Step 3: Repair dependencies, functionality and performance concurrently when needed
+    best, repair_responses = await run_repairs(client, response_text, game_name, accessibility_result, dependency_result,
+                                               runtime_result, performance_result, scheduler, decisions,
+                                               stream=stream, targeted=targeted)
+    
+    return {
+        'theme': theme,
+        'prompt': prompt,
+        'response': response,
+        'repair_responses': repair_responses,
+        'repaired_code': best['code'],
+        'functionality': best['functionality'],
+        'dependencies': best['dependencies'],
+        'runtime': best['runtime'],
+        'performance': best['performance'],
+        'code': best['code'],
+        'improve_prompt': None,
+        'improve_response': None,
+        'formatting': None,
+        'stream_aborts': [stream_abort] if stream_abort else [],
+        'schedule': decisions,
+    }
+
+def final_rank(candidate):
+    """Sort key for best-of-K selection, based on the final game; near duplicates of recent games rank last"""
+    return (not candidate['similar_games'],) + candidate_rank({
+        'functionality': candidate['final_functionality'],
+        'dependencies': candidate['final_dependencies'],
+        'runtime': candidate['final_runtime'],
+        'performance': candidate['final_performance'],
+    })
+
+def check_similarity(candidate, slot_date, similarity_index):
+    """Record the candidate's MinHash signature and the recent games it nearly duplicates"""
+    candidate['signature'] = minhash(candidate['code'])
+    candidate['similar_games'] = [] if similarity_index is None else [
+        {"date": game_date, "similarity": similarity}
+        for game_date, similarity in similarity_index.find_recent_duplicates(candidate['signature'], slot_date, SIMILARITY_THRESHOLD)
+    ]
+    return candidate['similar_games']
 
-# Update the index.json file
-game_files = sorted(glob.glob("games/2025-*.js"))
-dates = [f.split('/')[-1].replace('.js', '') for f in game_files]
-with open("games/index.json", "w") as f:
-    json.dump(dates, f)
\ No newline at end of file
+async def generate_slot(client, slot_date, theme, candidates, semaphore, scheduler, stream=False, targeted=True,
+                        similarity_index=None, checkpoints=None):
+    """Generate `candidates` games for one date concurrently and keep the best.
+    
+    When every candidate nearly duplicates a recent game in `similarity_index`,
+    up to SIMILARITY_REGENERATIONS more rounds of candidates are generated.
+    Each candidate checkpoints its stages in `checkpoints` when given.
+    """
+    tracer = Tracer(slot_date)
+    
+    async def bounded(index):
+        game_name = f"{slot_date}.js" if candidates == 1 and index == 0 else f"{slot_date}.js (candidate {index + 1})"
+        # Cache entries and traces are per date; this task's context only
+        cache_variant.set(f"{slot_date}#{index}")
+        current_tracer.set(tracer)
+        with span("candidate", "candidate", candidate=index + 1) as candidate_span:
+            async with semaphore:
+                candidate_span.set(queued_seconds=round(time.perf_counter() - candidate_span.started, 4))
+                checkpoint = checkpoints.scope(f"{slot_date}/candidate-{index + 1}") if checkpoints else None
+                return await generate_candidate(client, theme, game_name, scheduler, stream=stream, targeted=targeted,
+                                                checkpoint=checkpoint)
+    
+    generated = []
+    for regeneration in range(SIMILARITY_REGENERATIONS + 1):
+        # Later rounds get new candidate numbers, and with them new cache entries
+        first = regeneration * candidates
+        outcomes = await asyncio.gather(*(bounded(index) for index in range(first, first + candidates)), return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                print(f"⚠️  A candidate for {slot_date} failed: {outcome!r}")
+            else:
+                with tracer.span("validate.similarity", "validator"):
+                    check_similarity(outcome, slot_date, similarity_index)
+                generated.append(outcome)
+        if not generated or any(not candidate['similar_games'] for candidate in generated):
+            break
+        if regeneration < SIMILARITY_REGENERATIONS:
+            closest = generated[0]['similar_games'][0]
+            print(f"♻️  Every candidate for {slot_date} repeats a recent game "
+                  f"({closest['date']}, {closest['similarity']:.0%} similar), generating more")
+    if not generated:
+        raise RuntimeError(f"All {candidates} candidates for {slot_date} failed")
+    
+    best = max(generated, key=final_rank)
+    if best['similar_games']:
+        print(f"⚠️  {slot_date} still nearly duplicates {best['similar_games'][0]['date']} "
+              f"({best['similar_games'][0]['similarity']:.0%} similar), keeping the best candidate")
+    best['tracer'] = tracer
+    best['schedule_summary'] = scheduler.summary(best['schedule'])
+    best['selection'] = {
+        "candidates_requested": candidates,
+        "candidates_generated": len(generated),
+        "regenerations": regeneration,
+        "selected_candidate": generated.index(best) + 1,
+        "candidate_scores": [c['final_functionality']['percentage'] for c in generated],
+    }
+    print(f"🏆 {slot_date}: selected candidate {best['selection']['selected_candidate']} of {len(generated)} "
+          f"({best['final_functionality']['percentage']:.1f}%)")
+    return best
+
+def write_artifacts(slot_date, candidate, checkpoints):
+    """Stage the game, JSON metadata, Markdown metadata and trace for one date.
+
+    Every file is written atomically to the run's staging directory; nothing
+    reaches games/ until publish_artifacts. Returns the game's catalog entry
+    and the [staged path, destination] pairs to publish.
+    """
+    code = candidate['code']
+    accessibility_result = candidate['functionality']
+    dependency_result = candidate['dependencies']
+    improved = candidate['improve_response'] is not None
+    tracer = candidate['tracer']
+    game_file = f"games/{slot_date}.js"
+    trace_file = os.path.join(TRACE_DIR, f"{slot_date}.jsonl")
+    files = [[checkpoints.staged_path(path), path]
+             for path in (game_file, f"games/{slot_date}.meta.json", f"games/{slot_date}.meta.md", trace_file)]
+    # Prompts are stored as template + parameters in the shared store, so the
+    # metadata does not carry a second copy of the game
+    prompt_store = PromptStore(checkpoints.staged_path(PROMPT_STORE_DIR))
+    
+    with tracer.span("write:game", "io", output_bytes=len(code.encode('utf-8'))):
+        atomic_write(checkpoints.staged_path(game_file), code)
+    
+    metadata = {
+        "generated_date": slot_date,
+        "generated_timestamp": datetime.now().isoformat(),
+        "model": MODEL_NAME,
+        "theme": candidate['theme'],
+        "prompt": prompt_store.save_prompt("initial", candidate['prompt'], {"theme": candidate['theme']}),
+        "response_tokens": response_tokens(candidate['response']),
+        "game_filename": f"{slot_date}.js",
+        "game_size_bytes": len(candidate['repaired_code'].encode('utf-8')),
+        "functionality": functionality_metadata(accessibility_result),
+        "dependencies": dependency_metadata(dependency_result),
+        "runtime": runtime_metadata(candidate['runtime']),
+        "performance": performance_metadata(candidate['performance']),
+        "selection": candidate['selection'],
+        "schedule": candidate['schedule_summary'],
+        "similarity": {
+            "threshold": SIMILARITY_THRESHOLD,
+            "similar_games": candidate['similar_games'],
+        },
+    }
+    if candidate['repair_responses']:
+        metadata["repair_response_tokens"] = {
+            source: response_tokens(response) for source, response in candidate['repair_responses'].items()
+        }
+    if candidate['stream_aborts']:
+        metadata["stream_aborts"] = candidate['stream_aborts']
+    markdown_content = build_markdown(slot_date, metadata, accessibility_result, dependency_result, candidate['prompt'])
+    
+    if improved:
+        metadata["improved_visuals_audio"] = True
+        metadata["improve_prompt"] = prompt_store.save_prompt("improve", candidate['improve_prompt'], {"code": candidate['repaired_code']})
+        metadata["improve_response_tokens"] = response_tokens(candidate['improve_response'])
+        metadata["formatted_code"] = candidate['formatting']['verified']
+        metadata["formatting"] = candidate['formatting']
+        metadata["final_functionality"] = functionality_metadata(candidate['final_functionality'])
+        metadata["final_runtime"] = runtime_metadata(candidate['final_runtime'])
+        metadata["final_performance"] = performance_metadata(candidate['final_performance'])
+        markdown_content += build_improvement_markdown(metadata, candidate['final_functionality'], candidate['final_runtime'],
+                                                       prompt_store.outline(metadata["improve_prompt"], checkpoints.staged_path("games")))
+    
+    files += [[path, os.path.join(PROMPT_STORE_DIR, os.path.basename(path))] for path in prompt_store.written]
+    
+    # The summary covers everything up to here; the full trace also has the metadata writes
+    metadata["trace"] = {"trace_file": os.path.relpath(trace_file, "games"), **tracer.summary()}
+    
+    meta_json = json.dumps(metadata, indent=2)
+    with tracer.span("write:meta.json", "io", output_bytes=len(meta_json.encode('utf-8'))):
+        atomic_write(checkpoints.staged_path(f"games/{slot_date}.meta.json"), meta_json)
+    with tracer.span("write:meta.md", "io", output_bytes=len(markdown_content.encode('utf-8'))):
+        atomic_write(checkpoints.staged_path(f"games/{slot_date}.meta.md"), markdown_content)
+    tracer.write_jsonl(checkpoints.staged_path(trace_file))
+    
+    print(f"✅ Game of the Day staged for games/{slot_date}.js")
+    print(f"✅ Metadata staged for games/{slot_date}.meta.json and games/{slot_date}.meta.md")
+    print(f"⏱️  {metadata['trace']['model_calls']} model calls, {metadata['trace']['input_tokens']} input / "
+          f"{metadata['trace']['output_tokens']} output tokens; trace saved to {trace_file}")
+    print(f"✅ Dependency analysis: {'❌ External deps detected' if dependency_result['has_external_deps'] else '✅ No external deps'}")
+    print(f"✅ Final functionality score: {candidate['final_functionality']['percentage']:.1f}%")
+    print(f"✅ Final runtime score: {candidate['final_runtime']['percentage']:.1f}%")
+    print(f"✅ Final performance lint: {candidate['final_performance']['severe_count']} severe, {candidate['final_performance']['warning_count']} warnings")
+    return catalog_entry(slot_date, code, metadata), files
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the game of the day, or a batch of games")
+    parser.add_argument("--dates", nargs="+", default=None,
+                        help="dates (YYYY-MM-DD) to generate games for (default: today)")
+    parser.add_argument("--themes", nargs="+", default=None,
+                        help=f"one theme for every date, or one per date (default: {THEME_OF_THE_DAY})")
+    parser.add_argument("--candidates", type=int, default=1,
+                        help="candidates generated per date; the best-scoring one is kept (default: 1)")
+    parser.add_argument("--max-concurrency", type=int, default=4,
+                        help="maximum candidate pipelines running at once (default: 4)")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream model output and abort a call as soon as it references an external resource")
+    parser.add_argument("--full-repairs", action="store_true",
+                        help="send the whole game to the dependency repair instead of only the offending regions")
+    parser.add_argument("--schedule", choices=sorted(SCHEDULE_POLICIES), default=DEFAULT_POLICY,
+                        help="which model calls run and on which model; see stage_scheduler.py (default: %(default)s)")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="tokens the whole run may spend; optional stages are skipped once it would be exceeded")
+    parser.add_argument("--time-budget", type=float, default=None, metavar="SECONDS",
+                        help="wall time the whole run may take; optional stages are skipped once it would be exceeded")
+    parser.add_argument("--allow-similar", action="store_true",
+                        help="skip the near-duplicate check against recent games in games/similarity.json")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="bypass the response cache and always call the model")
+    parser.add_argument("--offline", action="store_true",
+                        help="replay cached responses only and fail on a cache miss")
+    parser.add_argument("--fresh", action="store_true",
+                        help="discard the checkpoints of an interrupted run with the same arguments instead of resuming it")
+    parser.add_argument("--cache-dir", default=os.getenv("GAME_GENERATOR_CACHE_DIR", DEFAULT_CACHE_DIR),
+                        help=f"response cache directory (default: {DEFAULT_CACHE_DIR})")
+    args = parser.parse_args(argv)
+    
+    if args.no_cache and args.offline:
+        parser.error("--offline replays the cache and cannot be combined with --no-cache")
+    
+    args.dates = args.dates or [date.today().isoformat()]
+    for slot_date in args.dates:
+        try:
+            date.fromisoformat(slot_date)
+        except ValueError:
+            parser.error(f"invalid date: {slot_date}")
+    args.themes = args.themes or [THEME_OF_THE_DAY]
+    if len(args.themes) == 1:
+        args.themes = args.themes * len(args.dates)
+    elif len(args.themes) != len(args.dates):
+        parser.error("--themes takes either one theme or exactly one theme per date")
+    if args.candidates < 1 or args.max_concurrency < 1:
+        parser.error("--candidates and --max-concurrency must be at least 1")
+    return args
+
+def publish_artifacts(checkpoints, manifest):
+    """Publish a run's staged artifacts: the commit step of the pipeline.
+
+    Staged files are renamed into games/, then latest.js, the catalog and the
+    similarity index are updated. Every step is a rename or an idempotent
+    update, so a publish interrupted part way is finished by repeating it
+    from the same manifest.
+    """
+    for staged, destination in manifest['files']:
+        if os.path.exists(staged):
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.replace(staged, destination)
+    if manifest['latest']:
+        atomic_copy(f"games/{manifest['latest']}.js", "games/latest.js")
+        print(f"✅ games/latest.js now points at {manifest['latest']}")
+    
+    # Record only the games written by this run in catalog.json and index.json
+    upsert_games(manifest['entries'])
+    similarity_index = SimilarityIndex.load()
+    for slot_date, signature in manifest['signatures'].items():
+        similarity_index.add(slot_date, tuple(signature))
+    similarity_index.save()
+    checkpoints.remove(PUBLISH_MANIFEST)
+    print(f"✅ Published {', '.join(manifest['signatures'])}; catalog and {SIMILARITY_FILE} updated")
+
+def finish_run(checkpoints):
+    """Discard the checkpoints of a fully published run, and those of older interrupted runs.
+
+    Interrupted runs with other arguments (another date, say) are never
+    resumed once a run succeeds, and would otherwise pile up in the cache.
+    """
+    checkpoints.discard()
+    pruned = prune_runs()
+    if pruned:
+        print(f"🧹 Removed the checkpoints of {len(pruned)} stale run(s)")
+
+async def main(argv=None):
+    args = parse_args(argv)
+    # Runs with the same arguments share a run directory, so a rerun resumes an interrupted one
+    key = run_key(dates=args.dates, themes=args.themes, candidates=args.candidates, model=MODEL_NAME,
+                  stream=args.stream, targeted=not args.full_repairs, allow_similar=args.allow_similar, schedule=args.schedule)
+    checkpoints = RunCheckpoints(key)
+    if args.fresh:
+        checkpoints.discard()
+        checkpoints = RunCheckpoints(key)
+    elif checkpoints.resumed:
+        print(f"⏭️  Resuming the interrupted run in {checkpoints.directory}")
+    
+    manifest = checkpoints.load(PUBLISH_MANIFEST)
+    if manifest is not None:
+        print("⏭️  Finishing the interrupted publish step")
+        publish_artifacts(checkpoints, manifest)
+        if manifest['complete']:
+            finish_run(checkpoints)
+            return
+    
+    client = make_client(use_cache=not args.no_cache, offline=args.offline, cache_dir=args.cache_dir)
+    semaphore = asyncio.Semaphore(args.max_concurrency)
+    scheduler = StageScheduler({'cheap': CHEAP_MODEL_NAME, 'standard': MODEL_NAME}, args.schedule,
+                               token_budget=args.token_budget, seconds_budget=args.time_budget)
+    similarity_index = SimilarityIndex.load()
+    
+    # Every slot (and every candidate within it) shares one client and one
+    # concurrency budget
+    slots = list(zip(args.dates, args.themes))
+    try:
+        outcomes = await asyncio.gather(
+            *(generate_slot(client, slot_date, theme, args.candidates, semaphore, scheduler, stream=args.stream, targeted=not args.full_repairs,
+                            similarity_index=None if args.allow_similar else similarity_index, checkpoints=checkpoints)
+              for slot_date, theme in slots),
+            return_exceptions=True
+        )
+    finally:
+        # Release the HTTP connections while the event loop is still running
+        await client.close()
+    
+    if isinstance(client, CachingClient):
+        print(f"📼 Response cache: {client.cache.hits} hits, {client.cache.misses} misses")
+    print(scheduler.report())
+    
+    manifest = {'files': [], 'entries': [], 'signatures': {}, 'latest': None, 'complete': True}
+    for (slot_date, theme), outcome in zip(slots, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"❌ Could not generate a game for {slot_date} ({theme}): {outcome!r}")
+            manifest['complete'] = False
+            continue
+        entry, files = write_artifacts(slot_date, outcome, checkpoints)
+        manifest['entries'].append(entry)
+        manifest['files'] += files
+        manifest['signatures'][slot_date] = list(outcome['signature'])
+    
+    if not manifest['entries']:
+        print(f"💾 Checkpoints kept in {checkpoints.directory}; run again with the same arguments to resume")
+        sys.exit(1)
+    
+    # Point games/latest.js at the newest game, unless the archive already has a newer one
+    try:
+        with open("games/index.json", "r") as f:
+            existing_dates = json.load(f)
+    except (OSError, ValueError):
+        existing_dates = []
+    newest = max(manifest['signatures'])
+    if all(newest >= existing for existing in existing_dates):
+        manifest['latest'] = newest
+    
+    # Everything is staged; from here a crash is finished by the next run
+    checkpoints.save(PUBLISH_MANIFEST, manifest)
+    publish_artifacts(checkpoints, manifest)
+    
+    if not manifest['complete']:
+        # The failed slots resume from their checkpoints on the next run
+        print(f"💾 Checkpoints kept in {checkpoints.directory}; run again with the same arguments to retry the failed dates")
+        sys.exit(1)
+    finish_run(checkpoints)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,419 @@
+import bisect
+import functools
+import re
+
+from js_format import OPENERS, JSSyntaxError, tokenize_with_offsets
+
+# Bump when the facts an Analysis reports change, so cached audits are redone
+ANALYZER_VERSION = 2
+
+# Names that are followed by '(' without being a call
+NOT_CALLABLE = {
+    'if', 'for', 'while', 'switch', 'catch', 'function', 'return', 'typeof', 'new', 'delete', 'void',
+    'await', 'yield', 'in', 'of', 'instanceof', 'do', 'else', 'case', 'throw', 'super', 'import',
+}
+# Keywords after which '[' or '{' starts a literal rather than an index or a block
+LITERAL_AFTER_KEYWORDS = {'return', 'yield', 'await', 'throw', 'case', 'typeof', 'in', 'of', 'void', 'delete'}
+# Punctuators after which '{' starts an object literal rather than a block
+OBJECT_AFTER_PUNCT = {
+    '=', ',', ':', '?', '||', '&&', '??', '!', '+=', '-=', '||=', '&&=', '??=', '...',
+    '==', '===', '!=', '!==', '+', '-', '*', '/', '%', '<', '>', '<=', '>=',
+}
+# Calls whose callback runs once per element
+ITERATION_METHODS = {'forEach', 'map', 'filter', 'reduce', 'reduceRight', 'some', 'every', 'find', 'findIndex', 'flatMap', 'sort'}
+# Method calls that return a new array, object, string list or canvas object
+ALLOCATING_METHODS = {
+    'map', 'filter', 'slice', 'concat', 'flat', 'flatMap', 'split', 'bind',
+    'from', 'keys', 'values', 'entries', 'assign',
+    'createLinearGradient', 'createRadialGradient', 'createPattern', 'getImageData', 'createImageData',
+}
+TIMER_FUNCTIONS = {'setInterval', 'setTimeout'}
+# Constructors and functions that load what their first argument names
+REMOTE_LOADERS = {
+    'fetch': 'fetch', 'importScripts': 'script', 'import': 'script',
+    'Audio': 'audio', 'Image': 'image', 'WebSocket': 'websocket', 'EventSource': 'eventsource', 'Worker': 'script',
+}
+AUDIO_CONTEXT_CLASSES = {'AudioContext', 'webkitAudioContext'}
+DECLARATION_KEYWORDS = {'const', 'let', 'var'}
+REMOTE_URL = re.compile(r'''^[`'"]\s*https?://''', re.IGNORECASE)
+
+
+class Node:
+    """A token, or a bracketed group whose children are the tokens and groups inside it"""
+    __slots__ = ('kind', 'text', 'start', 'end', 'children')
+
+    def __init__(self, kind, text, start, end, children=None):
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+        self.children = children
+
+    def is_punct(self, *texts):
+        return self.kind == 'punct' and self.text in texts
+
+    def is_name(self, *texts):
+        return self.kind == 'name' and (not texts or self.text in texts)
+
+    def is_group(self, opener):
+        return self.kind == 'group' and self.text == opener
+
+    def __repr__(self):
+        return f"Node({self.kind!r}, {self.text!r})"
+
+
+def parse(code):
+    """Build the bracket tree of `code`: top-level nodes with (), [] and {} as groups.
+
+    Comments are dropped. Raises JSSyntaxError for unbalanced brackets or
+    source that does not tokenize.
+    """
+    root = []
+    stack = []
+    children = root
+    for token, start, end in tokenize_with_offsets(code):
+        if token.kind == 'comment':
+            continue
+        if token.kind == 'punct' and token.text in OPENERS:
+            group = Node('group', token.text, start, end, [])
+            children.append(group)
+            stack.append((group, children))
+            children = group.children
+        elif token.kind == 'punct' and token.text in ('}', ']', ')'):
+            if not stack or OPENERS[stack[-1][0].text] != token.text:
+                raise JSSyntaxError(f"Unbalanced {token.text!r} at offset {start}")
+            group, children = stack.pop()
+            group.end = end
+        else:
+            children.append(Node(token.kind, token.text, start, end))
+    if stack:
+        raise JSSyntaxError(f"Unclosed {stack[-1][0].text!r} at offset {stack[-1][0].start}")
+    return root
+
+
+def _names_in(nodes):
+    """Every name token inside the nodes, at any depth"""
+    names = set()
+    for node in nodes:
+        if node.kind == 'name':
+            names.add(node.text)
+        elif node.kind == 'group':
+            names |= _names_in(node.children)
+    return names
+
+
+def _remote_url(node):
+    """The URL a string or template literal holds, if it is a remote one"""
+    if node is not None and node.kind in ('string', 'template') and REMOTE_URL.match(node.text):
+        return node.text[1:-1].strip()
+    return None
+
+
+def _assigned_name(nodes, index):
+    """The name a function starting at nodes[index] is assigned to (x = ..., x: ..., this.x = ...)"""
+    position = index - 1
+    if position >= 0 and nodes[position].is_name('async'):
+        position -= 1
+    if position >= 1 and nodes[position].is_punct('=', ':') and nodes[position - 1].kind == 'name':
+        return nodes[position - 1].text
+    return None
+
+
+def _starts_literal(previous, opener, parent_opener):
+    """Whether an opening bracket after `previous` starts an array or object literal"""
+    if previous is None:
+        return parent_opener in ('(', '[')
+    if previous.kind == 'name':
+        return previous.text in LITERAL_AFTER_KEYWORDS
+    if previous.kind != 'punct':
+        return False
+    if opener == '[':
+        return previous.text not in ('.', '?.')
+    return previous.text in OBJECT_AFTER_PUNCT
+
+
+class FunctionFacts:
+    """What one named function (all definitions sharing the name) calls and allocates"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = set()
+        self.allocations = []
+        self.declared = set()  # Names declared with const/let/var directly in it
+        self.guarded = False  # Starts with an early return, e.g. if (initialized) return;
+        self.raf_references = []  # Names inside each requestAnimationFrame(...) it makes
+        self.interval_references = []  # Names inside each setInterval(...) it makes
+
+
+class Analysis:
+    """Facts about a game answered from one parse of its source.
+
+    listeners          [{'type', 'function', 'line'}] of addEventListener calls with a literal type
+    handler_properties set of on<event> properties assigned, e.g. 'onkeydown'
+    names, properties  every identifier, and every identifier used after '.'
+    calls              {callee: count}; member calls are also counted as 'object.callee'
+    member_calls       [{'object', 'method', 'function', 'line', 'in_loop'}] for name.method(...)
+    property_writes    [{'object', 'property', 'function', 'line', 'in_loop'}] for [object.]property = ...
+    reassigned         names given a new value after their declaration (x = ..., this.x = ...)
+    constructions      [{'class', 'function', 'line', 'in_loop', 'local'}] for new X(...); local
+                       when the result is declared with const/let/var
+    try_statements     number of try blocks
+    animation_loops    functions that reschedule themselves with requestAnimationFrame
+    frame_functions    functions run every frame: animation and interval callbacks and what they call
+    frame_allocations  [{'function', 'line', 'kind', 'text', 'in_loop'}] allocations in those
+    remote_loads       [{'kind', 'url', 'start', 'end', 'line'}] loaders given a remote URL
+    masked_code        the source with comments blanked, offsets unchanged
+    """
+
+    def __init__(self, code):
+        self.code = code
+        self.parse_error = None
+        self.listeners = []
+        self.handler_properties = set()
+        self.names = set()
+        self.properties = set()
+        self.calls = {}
+        self.member_calls = []
+        self.property_writes = []
+        self.reassigned = set()
+        self.constructions = []
+        self.try_statements = 0
+        self.functions = {}
+        self.animation_loops = []
+        self.frame_functions = set()
+        self.frame_allocations = []
+        self.remote_loads = []
+        self._line_starts = [0] + [match.end() for match in re.finditer(r'\n', code)]
+        self.masked_code = code
+        try:
+            tree = parse(code)
+        except JSSyntaxError as e:
+            self.parse_error = str(e)
+            return
+        self._mask_comments()
+        self._walk(tree, self._function('<top>'), in_loop=False, parent_opener=None)
+        self._find_frame_functions()
+
+    def line(self, offset):
+        return bisect.bisect_right(self._line_starts, offset)
+
+    def called(self, *callees):
+        return any(self.calls.get(callee) for callee in callees)
+
+    def _mask_comments(self):
+        pieces = []
+        position = 0
+        for token, start, end in tokenize_with_offsets(self.code):
+            if token.kind == 'comment':
+                pieces.append(self.code[position:start])
+                pieces.append(re.sub(r'[^\n]', ' ', token.text))
+                position = end
+        pieces.append(self.code[position:])
+        self.masked_code = ''.join(pieces)
+
+    def _function(self, name):
+        if name not in self.functions:
+            self.functions[name] = FunctionFacts(name)
+        return self.functions[name]
+
+    def _allocate(self, function, node, kind, in_loop):
+        text = self.code[node.start:min(node.end, node.start + 60)].split('\n')[0]
+        function.allocations.append({
+            'function': function.name, 'line': self.line(node.start), 'kind': kind, 'text': text, 'in_loop': in_loop,
+        })
+
+    def _remote_load(self, kind, node):
+        url = _remote_url(node)
+        if url:
+            self.remote_loads.append({'kind': kind, 'url': url, 'start': node.start, 'end': node.end, 'line': self.line(node.start)})
+
+    def _call(self, function, nodes, index, arguments, in_loop):
+        """Record the call nodes[index](arguments)"""
+        callee = nodes[index].text
+        member = index >= 1 and nodes[index - 1].is_punct('.', '?.')
+        self.calls[callee] = self.calls.get(callee, 0) + 1
+        if member and index >= 2 and nodes[index - 2].kind == 'name':
+            qualified = f"{nodes[index - 2].text}.{callee}"
+            self.calls[qualified] = self.calls.get(qualified, 0) + 1
+            self.member_calls.append({
+                'object': nodes[index - 2].text, 'method': callee, 'function': function.name,
+                'line': self.line(nodes[index].start), 'in_loop': in_loop,
+            })
+        function.calls.add(callee)
+        first = arguments.children[0] if arguments.children else None
+
+        if callee == 'addEventListener' and first is not None and first.kind == 'string':
+            self.listeners.append({'type': first.text[1:-1], 'function': function.name, 'line': self.line(nodes[index].start)})
+        elif callee == 'requestAnimationFrame':
+            function.raf_references.append(_names_in(arguments.children))
+        elif callee == 'setInterval':
+            function.interval_references.append(_names_in(arguments.children))
+        elif callee in REMOTE_LOADERS and not (index >= 1 and nodes[index - 1].is_name('new')):
+            self._remote_load(REMOTE_LOADERS[callee], first)
+        if member and callee in ALLOCATING_METHODS:
+            self._allocate(function, nodes[index], f"{callee}()", in_loop)
+
+    def _walk_body(self, body, name, function, in_loop):
+        """Walk a function body; a named function gets its own facts, a callback shares the enclosing one"""
+        if not name:
+            self._walk(body.children, function, in_loop, '{')
+            return
+        facts = self._function(name)
+        children = body.children
+        if len(children) >= 3 and children[0].is_name('if') and children[1].is_group('(') and children[2].is_name('return'):
+            facts.guarded = True
+        self._walk(children, facts, False, '{')
+
+    def _walk(self, nodes, function, in_loop, parent_opener):
+        index = 0
+        while index < len(nodes):
+            node = nodes[index]
+            previous = nodes[index - 1] if index else None
+            following = nodes[index + 1] if index + 1 < len(nodes) else None
+
+            if node.kind == 'name':
+                self.names.add(node.text)
+                if previous is not None and previous.is_punct('.', '?.'):
+                    self.properties.add(node.text)
+
+                if node.text == 'function':
+                    # function name?(params) {body}, as a declaration or an expression
+                    position = index + 1
+                    if position < len(nodes) and nodes[position].is_punct('*'):
+                        position += 1
+                    name = None
+                    if position < len(nodes) and nodes[position].kind == 'name':
+                        name = nodes[position].text
+                        position += 1
+                    name = name or _assigned_name(nodes, index)
+                    if position + 1 < len(nodes) and nodes[position].is_group('(') and nodes[position + 1].is_group('{'):
+                        self._walk_body(nodes[position + 1], name, function, in_loop)
+                        index = position + 2
+                        continue
+                elif node.text == 'try' and following is not None and following.is_group('{'):
+                    self.try_statements += 1
+                elif node.text in ('for', 'while') and following is not None and following.is_group('('):
+                    self._walk(following.children, function, in_loop, '(')
+                    body = nodes[index + 2] if index + 2 < len(nodes) else None
+                    if body is not None and body.is_group('{'):
+                        self._walk(body.children, function, True, '{')
+                        index += 3
+                    else:
+                        index += 2
+                    continue
+                elif node.text == 'do' and following is not None and following.is_group('{'):
+                    self._walk(following.children, function, True, '{')
+                    index += 2
+                    continue
+                elif node.text == 'new' and following is not None and following.kind in ('name', 'group'):
+                    # new X(...), or new (window.AudioContext || window.webkitAudioContext)()
+                    if following.kind == 'name':
+                        constructed = following.text
+                    else:
+                        constructed = next(iter(sorted(_names_in(following.children) & AUDIO_CONTEXT_CLASSES)), '(expression)')
+                    self._allocate(function, node, f"new {constructed}", in_loop)
+                    local = index >= 3 and nodes[index - 1].is_punct('=') and nodes[index - 3].is_name(*DECLARATION_KEYWORDS)
+                    self.constructions.append({
+                        'class': constructed, 'function': function.name, 'line': self.line(node.start), 'in_loop': in_loop, 'local': local,
+                    })
+                    arguments = nodes[index + 2] if index + 2 < len(nodes) else None
+                    if following.text in REMOTE_LOADERS and arguments is not None and arguments.is_group('(') and arguments.children:
+                        self._remote_load(REMOTE_LOADERS[following.text], arguments.children[0])
+                elif node.text == 'import' and following is not None and following.is_group('(') \
+                        and not (previous is not None and previous.is_punct('.', '?.')):
+                    # A dynamic import(url) loads a script; import is a keyword, so it is not recorded as a call
+                    if following.children:
+                        self._remote_load(REMOTE_LOADERS['import'], following.children[0])
+                    self._walk(following.children, function, in_loop, '(')
+                    index += 2
+                    continue
+                elif following is not None and following.is_group('(') and node.text not in NOT_CALLABLE:
+                    body = nodes[index + 2] if index + 2 < len(nodes) else None
+                    if body is not None and body.is_group('{'):
+                        # name(params) {body} is only valid as a method definition
+                        self._walk_body(body, node.text, function, in_loop)
+                        index += 3
+                        continue
+                    self._call(function, nodes, index, following, in_loop)
+                    iterates = previous is not None and previous.is_punct('.', '?.') and node.text in ITERATION_METHODS
+                    self._walk(following.children, function, in_loop or iterates, '(')
+                    index += 2
+                    continue
+
+            elif node.kind == 'punct':
+                if node.text == '=>' and following is not None and following.is_group('{'):
+                    # Named when assigned (x = (a) => {...}); callbacks stay part of the enclosing function
+                    start = index - 1
+                    if start >= 1 and nodes[start].is_group('(') or start >= 1 and nodes[start].kind == 'name':
+                        name = _assigned_name(nodes, start)
+                    else:
+                        name = None
+                    self._walk_body(following, name, function, in_loop)
+                    index += 2
+                    continue
+                if node.text == '=' and previous is not None and previous.kind == 'name':
+                    member = index >= 2 and nodes[index - 2].is_punct('.')
+                    if member or not (index >= 2 and nodes[index - 2].is_name(*DECLARATION_KEYWORDS)):
+                        self.reassigned.add(previous.text)
+                    else:
+                        function.declared.add(previous.text)
+                    if member:
+                        self.property_writes.append({
+                            'object': nodes[index - 3].text if index >= 3 and nodes[index - 3].kind == 'name' else None,
+                            'property': previous.text, 'function': function.name, 'line': self.line(node.start), 'in_loop': in_loop,
+                        })
+                    if previous.text.startswith('on') and index >= 2 and nodes[index - 2].is_punct('.'):
+                        self.handler_properties.add(previous.text.lower())
+                    if previous.text in ('src', 'href') and index >= 2 and nodes[index - 2].is_punct('.'):
+                        self._remote_load('src', following)
+
+            elif node.kind == 'group':
+                if node.text in ('[', '{') and _starts_literal(previous, node.text, parent_opener):
+                    self._allocate(function, node, 'array' if node.text == '[' else 'object', in_loop)
+                self._walk(node.children, function, in_loop, node.text)
+
+            index += 1
+
+    def _find_frame_functions(self):
+        """The functions requestAnimationFrame or setInterval schedule, and everything they call"""
+        roots = set()
+        for facts in self.functions.values():
+            for referenced in facts.interval_references:
+                roots |= {name for name in referenced if name in self.functions and name != '<top>'}
+            for referenced in facts.raf_references:
+                scheduled = {name for name in referenced if name in self.functions and name != '<top>'}
+                roots |= scheduled
+                if facts.name in referenced and facts.name != '<top>':
+                    self.animation_loops.append(facts.name)
+        self.animation_loops = sorted(set(self.animation_loops))
+        pending = list(roots)
+        while pending:
+            name = pending.pop()
+            if name in self.frame_functions:
+                continue
+            self.frame_functions.add(name)
+            pending.extend(callee for callee in self.functions[name].calls
+                           if callee in self.functions and callee not in self.frame_functions and callee != '<top>')
+        self.frame_allocations = sorted(
+            (allocation for name in self.frame_functions for allocation in self.functions[name].allocations),
+            key=lambda allocation: allocation['line'])
+
+    def summary(self):
+        """JSON-friendly counts for reports and metadata"""
+        return {
+            'parse_error': self.parse_error,
+            'listeners': sorted({listener['type'] for listener in self.listeners}),
+            'animation_loops': self.animation_loops,
+            'frame_functions': len(self.frame_functions),
+            'frame_allocations': len(self.frame_allocations),
+            'remote_loads': len(self.remote_loads),
+        }
+
+
+@functools.lru_cache(maxsize=16)
+def analyze(code):
+    """Parse a game once; validators given the same source share the Analysis.
+
+    The result is cached, so callers must treat it as read-only.
+    """
+    return Analysis(code)
@@ -0,0 +1,366 @@
+import re
+
+INDENT = '  '
+
+# Keywords after which a '/' starts a regular expression rather than a division
+REGEX_AFTER_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+}
+
+PUNCTUATORS = sorted([
+    '>>>=', '...', '===', '!==', '**=', '<<=', '>>=', '>>>', '&&=', '||=', '??=',
+    '=>', '==', '!=', '<=', '>=', '&&', '||', '??', '?.', '++', '--', '+=', '-=',
+    '*=', '/=', '%=', '&=', '|=', '^=', '**', '<<', '>>',
+    '{', '}', '(', ')', '[', ']', ';', ',', '<', '>', '+', '-', '*', '/', '%',
+    '&', '|', '^', '!', '~', '?', ':', '=', '.', '@',
+], key=len, reverse=True)
+
+OPENERS = {'{': '}', '[': ']', '(': ')'}
+CLOSERS = {'}', ']', ')'}
+
+# Keywords that continue the statement of the '}' before them, so stay on its line
+CONTINUES_AFTER_BRACE = {'else', 'catch', 'finally', 'while', 'in', 'of', 'instanceof'}
+# Keywords written with a space before their '('
+SPACED_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'with'}
+
+# Everything except strings, templates, regexes and '/' comments, which need
+# a hand-written scanner
+SIMPLE_TOKEN = re.compile(r'''
+    (?P<space>[ \t\f\v\u00a0\ufeff]+)
+  | (?P<newline>\r\n|[\n\r\u2028\u2029])
+  | (?P<number>0[xX][0-9a-fA-F_]+n?|0[oO][0-7_]+n?|0[bB][01_]+n?
+      |(?:\d[\d_]*(?:\.[\d_]*)?|\.\d[\d_]*)(?:[eE][+-]?\d[\d_]*)?n?)
+  | (?P<name>\#?(?:[^\W\d]|[$]|\\u[0-9a-fA-F]{4}|\\u\{[0-9a-fA-F]+\})(?:[\w$\u200c\u200d]|\\u[0-9a-fA-F]{4}|\\u\{[0-9a-fA-F]+\})*)
+  | (?P<punct>''' + '|'.join(re.escape(p) for p in PUNCTUATORS) + r''')
+''', re.VERBOSE)
+
+
+class JSSyntaxError(ValueError):
+    """Raised when the source cannot be tokenized (e.g. an unterminated string)"""
+
+
+class Token:
+    __slots__ = ('kind', 'text', 'newlines_before', 'space_before')
+
+    def __init__(self, kind, text, newlines_before, space_before):
+        self.kind = kind
+        self.text = text
+        self.newlines_before = newlines_before
+        self.space_before = space_before
+
+    def __repr__(self):
+        return f"Token({self.kind!r}, {self.text!r})"
+
+
+def _scan_string(code, start):
+    """Return the end of the string literal starting at `start`"""
+    quote = code[start]
+    i = start + 1
+    while i < len(code):
+        char = code[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote:
+            return i + 1
+        if char in '\n\r':
+            break
+        i += 1
+    raise JSSyntaxError(f"Unterminated string literal at offset {start}")
+
+
+def _scan_regex(code, start):
+    """Return the end of the regex literal at `start`, or None if it is not one"""
+    i = start + 1
+    in_class = False
+    while i < len(code):
+        char = code[i]
+        if char in '\n\r':
+            return None
+        if char == '\\':
+            i += 2
+            continue
+        if in_class:
+            if char == ']':
+                in_class = False
+        elif char == '[':
+            in_class = True
+        elif char == '/':
+            i += 1
+            while i < len(code) and (code[i].isalnum() or code[i] in '_$'):
+                i += 1
+            return i
+        i += 1
+    return None
+
+
+def _scan_template(code, start):
+    """Return the end of the template literal at `start`, including nested ${...} expressions"""
+    i = start + 1
+    while i < len(code):
+        char = code[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '`':
+            return i + 1
+        if char == '$' and code.startswith('${', i):
+            # Lex the embedded expression until its closing brace
+            depth = 0
+            for token, end in _iter_tokens(code, i + 2):
+                if token.kind == 'punct' and token.text == '{':
+                    depth += 1
+                elif token.kind == 'punct' and token.text == '}':
+                    if depth == 0:
+                        i = end
+                        break
+                    depth -= 1
+            else:
+                break
+            continue
+        i += 1
+    raise JSSyntaxError(f"Unterminated template literal at offset {start}")
+
+
+def _regex_allowed(previous):
+    """Whether a '/' after the `previous` significant token starts a regex"""
+    if previous is None:
+        return True
+    if previous.kind == 'punct':
+        return previous.text not in (')', ']', '}')
+    if previous.kind == 'name':
+        return previous.text in REGEX_AFTER_KEYWORDS
+    return False
+
+
+def _iter_tokens(code, position=0):
+    """Yield (token, end offset) for every significant token and comment"""
+    previous = None
+    newlines = 0
+    space = False
+    length = len(code)
+    while position < length:
+        char = code[position]
+        if char == '/' and code.startswith('//', position):
+            end = position
+            while end < length and code[end] not in '\n\r\u2028\u2029':
+                end += 1
+            kind = 'comment'
+        elif char == '/' and code.startswith('/*', position):
+            end = code.find('*/', position + 2)
+            if end < 0:
+                raise JSSyntaxError(f"Unterminated comment at offset {position}")
+            end += 2
+            kind = 'comment'
+        elif char in '"\'':
+            end = _scan_string(code, position)
+            kind = 'string'
+        elif char == '`':
+            end = _scan_template(code, position)
+            kind = 'template'
+        elif char == '/' and _regex_allowed(previous) and _scan_regex(code, position):
+            end = _scan_regex(code, position)
+            kind = 'regex'
+        else:
+            match = SIMPLE_TOKEN.match(code, position)
+            if not match:
+                raise JSSyntaxError(f"Unexpected character {char!r} at offset {position}")
+            kind = match.lastgroup
+            end = match.end()
+            if kind == 'space':
+                space = True
+                position = end
+                continue
+            if kind == 'newline':
+                newlines += 1
+                position = end
+                continue
+
+        token = Token(kind, code[position:end], newlines, space)
+        if kind != 'comment':
+            previous = token
+        newlines = 0
+        space = False
+        position = end
+        yield token, end
+
+
+def tokenize(code):
+    """Split JavaScript source into tokens (comments included, whitespace recorded on each token)"""
+    return [token for token, _ in _iter_tokens(code)]
+
+
+def tokenize_with_offsets(code):
+    """Like tokenize(), as (token, start, end) with offsets into `code`"""
+    return [(token, end - len(token.text), end) for token, end in _iter_tokens(code)]
+
+
+def _normalize_comment(text):
+    """Comments compare equal regardless of the indentation of their inner lines"""
+    return re.sub(r'(\r\n|[\n\r])[ \t]*', '\n', text)
+
+
+def token_signature(code):
+    """The token stream of `code` as comparable (kind, text) pairs"""
+    return [
+        (token.kind, _normalize_comment(token.text) if token.kind == 'comment' else token.text)
+        for token in tokenize(code)
+    ]
+
+
+def _reindent_comment(text, indent):
+    """Re-align the ' * ' lines of a block comment under its new indentation"""
+    lines = re.split(r'\r\n|[\n\r]', text)
+    if len(lines) == 1 or not all(line.lstrip().startswith('*') for line in lines[1:]):
+        return text
+    return '\n'.join([lines[0]] + [f"{indent} {line.lstrip()}" for line in lines[1:]])
+
+
+def _logical_lines(tokens):
+    """Group tokens into lines at the newlines found between tokens"""
+    lines = []
+    current = []
+    blank_before = 0
+    for token in tokens:
+        if token.newlines_before and current:
+            lines.append((blank_before, current))
+            current = []
+            blank_before = token.newlines_before - 1
+        elif token.newlines_before:
+            blank_before = token.newlines_before - 1 if lines else 0
+        current.append(token)
+    if current:
+        lines.append((blank_before, current))
+    return lines
+
+
+def _break_lines(tokens):
+    """Add the line breaks and spaces that minified or one-line code leaves out.
+
+    A line break is added after '{', before '}', after a '}' that ends a
+    statement, and after ';' outside parentheses (not inside for (;;)).
+    None of these can change automatic semicolon insertion: a break is never
+    added before a token that continues a restricted production such as
+    return, ++ or =>. Trailing comments stay on their line. A space is added
+    after ',', before '{', between '}' and else/catch/finally/while, and
+    between if/for/while/switch/catch and '('.
+    """
+    stack = []
+    for index, token in enumerate(tokens[:-1]):
+        following = tokens[index + 1]
+        if token.kind == 'punct':
+            if token.text in OPENERS:
+                stack.append(token.text)
+            elif token.text in CLOSERS and stack:
+                stack.pop()
+        if following.newlines_before or following.kind == 'comment':
+            continue
+        in_braces = not stack or stack[-1] == '{'
+        closes_brace = following.kind == 'punct' and following.text == '}'
+        if token.kind == 'punct' and token.text == '{':
+            if not closes_brace:
+                following.newlines_before = 1
+            continue
+        if closes_brace:
+            following.newlines_before = 1
+        elif token.kind == 'punct' and token.text == ';' and in_braces:
+            following.newlines_before = 1
+        elif token.kind == 'punct' and token.text == '}' and in_braces and following.kind != 'punct' \
+                and following.text not in CONTINUES_AFTER_BRACE:
+            following.newlines_before = 1
+        elif not following.space_before and (
+                token.kind == 'punct' and token.text == ','
+                or following.kind == 'punct' and following.text == '{' and (token.kind == 'name' or token.text in (')', '=>'))
+                or token.kind == 'punct' and token.text == '}' and following.text in CONTINUES_AFTER_BRACE
+                or token.kind == 'name' and token.text in SPACED_KEYWORDS and following.kind == 'punct' and following.text == '('):
+            following.space_before = True
+    return tokens
+
+
+def format_js(code):
+    """Pretty-print JavaScript with 2 spaces per nesting level.
+
+    The line breaks already in the code are kept, and those minified or
+    one-line code leaves out are added (see _break_lines), so automatic
+    semicolon insertion is never affected. Runs of spaces between tokens
+    become one space, multiple blank lines collapse to one, and
+    strings/templates/regexes are emitted verbatim. A line is indented one
+    level deeper than the line that opened its innermost bracket, a line
+    starting with closers lines up with the line that opened them, and
+    switch case bodies sit one level below their labels.
+    """
+    # Open brackets as (expected closer, level of the line that opened it, is switch body)
+    stack = []
+    output = []
+    # None, 'condition' while inside switch (...), 'body' right after it
+    switch_state = None
+    switch_parens = []
+
+    for blank_before, line in _logical_lines(_break_lines(tokenize(code))):
+        leading_closers = 0
+        for token in line:
+            if token.kind == 'punct' and token.text in CLOSERS:
+                leading_closers += 1
+            else:
+                break
+
+        if leading_closers and leading_closers <= len(stack):
+            level = stack[-leading_closers][1]
+        elif stack:
+            closer, opener_level, is_switch = stack[-1]
+            level = opener_level + 1
+            first = line[0]
+            if is_switch and not (first.kind == 'name' and first.text in ('case', 'default')):
+                level += 1
+        else:
+            level = 0
+        indent = INDENT * level
+
+        if blank_before and output:
+            output.append('')
+        parts = []
+        for index, token in enumerate(line):
+            if index and token.space_before:
+                parts.append(' ')
+            parts.append(_reindent_comment(token.text, indent) if token.kind == 'comment' else token.text)
+
+            if token.kind == 'name' and token.text == 'switch':
+                switch_state = 'condition'
+            if token.kind != 'punct':
+                continue
+            if token.text in OPENERS:
+                stack.append((OPENERS[token.text], level, token.text == '{' and switch_state == 'body'))
+                if token.text == '(' and switch_state == 'condition':
+                    switch_parens.append(len(stack))
+                switch_state = None
+            elif token.text in CLOSERS:
+                if not stack or stack[-1][0] != token.text:
+                    raise JSSyntaxError(f"Unbalanced {token.text!r} on output line {len(output) + 1}")
+                if switch_parens and switch_parens[-1] == len(stack):
+                    switch_parens.pop()
+                    switch_state = 'body'
+                stack.pop()
+        output.append(indent + ''.join(parts))
+
+    if stack:
+        raise JSSyntaxError("Unclosed brackets at end of input")
+    return '\n'.join(output) + '\n'
+
+
+def format_code_locally(code):
+    """Format a game and verify the result tokenizes to the same stream.
+
+    Returns (code, verified): the formatted code when formatting succeeded and
+    the token streams match, otherwise the original code unchanged.
+    """
+    try:
+        formatted = format_js(code)
+        verified = token_signature(formatted) == token_signature(code)
+    except JSSyntaxError as e:
+        print(f"⚠️  Local formatter could not parse the game: {e}")
+        return code, False
+    if not verified:
+        print("⚠️  Formatted code does not match the original token stream, keeping it unformatted")
+        return code, False
+    return formatted, True
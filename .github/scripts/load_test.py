@@ -0,0 +1,244 @@
+import argparse
+import http.client
+import json
+import random
+import re
+import statistics
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from preview_server import SITE_ROOT, PreviewServer
+
+DEFAULT_VISITORS = 200
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DAYS_PER_VISIT = 3  # Mean archive days a visitor opens after the latest game
+DEFAULT_DETAILS_RATE = 0.4  # Share of opened days whose metadata panel is opened too
+DEFAULT_RETURNING = 0.5  # Share of visitors who come back later with their browser cache
+DEFAULT_ACCEPT_ENCODING = 'br, gzip'
+
+# What index.html loads besides the script, found in the page itself
+LOCAL_IMAGE = re.compile(r'<img src="(?!https?:)([^"]+)"')
+MAX_AGE = re.compile(r'max-age=(\d+)')
+
+
+class BrowserCache:
+    """One visitor's HTTP cache: fresh responses are reused, stale ones revalidated with their ETag"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def fresh(self, path, now):
+        entry = self.entries.get(path)
+        if entry is None or 'no-cache' in entry['cache_control']:
+            return None
+        match = MAX_AGE.search(entry['cache_control'])
+        if match and now - entry['stored'] < int(match.group(1)):
+            return entry
+        return None
+
+    def validator(self, path):
+        entry = self.entries.get(path)
+        return entry['etag'] if entry else None
+
+    def store(self, path, response, body, now):
+        etag = response.getheader('ETag')
+        cache_control = response.getheader('Cache-Control') or ''
+        if etag and 'no-store' not in cache_control:
+            self.entries[path] = {'etag': etag, 'cache_control': cache_control, 'body': body, 'stored': now}
+
+    def body(self, path):
+        return self.entries[path]['body']
+
+
+class Visitor:
+    """Replays one person browsing the archive over a keep-alive connection, recording every request"""
+
+    def __init__(self, host, port, accept_encoding, rng, results):
+        self.connection = http.client.HTTPConnection(host, port, timeout=30)
+        self.accept_encoding = accept_encoding
+        self.rng = rng
+        self.results = results
+        self.cache = BrowserCache()
+        self.clock = 0.0  # Simulated seconds since the first visit, for freshness
+
+    def get(self, path, kind):
+        """The body of `path` (from the browser cache when it is fresh or revalidated), or None on an error status"""
+        fresh = self.cache.fresh(path, self.clock)
+        if fresh is not None:
+            self.results.append({'kind': kind, 'status': 'cached', 'seconds': 0.0, 'bytes': 0})
+            return fresh['body']
+        headers = {'Accept-Encoding': self.accept_encoding}
+        etag = self.cache.validator(path)
+        if etag:
+            headers['If-None-Match'] = etag
+        started = time.perf_counter()
+        self.connection.request('GET', path, headers=headers)
+        response = self.connection.getresponse()
+        body = response.read()
+        seconds = time.perf_counter() - started
+        self.results.append({'kind': kind, 'status': response.status, 'seconds': seconds, 'bytes': len(body)})
+        if response.status == 304:
+            return self.cache.body(path)
+        if response.status != 200:
+            return None
+        # Bodies are kept as sent; only JSON the visitor reads needs decoding, and it is never pre-compressed
+        self.cache.store(path, response, body, self.clock)
+        return body
+
+    def get_json(self, path, kind):
+        body = self.get(path, kind)
+        return json.loads(body) if body is not None else None
+
+    def game_url(self, manifest, filename):
+        # As script.js resolveGameUrl: the minified build if there is one
+        entry = (manifest or {}).get('files', {}).get(filename)
+        return f"/games/{entry['path']}" if entry else f"/games/{filename}"
+
+    def visit(self, days_per_visit, details_rate):
+        page = self.get('/', 'page')
+        self.get('/script.js?v=10', 'page')
+        for image in LOCAL_IMAGE.findall(page.decode('utf-8', 'replace') if page else ''):
+            self.get(f"/{image}", 'image')
+        catalog = self.get_json('/games/catalog.json', 'catalog')
+        dates = [row[0] for row in catalog['games']] if catalog else []
+        manifest = self.get_json('/games/dist/manifest.json', 'catalog')
+        self.get(self.game_url(manifest, 'latest.js'), 'game')
+        if not dates:
+            return
+
+        # Recent days are opened far more than old ones: weight 1 / (days back + 1)
+        newest_first = sorted(dates, reverse=True)
+        weights = [1 / (rank + 1) for rank in range(len(newest_first))]
+        opened_months = set()
+        for _ in range(int(self.rng.expovariate(1 / days_per_visit))):
+            game_date = self.rng.choices(newest_first, weights)[0]
+            self.get(self.game_url(manifest, f"{game_date}.js"), 'game')
+            if self.rng.random() < details_rate:
+                # As script.js loadMetadata: the day's fragment, then its month's bundle once per page
+                month = game_date[:7]
+                if month not in opened_months:
+                    self.get(f"/games/details/{game_date}.html", 'details')
+                    self.get(f"/games/details/{month}.json", 'details')
+                    opened_months.add(month)
+
+    def close(self):
+        self.connection.close()
+
+
+def run_load(base_url, visitors=DEFAULT_VISITORS, concurrency=DEFAULT_CONCURRENCY, days_per_visit=DEFAULT_DAYS_PER_VISIT,
+             details_rate=DEFAULT_DETAILS_RATE, returning=DEFAULT_RETURNING, accept_encoding=DEFAULT_ACCEPT_ENCODING, seed=0):
+    """Replay `visitors` sessions against `base_url`; returns (request records, wall seconds)"""
+    url = urllib.parse.urlsplit(base_url)
+    results = []
+    lock = threading.Lock()
+
+    def session(number):
+        rng = random.Random(f"{seed}-{number}")
+        records = []
+        visitor = Visitor(url.hostname, url.port or 80, accept_encoding, rng, records)
+        try:
+            visitor.visit(days_per_visit, details_rate)
+            if rng.random() < returning:
+                visitor.clock += rng.uniform(3600, 7 * 86400)  # Back within the week
+                visitor.visit(days_per_visit, details_rate)
+        finally:
+            visitor.close()
+        with lock:
+            results.extend(records)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(session, range(visitors)))
+    return results, time.perf_counter() - started
+
+
+def percentiles(seconds):
+    """(p50, p99) in milliseconds"""
+    if not seconds:
+        return None, None
+    if len(seconds) == 1:
+        return seconds[0] * 1000, seconds[0] * 1000
+    cuts = statistics.quantiles(seconds, n=100, method='inclusive')
+    return cuts[49] * 1000, cuts[98] * 1000
+
+
+def summarize(results, wall_seconds):
+    """Latency percentiles, statuses and bytes, overall and per kind of resource"""
+    def stats(records):
+        sent = [record for record in records if record['status'] != 'cached']
+        p50, p99 = percentiles([record['seconds'] for record in sent])
+        statuses = {}
+        for record in records:
+            statuses[str(record['status'])] = statuses.get(str(record['status']), 0) + 1
+        return {
+            'loads': len(records),
+            'requests': len(sent),
+            'statuses': dict(sorted(statuses.items())),
+            'p50_ms': round(p50, 3) if p50 is not None else None,
+            'p99_ms': round(p99, 3) if p99 is not None else None,
+            'bytes': sum(record['bytes'] for record in records),
+        }
+
+    summary = stats(results)
+    summary['wall_seconds'] = round(wall_seconds, 3)
+    summary['requests_per_second'] = round(summary['requests'] / wall_seconds, 1) if wall_seconds else None
+    summary['kinds'] = {kind: stats([record for record in results if record['kind'] == kind])
+                        for kind in sorted({record['kind'] for record in results})}
+    return summary
+
+
+def print_report(summary):
+    print(f"⏱️  {summary['requests']} requests for {summary['loads']} loads in {summary['wall_seconds']:.1f}s "
+          f"({summary['requests_per_second']} req/s)")
+    print(f"   {'Kind':<9} {'Loads':>6} {'Requests':>9} {'p50 ms':>8} {'p99 ms':>8} {'KB':>9}  Statuses")
+    for kind, stats in [*summary['kinds'].items(), ('total', summary)]:
+        p50 = f"{stats['p50_ms']:.2f}" if stats['p50_ms'] is not None else '-'
+        p99 = f"{stats['p99_ms']:.2f}" if stats['p99_ms'] is not None else '-'
+        statuses = ', '.join(f"{status}: {count}" for status, count in stats['statuses'].items())
+        print(f"   {kind:<9} {stats['loads']:>6} {stats['requests']:>9} {p50:>8} {p99:>8} {stats['bytes'] / 1024:>9.1f}  {statuses}")
+    errors = sum(count for status, count in summary['statuses'].items() if status not in ('200', '206', '304', 'cached'))
+    if errors:
+        print(f"⚠️  {errors} request(s) failed")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay archive-browsing traffic against the preview server and report latency and bytes")
+    parser.add_argument('--url', help="server to load (default: start preview_server.py on a free port)")
+    parser.add_argument('--root', default=SITE_ROOT, help="site served when no --url is given (default: the current directory)")
+    parser.add_argument('--no-precompressed', action='store_true', help="start the server without its .br and .gz variants")
+    parser.add_argument('--max-age', type=int, default=0, help="max-age the started server gives files without a content hash")
+    parser.add_argument('--visitors', type=int, default=DEFAULT_VISITORS, help=f"sessions replayed (default: {DEFAULT_VISITORS})")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"visitors browsing at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--days-per-visit', type=float, default=DEFAULT_DAYS_PER_VISIT,
+                        help=f"mean archive days opened per visit (default: {DEFAULT_DAYS_PER_VISIT})")
+    parser.add_argument('--details-rate', type=float, default=DEFAULT_DETAILS_RATE,
+                        help=f"share of opened days whose metadata is shown (default: {DEFAULT_DETAILS_RATE})")
+    parser.add_argument('--returning', type=float, default=DEFAULT_RETURNING,
+                        help=f"share of visitors who come back with a warm cache (default: {DEFAULT_RETURNING})")
+    parser.add_argument('--accept-encoding', default=DEFAULT_ACCEPT_ENCODING,
+                        help=f"Accept-Encoding the visitors send (default: '{DEFAULT_ACCEPT_ENCODING}')")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the traffic, so runs are comparable")
+    parser.add_argument('--json', metavar='PATH', help="also write the summary to PATH")
+    args = parser.parse_args(argv)
+
+    options = dict(visitors=args.visitors, concurrency=args.concurrency, days_per_visit=args.days_per_visit,
+                   details_rate=args.details_rate, returning=args.returning,
+                   accept_encoding=args.accept_encoding, seed=args.seed)
+    if args.url:
+        results, wall_seconds = run_load(args.url, **options)
+    else:
+        with PreviewServer(args.root, precompressed=not args.no_precompressed, max_age=args.max_age) as server:
+            results, wall_seconds = run_load(server.base_url, **options)
+
+    summary = summarize(results, wall_seconds)
+    print_report(summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
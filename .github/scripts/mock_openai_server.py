@@ -0,0 +1,243 @@
+import argparse
+import itertools
+import json
+import re
+import select
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fake_openai import SAMPLE_GAME, fake_reply
+
+
+class Scenario:
+    """What the mock server answers, and where it misbehaves.
+
+    responses: [{'match': regex, 'output_text' or 'output_file'}], recorded
+               answers for prompts matching the regex (first match wins);
+               other prompts get the fake client's answer
+    faults:    [{'match': regex (optional), 'times': n, 'status': code,
+               'delay': seconds}], consumed in order: the first fault whose
+               regex matches and that has uses left delays the reply and,
+               with a status, fails it
+    game:      answer for fresh generation prompts, or 'game_file' to load it
+    event_delay: seconds a streamed reply waits for the client between
+               events, so a client that stops reading is seen closing the
+               connection before the whole reply is written
+    """
+
+    def __init__(self, responses=(), faults=(), game=SAMPLE_GAME, event_delay=0):
+        self.responses = [(re.compile(rule['match']), rule) for rule in responses]
+        self.faults = [dict(fault, remaining=fault.get('times', 1)) for fault in faults]
+        self.game = game
+        self.event_delay = event_delay
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        responses = []
+        for rule in data.get('responses', []):
+            if 'output_file' in rule:
+                with open(rule['output_file'], 'r') as f:
+                    rule = dict(rule, output_text=f.read())
+            responses.append(rule)
+        game = data.get('game', SAMPLE_GAME)
+        if 'game_file' in data:
+            with open(data['game_file'], 'r') as f:
+                game = f.read()
+        return cls(responses, data.get('faults', []), game, data.get('event_delay', 0))
+
+    def reply(self, prompt):
+        for pattern, rule in self.responses:
+            if pattern.search(prompt):
+                return rule['output_text']
+        return fake_reply(prompt, self.game)
+
+    def take_fault(self, prompt):
+        """The next fault that applies to this prompt, counting it as used"""
+        with self.lock:
+            for fault in self.faults:
+                if fault['remaining'] > 0 and re.search(fault.get('match', ''), prompt):
+                    fault['remaining'] -= 1
+                    return fault
+        return None
+
+
+def _response_body(response_id, model, text, prompt):
+    # Roughly four characters per token, like the fake client
+    input_tokens, output_tokens = len(prompt) // 4, len(text) // 4
+    return {
+        'id': response_id,
+        'object': 'response',
+        'created_at': int(time.time()),
+        'status': 'completed',
+        'model': model,
+        'output': [{
+            'type': 'message',
+            'id': f"msg_{response_id}",
+            'status': 'completed',
+            'role': 'assistant',
+            'content': [{'type': 'output_text', 'text': text, 'annotations': []}],
+        }],
+        'parallel_tool_calls': True,
+        'tool_choice': 'auto',
+        'tools': [],
+        'usage': {
+            'input_tokens': input_tokens,
+            'input_tokens_details': {'cached_tokens': 0},
+            'output_tokens': output_tokens,
+            'output_tokens_details': {'reasoning_tokens': 0},
+            'total_tokens': input_tokens + output_tokens,
+        },
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _client_gone(self, timeout=0):
+        """Whether the client closes the connection within `timeout` seconds; a closed socket reads as empty"""
+        readable, _, _ = select.select([self.connection], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            return self.connection.recv(1, socket.MSG_PEEK) == b''
+        except OSError:
+            return True
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        started = time.perf_counter()
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.path.rstrip('/') != '/v1/responses':
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}", 'type': 'invalid_request_error'}})
+            return
+        model = request.get('model', '')
+        messages = request.get('input')
+        prompt = messages if isinstance(messages, str) else messages[-1]['content']
+        stream = bool(request.get('stream'))
+        record = {'prompt': prompt, 'model': model, 'stream': stream, 'status': 200}
+
+        fault = server.scenario.take_fault(prompt)
+        if fault:
+            time.sleep(fault.get('delay', 0))
+            if fault.get('status'):
+                record['status'] = fault['status']
+                server.record(record, started)
+                error_type = 'rate_limit_error' if fault['status'] == 429 else 'server_error'
+                self._send_json(fault['status'], {'error': {'message': "Injected fault from the mock server", 'type': error_type}})
+                return
+
+        response_id = f"resp_mock_{next(server.ids)}"
+        text = server.scenario.reply(prompt)
+        body = _response_body(response_id, model, text, prompt)
+        if not stream:
+            self._send_json(200, body)
+        else:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            events = [{'type': 'response.created', 'response': dict(body, status='in_progress', output=[])}]
+            events += [
+                {'type': 'response.output_text.delta', 'item_id': f"msg_{response_id}", 'output_index': 0,
+                 'content_index': 0, 'delta': text[start:start + server.chunk_size], 'logprobs': []}
+                for start in range(0, len(text), server.chunk_size)
+            ]
+            events.append({'type': 'response.completed', 'response': body})
+            # A whole small reply fits in the socket buffers, so a write rarely
+            # fails when the client stops reading; instead the connection is
+            # checked for the client closing it before every further event
+            try:
+                for number, event in enumerate(events):
+                    if number and self._client_gone(server.scenario.event_delay):
+                        record['status'] = 'aborted'  # The client stopped reading, e.g. a streamed dependency abort
+                        break
+                    event['sequence_number'] = number
+                    self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                record['status'] = 'aborted'
+            self.close_connection = True
+        server.record(record, started)
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    """A local stand-in for the OpenAI Responses API, for offline end-to-end runs.
+
+    Point the real SDK at `base_url` (e.g. OPENAI_BASE_URL) and every
+    responses.create call, streamed or not, is answered from the scenario.
+    Each request is logged in `requests` with its status and duration.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, scenario=None, host='127.0.0.1', port=0, chunk_size=512):
+        super().__init__((host, port), _Handler)
+        self.scenario = scenario or Scenario()
+        self.chunk_size = chunk_size
+        self.requests = []
+        self.ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def record(self, record, started):
+        record['seconds'] = round(time.perf_counter() - started, 4)
+        with self._lock:
+            self.requests.append(record)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a mock OpenAI Responses API for offline runs of the generator")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--scenario', metavar='JSON', help="Recorded responses and injected faults (see Scenario)")
+    args = parser.parse_args(argv)
+
+    server = MockOpenAIServer(Scenario.load(args.scenario) if args.scenario else None, port=args.port)
+    print(f"🧪 Mock OpenAI server on {server.base_url}")
+    print(f"   OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=test python .github/scripts/generate_game_with_assistant.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
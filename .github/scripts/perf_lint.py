@@ -0,0 +1,158 @@
+import argparse
+import os
+
+from archive_pack import iter_game_files
+from js_analyzer import AUDIO_CONTEXT_CLASSES, analyze
+
+GAMES_DIR = "games"
+
+GRADIENT_METHODS = {'createLinearGradient', 'createRadialGradient', 'createPattern'}
+PIXEL_READ_METHODS = {'getImageData'}
+GROW_METHODS = {'push', 'unshift'}
+SHRINK_METHODS = {'splice', 'shift', 'pop'}
+
+
+def _finding(rule, severity, function, line, message):
+    return {'rule': rule, 'severity': severity, 'function': function, 'line': line, 'message': message}
+
+
+def gradients_per_frame(analysis):
+    """Gradients and patterns rebuilt every frame instead of once"""
+    for call in analysis.member_calls:
+        if call['method'] in GRADIENT_METHODS and call['function'] in analysis.frame_functions:
+            where = "inside a loop that runs every frame" if call['in_loop'] else "every frame"
+            yield _finding('gradient_per_frame', 'warning', call['function'], call['line'],
+                           f"{call['method']}() runs {where} in {call['function']}() at line {call['line']}; create it once and reuse it")
+
+
+def fonts_per_frame(analysis):
+    """ctx.font reassigned for every element drawn, which re-parses the font each time"""
+    for write in analysis.property_writes:
+        if write['property'] == 'font' and write['in_loop'] and write['function'] in analysis.frame_functions:
+            yield _finding('font_per_frame', 'warning', write['function'], write['line'],
+                           f"font is set inside a loop that runs every frame in {write['function']}() at line {write['line']}; "
+                           f"set it once before the loop")
+
+
+def pixel_reads_per_frame(analysis):
+    """getImageData stalls the GPU pipeline on every call"""
+    for call in analysis.member_calls:
+        if call['method'] in PIXEL_READ_METHODS and call['function'] in analysis.frame_functions:
+            yield _finding('image_data_per_frame', 'severe', call['function'], call['line'],
+                           f"{call['method']}() reads back pixels every frame in {call['function']}() at line {call['line']}")
+
+
+def audio_contexts_per_sound(analysis):
+    """A new AudioContext per sound or per frame; browsers allow only a handful"""
+    for construction in analysis.constructions:
+        if construction['class'] not in AUDIO_CONTEXT_CLASSES:
+            continue
+        # A local context in a function without an early-return guard is created on every call
+        function = analysis.functions[construction['function']]
+        if construction['function'] in analysis.frame_functions or (
+                construction['local'] and function.name != '<top>' and not function.guarded):
+            yield _finding('audio_context_per_sound', 'severe', construction['function'], construction['line'],
+                           f"a new {construction['class']} is created on every call of {construction['function']}() "
+                           f"at line {construction['line']}; create one shared context")
+
+
+def unbounded_growth(analysis):
+    """Shared arrays pushed to every frame that nothing ever removes from or resets"""
+    shrunk = set(analysis.reassigned)
+    shrunk.update(call['object'] for call in analysis.member_calls if call['method'] in SHRINK_METHODS)
+    shrunk.update(write['object'] for write in analysis.property_writes if write['property'] == 'length')
+    reported = set()
+    for call in analysis.member_calls:
+        name = call['object']
+        if (call['method'] in GROW_METHODS and call['function'] in analysis.frame_functions
+                and name not in analysis.functions[call['function']].declared
+                and name not in shrunk and name not in reported):
+            reported.add(name)
+            yield _finding('unbounded_growth', 'severe', call['function'], call['line'],
+                           f"{name} grows every frame in {call['function']}() at line {call['line']} but is never pruned or reset")
+
+
+def listeners_per_frame(analysis):
+    """Event listeners registered again on every frame"""
+    for listener in analysis.listeners:
+        if listener['function'] in analysis.frame_functions:
+            yield _finding('listener_per_frame', 'severe', listener['function'], listener['line'],
+                           f"a '{listener['type']}' listener is added every frame in {listener['function']}() at line {listener['line']}")
+
+
+def allocations_in_frame_loops(analysis):
+    """Arrays, objects and instances allocated per element, per frame"""
+    in_loops = [allocation for allocation in analysis.frame_allocations if allocation['in_loop']]
+    if in_loops:
+        first = in_loops[0]
+        yield _finding('allocation_in_frame_loop', 'warning', first['function'], first['line'],
+                       f"{len(in_loops)} allocations inside loops that run every frame "
+                       f"(first: {first['kind']} in {first['function']}() at line {first['line']})")
+
+
+PERFORMANCE_RULES = [
+    gradients_per_frame,
+    fonts_per_frame,
+    pixel_reads_per_frame,
+    audio_contexts_per_sound,
+    unbounded_growth,
+    listeners_per_frame,
+    allocations_in_frame_loops,
+]
+
+
+def lint_performance(code):
+    """Run every performance rule over the game's static analysis.
+
+    The game passes when no finding is severe; severe findings are listed
+    as issues and the rest as warnings.
+    """
+    analysis = analyze(code)
+    if analysis.parse_error:
+        return {
+            'findings': [], 'severe_count': 0, 'warning_count': 0, 'issues': [],
+            'warnings': [f"Performance lint skipped: {analysis.parse_error}"], 'passing': True,
+        }
+    findings = sorted((finding for rule in PERFORMANCE_RULES for finding in rule(analysis)),
+                      key=lambda finding: (finding['line'], finding['rule']))
+    issues = [finding['message'] for finding in findings if finding['severity'] == 'severe']
+    warnings = [finding['message'] for finding in findings if finding['severity'] != 'severe']
+    return {
+        'findings': findings,
+        'severe_count': len(issues),
+        'warning_count': len(warnings),
+        'issues': issues,
+        'warnings': warnings,
+        'passing': not issues,
+    }
+
+
+def read_files(paths):
+    for path in paths:
+        with open(path, 'r') as f:
+            yield os.path.basename(path), f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report work generated games repeat on every frame")
+    parser.add_argument('files', nargs='*', help=f"Game files to lint (default: every dated game in {GAMES_DIR}/, loose or packed)")
+    args = parser.parse_args(argv)
+
+    if args.files:
+        games = read_files(args.files)
+    else:
+        games = ((f"{game_date}.js", code) for game_date, code in iter_game_files(GAMES_DIR))
+    linted = severe_games = 0
+    for game_name, code in games:
+        result = lint_performance(code)
+        linted += 1
+        severe_games += not result['passing']
+        status = '✅' if result['passing'] else '❌'
+        print(f"{status} {game_name}: {result['severe_count']} severe, {result['warning_count']} warnings")
+        for finding in result['findings']:
+            print(f"    {'❌' if finding['severity'] == 'severe' else '⚠️ '} {finding['message']}")
+    print(f"\n{severe_games} of {linted} games have severe performance findings")
+
+
+if __name__ == "__main__":
+    main()
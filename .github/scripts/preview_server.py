@@ -0,0 +1,328 @@
+import argparse
+import email.utils
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from archive_pack import DATED_FILE, ArchivePack, archive_path
+
+SITE_ROOT = "."
+GAMES_DIR = "games"
+ETAG_LENGTH = 20  # Hex digits of the SHA-256 of a representation's bytes
+
+# Builds in games/dist carry their content hash in the name, so a URL never
+# changes content and browsers may keep it for a year without asking again
+IMMUTABLE_FILE = re.compile(r'^games/dist/.+\.[0-9a-f]{10}\.min\.js$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Pre-compressed siblings written by build_assets.py, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+SINGLE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+mimetypes.add_type('text/javascript', '.js')
+mimetypes.add_type('application/json', '.json')
+
+
+def accepted_encodings(header):
+    """The content codings an Accept-Encoding header allows (those not given q=0)"""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = re.search(r'q=([\d.]+)', params)
+        if coding and not (quality and float(quality.group(1)) == 0):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single byte range, 'unsatisfiable', or None to send the whole body.
+
+    Multiple ranges are answered with the whole body, which RFC 9110 allows.
+    """
+    match = SINGLE_RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # The final `last` bytes
+        if int(last) == 0:
+            return 'unsatisfiable'
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return 'unsatisfiable'
+    return start, end
+
+
+def etag_matches(header, etag, weak=True):
+    """Whether an If-None-Match (weak comparison) or If-Range (strong) header names `etag`"""
+    if header is None:
+        return False
+    if weak and header.strip() == '*':
+        return True
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            if not weak:
+                continue
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class Representation:
+    """One servable body: a file, one of its pre-compressed variants, or a file read from the game archive"""
+
+    def __init__(self, data, mtime, content_type, encoding=None):
+        self.data = data
+        self.mtime = int(mtime)
+        self.content_type = content_type
+        self.encoding = encoding
+        self.etag = f'"{hashlib.sha256(data).hexdigest()[:ETAG_LENGTH]}"'
+
+    @property
+    def last_modified(self):
+        return email.utils.formatdate(self.mtime, usegmt=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'LearningTimePreview/1'
+    # Headers and body are separate writes; with Nagle the body waits for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_error(self, status, message):
+        data = f"{status} {message}\n".encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        server = self.server
+        relative = server.resolve(self.path)
+        if relative is None:
+            self._send_error(404, "Not Found")
+            return
+        variants = server.variants(relative)
+        if not variants:
+            self._send_error(404, "Not Found")
+            return
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding'))
+        representation = next((variant for variant in variants if variant.encoding in accepted), variants[-1])
+
+        common = [('ETag', representation.etag), ('Last-Modified', representation.last_modified),
+                  ('Cache-Control', server.cache_control(relative)), ('Accept-Ranges', 'bytes')]
+        if len(variants) > 1:
+            common.append(('Vary', 'Accept-Encoding'))
+
+        # If-None-Match takes precedence; If-Modified-Since only applies without it
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        not_modified = etag_matches(if_none_match, representation.etag)
+        if if_none_match is None and if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+                not_modified = representation.mtime <= since
+            except (TypeError, ValueError):
+                pass
+        if not_modified:
+            self.send_response(304)
+            for name, value in common:
+                self.send_header(name, value)
+            self.end_headers()
+            return
+
+        data = representation.data
+        status = 200
+        byte_range = parse_range(self.headers.get('Range'), len(data))
+        if_range = self.headers.get('If-Range')
+        if byte_range is not None and if_range is not None and not etag_matches(if_range, representation.etag, weak=False) \
+                and if_range != representation.last_modified:
+            byte_range = None  # The client's partial copy is stale: send the whole body
+        if byte_range == 'unsatisfiable':
+            self.send_response(416)
+            for name, value in common:
+                self.send_header(name, value)
+            self.send_header('Content-Range', f"bytes */{len(data)}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if byte_range is not None:
+            start, end = byte_range
+            status, body = 206, data[start:end + 1]
+        else:
+            body = data
+
+        self.send_response(status)
+        for name, value in common:
+            self.send_header(name, value)
+        self.send_header('Content-Type', representation.content_type)
+        if representation.encoding:
+            self.send_header('Content-Encoding', representation.encoding)
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(data)}")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+
+
+class PreviewServer(ThreadingHTTPServer):
+    """Serve the site (index.html, script.js, games/) the way production should.
+
+    Every response carries a strong ETag from the SHA-256 of the bytes sent,
+    Last-Modified and Cache-Control; conditional requests get 304 and single
+    byte ranges 206. The .br and .gz files build_assets.py writes beside the
+    games in games/dist are sent with Content-Encoding to clients that accept
+    them. Days moved into games/archive.pack are served from the pack.
+    Representations are kept in memory until their file changes.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, root=SITE_ROOT, host='127.0.0.1', port=0, precompressed=True, max_age=0, verbose=False):
+        super().__init__((host, port), _Handler)
+        self.root = os.path.abspath(root)
+        self.precompressed = precompressed
+        self.max_age = max_age
+        self.verbose = verbose
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def resolve(self, request_path):
+        """The site-relative path a request names, or None if it is outside the site or hidden"""
+        path = posixpath.normpath(urllib.parse.unquote(urllib.parse.urlsplit(request_path).path))
+        parts = [part for part in path.split('/') if part]
+        if any(part.startswith('.') for part in parts):
+            return None  # .git, .github, and '..' that normpath left at the top
+        relative = '/'.join(parts)
+        if not relative or os.path.isdir(os.path.join(self.root, relative)):
+            relative = posixpath.join(relative, 'index.html')
+        return relative
+
+    def cache_control(self, relative):
+        if IMMUTABLE_FILE.match(relative):
+            return IMMUTABLE_CACHE_CONTROL
+        # Everything else may change with the next game, so caches revalidate
+        # (cheaply, with the ETag) unless a max age is given
+        return f"public, max-age={self.max_age}" if self.max_age else 'no-cache'
+
+    def variants(self, relative):
+        """The representations of a path, pre-compressed ones first and the identity body last"""
+        full_path = os.path.join(self.root, *relative.split('/'))
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/json':
+            content_type += '; charset=utf-8'
+        identity = self._load(full_path, content_type)
+        if identity is None:
+            identity = self._load_packed(relative, content_type)
+            return [identity] if identity is not None else []
+        variants = []
+        if self.precompressed:
+            for encoding, suffix in ENCODINGS:
+                variant = self._load(full_path + suffix, content_type, encoding)
+                if variant is not None:
+                    variants.append(variant)
+        return variants + [identity]
+
+    def _load(self, path, content_type, encoding=None):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with open(path, 'rb') as f:
+            representation = Representation(f.read(), stat.st_mtime, content_type, encoding)
+        with self._lock:
+            self._cache[path] = (key, representation)
+        return representation
+
+    def _load_packed(self, relative, content_type):
+        directory, _, name = relative.rpartition('/')
+        match = DATED_FILE.match(name)
+        pack_path = archive_path(os.path.join(self.root, GAMES_DIR))
+        if directory != GAMES_DIR or not match or not os.path.exists(pack_path):
+            return None
+        stat = os.stat(pack_path)
+        key = (pack_path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._cache.get(relative)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with ArchivePack(pack_path) as pack:
+            data = pack.read_bytes(*match.groups())
+        if data is None:
+            return None
+        representation = Representation(data, stat.st_mtime, content_type)
+        with self._lock:
+            self._cache[relative] = (key, representation)
+        return representation
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the site locally with production-like caching and compression")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--root', default=SITE_ROOT, help="directory holding index.html (default: the current directory)")
+    parser.add_argument('--max-age', type=int, default=0,
+                        help="max-age in seconds for files without a content hash in their name (default: 0, always revalidate)")
+    parser.add_argument('--no-precompressed', action='store_true', help="ignore the .br and .gz variants and send every file as is")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args(argv)
+
+    server = PreviewServer(args.root, port=args.port, precompressed=not args.no_precompressed,
+                           max_age=args.max_age, verbose=args.verbose)
+    print(f"🌐 Previewing {server.root} on {server.base_url}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
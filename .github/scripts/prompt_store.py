@@ -0,0 +1,201 @@
+import argparse
+import functools
+import hashlib
+import json
+import os
+import re
+
+from checkpoints import atomic_write
+
+GAMES_DIR = "games"
+PROMPT_STORE_DIR = "games/prompts"
+KEY_LENGTH = 16  # Hex digits of the SHA-256 naming each stored text
+INLINE_LIMIT = 256  # Parameters longer than this are stored by content hash
+
+# Metadata fields holding prompts, with the parameter names their builders use
+PROMPT_FIELDS = {'prompt': 'initial', 'improve_prompt': 'improve'}
+META_FILE = re.compile(r'^(\d{4}-\d{2}-\d{2})\.meta\.json$')
+# Prompts that embed a game put it between '---' lines
+EMBEDDED_CODE = re.compile(r'^(.*?---\n)(.*)(\n---\n?)$', re.DOTALL)
+PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+def content_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:KEY_LENGTH]
+
+
+def render_template(template, params):
+    """Fill the {name} placeholders of `template`; other braces are left alone"""
+    return PLACEHOLDER.sub(lambda match: params.get(match.group(1), match.group(0)), template)
+
+
+class PromptStore:
+    """Content-addressed texts shared by every game's metadata.
+
+    A prompt is recorded as a reference: the key of its template plus its
+    parameters, where long parameters (a game's source) are keys too. Texts
+    are written once, so a template used every day is stored a single time.
+    """
+
+    def __init__(self, directory=PROMPT_STORE_DIR):
+        self.directory = directory
+        self.written = []
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def put(self, text):
+        """Store a text if it is not already stored and return its key"""
+        key = content_key(text)
+        path = self.path(key)
+        if not os.path.exists(path):
+            atomic_write(path, text)
+            self.written.append(path)
+        return key
+
+    def get(self, key):
+        return _read_text(self.path(key))
+
+    def save_prompt(self, name, text, params):
+        """Store `text` as a template and parameters and return the reference.
+
+        Every occurrence of each parameter's value becomes a {name}
+        placeholder. If the template would not render back to exactly
+        `text` (e.g. it already contains such a placeholder) the whole text
+        is stored with no parameters instead.
+        """
+        template = text
+        for param, value in params.items():
+            if value:
+                template = template.replace(value, f"{{{param}}}")
+        if render_template(template, params) != text:
+            template, params = text, {}
+        return {
+            'name': name,
+            'template': self.put(template),
+            'params': {
+                param: {'text': self.put(value), 'bytes': len(value.encode('utf-8'))}
+                if len(value) > INLINE_LIMIT else value
+                for param, value in params.items()
+            },
+        }
+
+    def load_prompt(self, value):
+        """The full text of a prompt field, whether a reference or (in older games) the text itself"""
+        if not isinstance(value, dict):
+            return value
+        params = {
+            param: self.get(param_value['text']) if isinstance(param_value, dict) else param_value
+            for param, param_value in value['params'].items()
+        }
+        return render_template(self.get(value['template']), params)
+
+    def outline(self, value, base_dir=GAMES_DIR):
+        """Markdown for a prompt reference: its template, with stored parameters listed instead of inlined"""
+        template = render_template(self.get(value['template']), {
+            param: param_value for param, param_value in value['params'].items() if not isinstance(param_value, dict)
+        })
+        stored = [
+            f"- `{{{param}}}`: {param_value['bytes']} bytes, stored in `{os.path.relpath(self.path(param_value['text']), base_dir)}`"
+            for param, param_value in value['params'].items() if isinstance(param_value, dict)
+        ]
+        return template + ('\n\n' + '\n'.join(stored) if stored else '')
+
+
+@functools.lru_cache(maxsize=64)
+def _read_text(path):
+    # Stored texts never change, so repeated lookups (templates) are served from memory
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def prompt_params(field, text, metadata):
+    """The parameters a prompt was built from, recovered from its text and the metadata"""
+    if field == 'prompt':
+        return {'theme': metadata['theme']} if metadata.get('theme') else {}
+    match = EMBEDDED_CODE.match(text)
+    return {'code': match.group(2)} if match else {}
+
+
+def read_metadata(path, resolve_prompts=False, store=None):
+    """Load a meta.json; with resolve_prompts the prompt references are expanded to full text"""
+    with open(path, 'r') as f:
+        metadata = json.load(f)
+    if resolve_prompts:
+        store = store or PromptStore()
+        for field in PROMPT_FIELDS:
+            if metadata.get(field) is not None:
+                metadata[field] = store.load_prompt(metadata[field])
+    return metadata
+
+
+def migrate(games_dir=GAMES_DIR, store=None):
+    """Move the prompts embedded in every meta.json (and meta.md) into the store.
+
+    Returns (games migrated, bytes before, bytes after), counting the store.
+    """
+    store = store or PromptStore(os.path.join(games_dir, 'prompts'))
+    migrated = before = after = 0
+    for name in sorted(os.listdir(games_dir)):
+        if not META_FILE.match(name):
+            continue
+        json_path = os.path.join(games_dir, name)
+        markdown_path = json_path[:-len('.json')] + '.md'
+        with open(json_path, 'r') as f:
+            raw = f.read()
+        metadata = json.loads(raw)
+        try:
+            with open(markdown_path, 'r') as f:
+                markdown = original_markdown = f.read()
+        except OSError:
+            markdown = original_markdown = None
+        changed = False
+        for field, template_name in PROMPT_FIELDS.items():
+            text = metadata.get(field)
+            if not isinstance(text, str):
+                continue
+            reference = store.save_prompt(template_name, text, prompt_params(field, text, metadata))
+            if store.load_prompt(reference) != text:
+                raise ValueError(f"{name}: {field} does not round-trip through the prompt store")
+            metadata[field] = reference
+            changed = True
+            # Only prompts with stored parameters (a whole game) are worth shortening in the Markdown
+            stores_params = any(isinstance(value, dict) for value in reference['params'].values())
+            if markdown is not None and stores_params and text in markdown:
+                markdown = markdown.replace(text, store.outline(reference, games_dir))
+        if not changed:
+            continue
+        migrated += 1
+        before += len(raw.encode('utf-8'))
+        updated = json.dumps(metadata, indent=2)
+        after += len(updated.encode('utf-8'))
+        atomic_write(json_path, updated)
+        if markdown is not None:
+            before += len(original_markdown.encode('utf-8'))
+            after += len(markdown.encode('utf-8'))
+            if markdown != original_markdown:
+                atomic_write(markdown_path, markdown)
+    after += sum(os.path.getsize(path) for path in store.written)
+    return migrated, before, after
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the shared prompt store in games/prompts")
+    parser.add_argument('--migrate', action='store_true', help="move prompts embedded in existing metadata into the store")
+    parser.add_argument('--show', metavar='YYYY-MM-DD', help="print a game's prompts in full")
+    args = parser.parse_args(argv)
+
+    if args.migrate:
+        migrated, before, after = migrate()
+        print(f"✅ Migrated {migrated} games: metadata {before:,} bytes -> {after:,} bytes including the store")
+    elif args.show:
+        metadata = read_metadata(os.path.join(GAMES_DIR, f"{args.show}.meta.json"), resolve_prompts=True)
+        for field in PROMPT_FIELDS:
+            if metadata.get(field):
+                print(f"===== {field} =====\n{metadata[field]}\n")
+    else:
+        parser.error("give --migrate or --show")
+
+
+if __name__ == "__main__":
+    main()
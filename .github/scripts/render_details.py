@@ -0,0 +1,134 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+
+from archive_pack import ArchivePack, archive_path, game_dates, read_game_file
+from checkpoints import atomic_write
+
+GAMES_DIR = "games"
+DETAILS_DIR = "games/details"
+MANIFEST_NAME = "manifest.json"
+# Bump when the rendering changes so every fragment is rebuilt
+RENDER_VERSION = 1
+
+DAY_FRAGMENT = re.compile(r'^\d{4}-\d{2}-\d{2}\.html$')
+
+# The markdown the metadata uses, converted the way the site used to in the
+# browser: headings, bold, italics, inline code and hard line breaks
+MARKDOWN_RULES = [
+    (re.compile(r'^# (.*)$', re.MULTILINE), r'<h1>\1</h1>'),
+    (re.compile(r'^## (.*)$', re.MULTILINE), r'<h2>\1</h2>'),
+    (re.compile(r'^### (.*)$', re.MULTILINE), r'<h3>\1</h3>'),
+    (re.compile(r'\*\*(.*?)\*\*'), r'<strong>\1</strong>'),
+    (re.compile(r'\*(.*?)\*'), r'<em>\1</em>'),
+    (re.compile(r'`(.*?)`'), r'<code>\1</code>'),
+    (re.compile(r'\n'), '<br>'),
+]
+
+
+def markdown_to_html(markdown):
+    """HTML for a meta.md file; the text is escaped first, so prompts and code show literally"""
+    text = html.escape(markdown, quote=False)
+    for pattern, replacement in MARKDOWN_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def json_to_html(meta_json):
+    """HTML for a game that only has a meta.json: the data, pretty-printed"""
+    try:
+        pretty = json.dumps(json.loads(meta_json), indent=2)
+    except ValueError:
+        pretty = meta_json
+    return ('<h2>Game Metadata</h2>'
+            '<div style="background: rgba(0,0,0,0.2); padding: 1rem; border-radius: 8px; margin: 1rem 0;">'
+            f'<pre><code>{html.escape(pretty, quote=False)}</code></pre></div>')
+
+
+def render_fragment(game_date, meta_md, meta_json):
+    """The HTML inserted into the metadata panel for one day"""
+    if meta_md is not None:
+        return markdown_to_html(meta_md)
+    if meta_json is not None:
+        return json_to_html(meta_json)
+    return (f'<h2>No Metadata Available</h2><p>Metadata for {game_date} is not available.</p>'
+            '<p>This game may not have associated metadata files.</p>')
+
+
+def source_hash(meta_md, meta_json):
+    """Fingerprint of what a fragment is rendered from; unchanged days are skipped"""
+    payload = json.dumps([RENDER_VERSION, meta_md, meta_json])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_manifest(path):
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'version': RENDER_VERSION, 'days': {}}
+    if manifest.get('version') != RENDER_VERSION:
+        return {'version': RENDER_VERSION, 'days': {}}
+    return manifest
+
+
+def render_details(games_dir=GAMES_DIR, details_dir=DETAILS_DIR, force=False):
+    """Render the fragment of every day whose metadata changed and rebuild the bundles of their months.
+
+    Returns (days rendered, months bundled).
+    """
+    manifest_path = os.path.join(details_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    previous = manifest['days']
+    days = {}
+    changed = {}
+    with ArchivePack(archive_path(games_dir)) as pack:
+        for game_date in game_dates(games_dir, pack=pack):
+            meta_md = read_game_file(games_dir, game_date, 'meta.md', pack)
+            meta_json = None if meta_md is not None else read_game_file(games_dir, game_date, 'meta.json', pack)
+            days[game_date] = source_hash(meta_md, meta_json)
+            fragment_path = os.path.join(details_dir, f"{game_date}.html")
+            if force or previous.get(game_date) != days[game_date] or not os.path.exists(fragment_path):
+                changed[game_date] = render_fragment(game_date, meta_md, meta_json)
+                atomic_write(fragment_path, changed[game_date])
+
+    # A month is rebundled when one of its days changed, appeared or went away
+    months = {game_date[:7] for game_date in changed} | {game_date[:7] for game_date in set(previous) ^ set(days)}
+    for month in sorted(months):
+        bundle = {}
+        for game_date in sorted(day for day in days if day.startswith(month)):
+            if game_date in changed:
+                bundle[game_date] = changed[game_date]
+            else:
+                with open(os.path.join(details_dir, f"{game_date}.html"), 'r') as f:
+                    bundle[game_date] = f.read()
+        bundle_path = os.path.join(details_dir, f"{month}.json")
+        if bundle:
+            atomic_write(bundle_path, json.dumps(bundle, separators=(',', ':')))
+        elif os.path.exists(bundle_path):
+            os.remove(bundle_path)
+
+    # Fragments of days that no longer exist
+    for name in os.listdir(details_dir) if os.path.isdir(details_dir) else []:
+        if DAY_FRAGMENT.match(name) and name[:-len('.html')] not in days:
+            os.remove(os.path.join(details_dir, name))
+
+    manifest['days'] = days
+    atomic_write(manifest_path, json.dumps(manifest, indent=1, sort_keys=True))
+    return len(changed), len(months)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prerender each day's metadata panel into games/details/")
+    parser.add_argument('--force', action='store_true', help="re-render every day, even if its metadata is unchanged")
+    args = parser.parse_args(argv)
+
+    rendered, bundled = render_details(force=args.force)
+    print(f"✅ Rendered {rendered} day(s) and rebuilt {bundled} month bundle(s) in {DETAILS_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import contextvars
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_CACHE_DIR = ".cache/game-responses"
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # Total size before the oldest entries go
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600  # Entries older than this are ignored and removed
+
+# Distinguishes otherwise identical prompts, e.g. the same theme on different
+# dates or the K candidates of one date, so they do not all replay one answer.
+cache_variant = contextvars.ContextVar('cache_variant', default='')
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a prompt has no stored response"""
+
+
+class CachedUsage:
+    def __init__(self, usage):
+        self.input_tokens = usage.get('input_tokens')
+        self.output_tokens = usage.get('output_tokens')
+        self.total_tokens = usage.get('total_tokens')
+
+
+class CachedResponse:
+    """A stored response exposing the same fields the pipeline reads from a live one"""
+
+    cached = True
+
+    def __init__(self, entry):
+        self.output_text = entry['output_text']
+        self.usage = CachedUsage(entry.get('usage') or {})
+
+
+def response_entry(response):
+    """The fields of a response the pipeline reads, as stored JSON (see CachedResponse)"""
+    usage = getattr(response, 'usage', None)
+    return {
+        'output_text': response.output_text,
+        'usage': {
+            name: getattr(usage, name, None)
+            for name in ('input_tokens', 'output_tokens', 'total_tokens')
+        } if usage is not None else None,
+    }
+
+
+class StreamEvent:
+    def __init__(self, type, delta=None, response=None):
+        self.type = type
+        self.delta = delta
+        self.response = response
+
+
+class ReplayStream:
+    """Serve a cached response through the streaming interface"""
+
+    def __init__(self, response):
+        self.response = response
+
+    async def __aiter__(self):
+        yield StreamEvent('response.output_text.delta', delta=self.response.output_text)
+        yield StreamEvent('response.completed', response=self.response)
+
+    async def close(self):
+        pass
+
+
+class RecordingStream:
+    """Pass a live stream through, storing the response once it completes.
+
+    A stream closed before completion (e.g. aborted by the caller) is not stored.
+    """
+
+    def __init__(self, stream, store):
+        self.stream = stream
+        self.store = store
+
+    async def __aiter__(self):
+        async for event in self.stream:
+            if event.type == 'response.completed':
+                self.store(event.response)
+            yield event
+
+    async def close(self):
+        await self.stream.close()
+
+
+class ResponseCache:
+    """On-disk store of model responses keyed by a hash of (model, prompt, variant).
+
+    Entries are single JSON files. Reads refresh an entry's modification time,
+    so eviction by size removes the least recently used entries first.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, model, prompt, variant=''):
+        payload = json.dumps([model, prompt, variant], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, model, prompt, variant=''):
+        """Return the stored response, or None if missing or expired"""
+        path = self.path(self.key(model, prompt, variant))
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+                os.remove(path)
+                self.misses += 1
+                return None
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedResponse(entry)
+
+    def put(self, model, prompt, response, variant=''):
+        """Store a response, then evict entries until the cache fits its limits"""
+        entry = {
+            'model': model,
+            'variant': variant,
+            'created': time.time(),
+            **response_entry(response),
+        }
+        path = self.path(self.key(model, prompt, variant))
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones over max_bytes"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                os.remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+class CachingResponses:
+    def __init__(self, owner):
+        self.owner = owner
+
+    async def create(self, model, input, stream=False, **kwargs):
+        """responses.create that replays stored answers and records new ones"""
+        owner = self.owner
+        prompt = json.dumps(input, ensure_ascii=False, sort_keys=True)
+        variant = cache_variant.get()
+        cached = owner.cache.get(model, prompt, variant)
+        if cached is not None:
+            return ReplayStream(cached) if stream else cached
+        if owner.offline:
+            raise CacheMiss(f"No cached response for this {model} prompt (offline mode)")
+        if stream:
+            live = await owner.client.responses.create(model=model, input=input, stream=True, **kwargs)
+            return RecordingStream(live, lambda response: owner.cache.put(model, prompt, response, variant))
+        response = await owner.client.responses.create(model=model, input=input, **kwargs)
+        owner.cache.put(model, prompt, response, variant)
+        return response
+
+
+class CachingClient:
+    """Wrap an (async) OpenAI client so responses.create goes through a ResponseCache.
+
+    With offline=True the wrapped client is never called and a missing entry
+    raises CacheMiss, which makes runs deterministic.
+    """
+
+    def __init__(self, client, cache, offline=False):
+        self.client = client
+        self.cache = cache
+        self.offline = offline
+        self.responses = CachingResponses(self)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
@@ -0,0 +1,64 @@
+import re
+
+# Every URL rule must start with this prefix so that a single scan can find
+# all candidate positions before the individual rules are tried there.
+URL_TRIGGER = r'https?://'
+
+
+def url_rule(name, pattern, flags=re.IGNORECASE):
+    """Declare a rule that collects re.findall-style matches of a URL pattern"""
+    if not pattern.startswith(URL_TRIGGER):
+        raise ValueError(f"URL rule '{name}' must start with {URL_TRIGGER!r}")
+    return {'name': name, 'kind': 'url', 'pattern': pattern, 'flags': flags}
+
+
+def _findall_item(match):
+    """Return what re.findall would have returned for this match"""
+    group_count = match.re.groups
+    if group_count == 0:
+        return match.group(0)
+    if group_count == 1:
+        return match.group(1) or ''
+    return match.groups(default='')
+
+
+class RuleSet:
+    """A group of URL rules found in one pass over the text.
+
+    scan() searches only for the shared URL trigger and tries every rule at
+    each position it finds, so the text is walked once however many rules
+    there are.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.url_rules = []
+        for rule in self.rules:
+            if rule['kind'] != 'url':
+                raise ValueError(f"Unknown rule kind: {rule['kind']}")
+            self.url_rules.append((rule['name'], re.compile(rule['pattern'], rule['flags'])))
+        self.url_trigger = re.compile(URL_TRIGGER, re.IGNORECASE)
+
+    def scan(self, text, spans=False):
+        """Scan text once and return {rule name: hits}.
+
+        Each rule maps to the same list re.findall(pattern, text, flags)
+        would return, or with spans=True to (start, end, item) tuples
+        locating each match.
+        """
+        url_matches = {name: [] for name, _ in self.url_rules}
+        url_resume = {name: 0 for name, _ in self.url_rules}
+        if not self.url_rules:
+            return url_matches
+        for hit in self.url_trigger.finditer(text):
+            position = hit.start()
+            for name, url_pattern in self.url_rules:
+                # Mirror findall: matches of one rule never overlap
+                if position < url_resume[name]:
+                    continue
+                match = url_pattern.match(text, position)
+                if match:
+                    item = _findall_item(match)
+                    url_matches[name].append((match.start(), match.end(), item) if spans else item)
+                    url_resume[name] = max(match.end(), position + 1)
+        return url_matches
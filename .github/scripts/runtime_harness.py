@@ -0,0 +1,177 @@
+import functools
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+HARNESS_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_harness.js")
+DEFAULT_FRAMES = 120  # Two seconds of animation at 60 fps
+HARNESS_TIMEOUT_SECONDS = 60
+
+# The harness measures script time on a fast machine without rasterizing, so
+# the classroom estimate scales the JS time and adds a cost per draw call.
+FRAME_BUDGET_MS = 1000 / 60
+CHROMEBOOK_CPU_FACTOR = 5
+CHROMEBOOK_DRAW_CALL_MS = 0.0015
+HEAP_GROWTH_WARNING_BYTES = 32 * 1024 * 1024
+
+
+# Environment variables the harness process keeps; secrets such as
+# OPENAI_API_KEY and GITHUB_TOKEN are never passed to model-written code
+HARNESS_ENV_KEYS = ('PATH',)
+
+
+@functools.lru_cache(maxsize=None)
+def permission_flag(node):
+    """The flag enabling node's permission model ('--permission', or the experimental one before node 22), or None"""
+    help_text = subprocess.run([node, '--help'], capture_output=True, text=True).stdout
+    for flag in ('--permission', '--experimental-permission'):
+        if re.search(rf'^\s*{flag}\b', help_text, re.MULTILINE):
+            return flag
+    return None
+
+
+def run_game(code, frames=DEFAULT_FRAMES, timeout=HARNESS_TIMEOUT_SECONDS):
+    """Run a game in the headless harness and return its JSON report.
+
+    The game is model-written code, and the harness's vm context does not
+    isolate it from node, so node itself is confined: its permission model
+    allows reading only the harness and the game, with no writes, child
+    processes or workers. It runs in an empty temporary directory with only
+    PATH in its environment.
+
+    The report has 'available': False (and the reason in 'load_error') when
+    node is not installed, lacks the permission model, or the harness itself
+    could not run.
+    """
+    node = shutil.which("node")
+    if node is None:
+        return {'available': False, 'load_error': "node is not installed"}
+    permission = permission_flag(node)
+    if permission is None:
+        return {'available': False, 'load_error': "node has no permission model to confine the game (node 20 or later is needed)"}
+    env = {key: os.environ[key] for key in HARNESS_ENV_KEYS if key in os.environ}
+
+    # A fixed file name keeps error messages (and so repair prompts) deterministic
+    with tempfile.TemporaryDirectory() as directory:
+        game_path = os.path.join(directory, "game.js")
+        with open(game_path, "w") as f:
+            f.write(code)
+        try:
+            completed = subprocess.run(
+                [node, permission, f"--allow-fs-read={HARNESS_SCRIPT}", f"--allow-fs-read={game_path}",
+                 "--expose-gc", HARNESS_SCRIPT, game_path, str(frames)],
+                capture_output=True, text=True, timeout=timeout, cwd=directory, env=env,
+            )
+        except subprocess.TimeoutExpired:
+            # A game that never yields (e.g. a synchronous infinite loop) is a failure of
+            # the game, not of the harness
+            return {'available': True, 'loaded': False, 'timed_out': True,
+                    'load_error': f"Game did not finish {frames} frames within {timeout}s", 'errors': [], 'error_count': 0}
+
+    try:
+        report = json.loads(completed.stdout)
+    except ValueError:
+        return {'available': False, 'load_error': (completed.stderr or "Harness produced no report").strip()[:500]}
+    report['available'] = True
+    return report
+
+
+def estimate_chromebook_frame_ms(report):
+    """Estimated mean frame time on a classroom Chromebook"""
+    return (report['frame_ms']['mean'] * CHROMEBOOK_CPU_FACTOR
+            + report['draw_calls']['per_frame_mean'] * CHROMEBOOK_DRAW_CALL_MS)
+
+
+def validate_runtime(game_code, game_name, frames=DEFAULT_FRAMES):
+    """Validate a game by running it headlessly for a fixed number of frames"""
+    runtime_issues = []
+    runtime_warnings = []
+    runtime_score = 0
+    max_score = 5
+
+    print(f"\n🔍 Running {game_name} in the headless harness ({frames} frames)...")
+    report = run_game(game_code, frames)
+
+    if not report['available']:
+        print(f"⚠️  Runtime validation skipped: {report['load_error']}")
+        return {
+            'score': 0,
+            'max_score': 0,
+            'percentage': 0.0,
+            'issues': [],
+            'warnings': [f"Runtime harness unavailable: {report['load_error']}"],
+            'passing': True,  # Do not fail games because the harness could not run
+            'available': False,
+            'metrics': None,
+        }
+
+    if report['loaded']:
+        runtime_score += 2
+        print("✅ Game loaded without exceptions")
+    else:
+        runtime_issues.append(f"Game threw while loading: {report['load_error']}")
+        print(f"❌ Game threw while loading: {report['load_error']}")
+
+    if report['loaded'] and report['error_count'] == 0:
+        runtime_score += 1
+        print("✅ No exceptions while running")
+    elif report['error_count']:
+        runtime_issues.append(f"{report['error_count']} exception(s) while running, first: {report['errors'][0]}")
+        print(f"❌ {report['error_count']} exception(s) while running")
+
+    metrics = None
+    if not report.get('timed_out'):
+        metrics = {
+            'frames_run': report['frames_run'],
+            'frame_ms_mean': report['frame_ms']['mean'],
+            'frame_ms_p95': report['frame_ms']['p95'],
+            'frame_ms_max': report['frame_ms']['max'],
+            'estimated_chromebook_frame_ms': round(estimate_chromebook_frame_ms(report), 3),
+            'draw_calls_per_frame': report['draw_calls']['per_frame_mean'],
+            'draw_calls_max': report['draw_calls']['max'],
+            'listeners': report['listeners']['count'],
+            'audio_contexts': report['audio_contexts'],
+            'heap_growth_bytes': report['heap']['growth_bytes'],
+            'console_errors': report['console_errors'],
+        }
+
+        if report['draw_calls']['total'] and report['animating']:
+            runtime_score += 1
+            print(f"✅ Renders and keeps animating ({metrics['draw_calls_per_frame']:.0f} draw calls per frame)")
+        elif report['loaded']:
+            runtime_issues.append("Game does not draw to the canvas or stops animating")
+            print("❌ Game does not draw to the canvas or stops animating")
+
+        if report['loaded'] and metrics['estimated_chromebook_frame_ms'] <= FRAME_BUDGET_MS:
+            runtime_score += 1
+            print(f"✅ Estimated Chromebook frame time {metrics['estimated_chromebook_frame_ms']:.1f} ms fits the {FRAME_BUDGET_MS:.1f} ms budget")
+        elif report['loaded']:
+            runtime_warnings.append(
+                f"Too slow for classroom Chromebooks: estimated {metrics['estimated_chromebook_frame_ms']:.1f} ms per frame "
+                f"(budget {FRAME_BUDGET_MS:.1f} ms)")
+            print(f"⚠️  Estimated Chromebook frame time {metrics['estimated_chromebook_frame_ms']:.1f} ms exceeds the budget")
+
+        if metrics['heap_growth_bytes'] > HEAP_GROWTH_WARNING_BYTES:
+            runtime_warnings.append(f"Heap grew by {metrics['heap_growth_bytes'] // (1024 * 1024)} MB over {report['frames_run']} frames")
+            print("⚠️  Large heap growth while running")
+        if not report['listeners']['count']:
+            runtime_warnings.append("No input listeners were registered")
+            print("⚠️  No input listeners were registered")
+
+    runtime_percentage = (runtime_score / max_score) * 100
+    print(f"🔍 Runtime Score: {runtime_score}/{max_score} ({runtime_percentage:.1f}%)")
+
+    return {
+        'score': runtime_score,
+        'max_score': max_score,
+        'percentage': runtime_percentage,
+        'issues': runtime_issues,
+        'warnings': runtime_warnings,
+        # Exceptions fail a game regardless of the other points
+        'passing': runtime_percentage >= 60 and report['loaded'] and report['error_count'] == 0,
+        'available': True,
+        'metrics': metrics,
+    }
@@ -0,0 +1,224 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import struct
+from datetime import date, timedelta
+
+from archive_pack import iter_game_files
+from js_format import JSSyntaxError, tokenize
+
+GAMES_DIR = "games"
+SIMILARITY_FILE = "games/similarity.json"
+# Bump when tokenization, shingling or hashing changes so the index is rebuilt
+SIMILARITY_VERSION = 1
+
+SHINGLE_SIZE = 8  # Tokens per shingle
+NUM_HASHES = 128
+BANDS = 16  # NUM_HASHES / BANDS rows per band; candidates start showing up around 0.7 similarity
+ROWS = NUM_HASHES // BANDS
+DEFAULT_THRESHOLD = 0.8
+RECENT_DAYS = 60  # A match older than this is a theme coming round again, not a repeat
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures stored in the index must stay comparable between runs
+_random = random.Random(20250706)
+_PERMUTATIONS = [(_random.randrange(1, _MERSENNE_PRIME), _random.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_HASHES)]
+
+
+def normalized_tokens(code):
+    """The code's tokens without comments, with literal values collapsed.
+
+    Names and punctuation are kept as written; numbers, strings and templates
+    become placeholders so retuned constants or reworded text do not hide a
+    copied game. Falls back to a plain word split if the code does not lex.
+    """
+    try:
+        tokens = tokenize(code)
+    except JSSyntaxError:
+        return re.findall(r'[\w$]+|[^\s\w$]', code)
+    placeholders = {'number': '0', 'string': '""', 'template': '``', 'regex': '//'}
+    return [placeholders.get(token.kind, token.text) for token in tokens if token.kind != 'comment']
+
+
+def shingles(code, size=SHINGLE_SIZE):
+    """The set of 64-bit hashes of every run of `size` consecutive tokens"""
+    tokens = normalized_tokens(code)
+    if len(tokens) < size:
+        tokens = tokens + [''] * (size - len(tokens))
+    return {
+        int.from_bytes(hashlib.blake2b('\x00'.join(tokens[index:index + size]).encode('utf-8'), digest_size=8).digest(), 'little')
+        for index in range(len(tokens) - size + 1)
+    }
+
+
+def minhash(code):
+    """MinHash signature of the game as a tuple of NUM_HASHES 32-bit values"""
+    values = shingles(code)
+    return tuple(
+        min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in values)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(signature, other):
+    """Estimated Jaccard similarity of the two games' shingle sets"""
+    return sum(x == y for x, y in zip(signature, other)) / NUM_HASHES
+
+
+def _band_keys(signature):
+    return [(band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+def _encode(signature):
+    return base64.b64encode(struct.pack(f'<{NUM_HASHES}I', *signature)).decode('ascii')
+
+
+def _decode(text):
+    return struct.unpack(f'<{NUM_HASHES}I', base64.b64decode(text))
+
+
+class SimilarityIndex:
+    """MinHash signatures of the archive with locality-sensitive hashing buckets.
+
+    A lookup only compares against games sharing at least one band of the
+    signature, so its cost follows the number of near matches rather than
+    the size of the archive.
+    """
+
+    def __init__(self):
+        self.signatures = {}
+        self.buckets = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def add(self, game_date, signature):
+        self.remove(game_date)
+        self.signatures[game_date] = signature
+        for key in _band_keys(signature):
+            self.buckets.setdefault(key, set()).add(game_date)
+
+    def remove(self, game_date):
+        signature = self.signatures.pop(game_date, None)
+        if signature is None:
+            return
+        for key in _band_keys(signature):
+            bucket = self.buckets[key]
+            bucket.discard(game_date)
+            if not bucket:
+                del self.buckets[key]
+
+    def query(self, signature, threshold=DEFAULT_THRESHOLD):
+        """[(date, estimated similarity)] of indexed games at or above threshold, most similar first"""
+        candidates = set()
+        for key in _band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        matches = [(game_date, estimate_similarity(signature, self.signatures[game_date])) for game_date in candidates]
+        return sorted((match for match in matches if match[1] >= threshold), key=lambda match: (-match[1], match[0]))
+
+    def find_recent_duplicates(self, signature, game_date, threshold=DEFAULT_THRESHOLD, recent_days=RECENT_DAYS):
+        """Matches from the `recent_days` before game_date, excluding game_date itself"""
+        earliest = (date.fromisoformat(game_date) - timedelta(days=recent_days)).isoformat()
+        return [match for match in self.query(signature, threshold) if earliest <= match[0] < game_date]
+
+    def duplicate_pairs(self, threshold=DEFAULT_THRESHOLD):
+        """Every pair of indexed games at or above threshold, found through the buckets"""
+        pairs = {}
+        for bucket in self.buckets.values():
+            members = sorted(bucket)
+            for position, first in enumerate(members):
+                for second in members[position + 1:]:
+                    if (first, second) not in pairs:
+                        pairs[(first, second)] = estimate_similarity(self.signatures[first], self.signatures[second])
+        return sorted(((first, second, similarity) for (first, second), similarity in pairs.items() if similarity >= threshold),
+                      key=lambda pair: (-pair[2], pair[0], pair[1]))
+
+    @classmethod
+    def load(cls, path=SIMILARITY_FILE):
+        """The saved index, or an empty one if missing or from another version"""
+        index = cls()
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+        if data.get('version') != SIMILARITY_VERSION:
+            return index
+        for game_date, encoded in data['signatures'].items():
+            index.add(game_date, _decode(encoded))
+        return index
+
+    def save(self, path=SIMILARITY_FILE):
+        # Only the signatures are stored; the buckets are rebuilt on load
+        body = ',\n'.join(f'{json.dumps(game_date)}:"{_encode(self.signatures[game_date])}"'
+                          for game_date in sorted(self.signatures))
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(f'{{"version":{SIMILARITY_VERSION},"shingle_size":{SHINGLE_SIZE},"hashes":{NUM_HASHES},'
+                    f'"bands":{BANDS},"signatures":{{\n{body}\n}}}}\n')
+        os.replace(temp_path, path)
+
+
+def update_similarity_index(games, path=SIMILARITY_FILE):
+    """Add or replace the signatures of {date: code} in the saved index"""
+    index = SimilarityIndex.load(path)
+    for game_date, code in games.items():
+        index.add(game_date, minhash(code))
+    index.save(path)
+    return index
+
+
+def rebuild(games_dir=GAMES_DIR, path=SIMILARITY_FILE):
+    """Rebuild the index from every dated game in the directory and its pack"""
+    index = SimilarityIndex()
+    for game_date, code in iter_game_files(games_dir):
+        index.add(game_date, minhash(code))
+    index.save(path)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain games/similarity.json and look for near-duplicate games")
+    parser.add_argument('dates', nargs='*', metavar='YYYY-MM-DD', help="Games to add or refresh")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the index from the games directory")
+    parser.add_argument('--query', metavar='FILE', help="List indexed games similar to a JavaScript file")
+    parser.add_argument('--report', action='store_true', help="List every pair of near-duplicate games")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"estimated similarity counted as a near duplicate (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        index = rebuild()
+        print(f"✅ Rebuilt {SIMILARITY_FILE} with {len(index)} games")
+    elif args.dates:
+        games = {}
+        for game_date in args.dates:
+            with open(os.path.join(GAMES_DIR, f"{game_date}.js"), 'r') as f:
+                games[game_date] = f.read()
+        index = update_similarity_index(games)
+        print(f"✅ Updated {len(games)} game(s), index now holds {len(index)} games")
+    else:
+        index = SimilarityIndex.load()
+    if not (args.rebuild or args.dates or args.query or args.report):
+        parser.error("give the dates to update, --rebuild, --query or --report")
+
+    if args.query:
+        with open(args.query, 'r') as f:
+            matches = index.query(minhash(f.read()), args.threshold)
+        print(f"🔍 {len(matches)} game(s) at or above {args.threshold:.0%} similarity to {args.query}")
+        for game_date, similarity in matches:
+            print(f"  {game_date}  {similarity:.0%}")
+    if args.report:
+        pairs = index.duplicate_pairs(args.threshold)
+        print(f"🔍 {len(pairs)} pair(s) of games at or above {args.threshold:.0%} similarity")
+        for first, second, similarity in pairs:
+            print(f"  {first}  {second}  {similarity:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import time
+
+# Stages whose fixes are mechanical edits to known lines, so a cheaper model
+# can make them. A repair the cheap model does not resolve is escalated.
+MECHANICAL_STAGES = {'dependency_fix', 'performance_fix'}
+# What each repair is meant to fix, judged from the re-validated candidate
+REPAIR_RESOLVED = {
+    'dependency_fix': lambda candidate: not candidate['dependencies']['has_external_deps'],
+    'performance_fix': lambda candidate: candidate['performance']['passing'],
+    'functionality_fix': lambda candidate: candidate['functionality']['passing'] and candidate['runtime']['passing'],
+}
+# The improvement sends the whole game and gets the whole game back, so it
+# costs about twice the tokens of the initial generation and about as long
+IMPROVE_TOKEN_FACTOR = 2.0
+IMPROVE_SECONDS_FACTOR = 1.0
+
+SCHEDULE_POLICIES = {
+    # Every stage runs on the standard model, as before the scheduler
+    'full': {'cheap_repairs': False, 'skip_perfect_improve': False, 'escalate_after': None},
+    # Mechanical repairs start on the cheap model; after `escalate_after`
+    # unresolved cheap repairs of a stage the rest of the run uses the
+    # standard model for it. The improvement is skipped only over budget.
+    'adaptive': {'cheap_repairs': True, 'skip_perfect_improve': False, 'escalate_after': 2},
+    # Also skips the improvement of games that already pass every validator
+    # with full marks and no performance warnings
+    'economy': {'cheap_repairs': True, 'skip_perfect_improve': True, 'escalate_after': 2},
+}
+DEFAULT_POLICY = 'adaptive'
+
+
+def _tokens(response):
+    usage = getattr(response, 'usage', None)
+    return getattr(usage, 'total_tokens', None)
+
+
+def is_perfect(candidate):
+    """Whether validation leaves nothing for the improvement pass to fix"""
+    return (
+        not candidate['dependencies']['has_external_deps']
+        and candidate['functionality']['percentage'] >= 100
+        and candidate['runtime']['available'] and candidate['runtime']['percentage'] >= 100
+        and candidate['performance']['passing'] and candidate['performance']['warning_count'] == 0
+    )
+
+
+class StageScheduler:
+    """Decide per stage whether a model call runs, and on which model.
+
+    One scheduler is shared by every candidate of a run, so the token and
+    time budgets and the escalation counts are run-wide. Each decision is
+    appended to the candidate's own list (kept in its checkpoints and
+    metadata) as {'stage', 'action', 'model', 'reason'}, plus the tokens
+    and seconds of calls that ran and estimates for calls that were skipped.
+    """
+
+    def __init__(self, models, policy=DEFAULT_POLICY, token_budget=None, seconds_budget=None):
+        self.models = models  # {'cheap': ..., 'standard': ...}
+        self.policy_name = policy
+        self.policy = SCHEDULE_POLICIES[policy]
+        self.token_budget = token_budget
+        self.seconds_budget = seconds_budget
+        self.started = time.perf_counter()
+        self.tokens_used = 0
+        self.cheap_failures = {}
+        self.skipped = 0
+        self.tokens_saved = 0
+        self.seconds_saved = 0.0
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def over_budget(self, tokens=0, seconds=0):
+        """Why a call expected to cost `tokens` and `seconds` does not fit the budget, or None"""
+        if self.token_budget is not None and self.tokens_used + tokens > self.token_budget:
+            return f"token budget: {self.tokens_used} used + {tokens:.0f} needed > {self.token_budget}"
+        if self.seconds_budget is not None and self.elapsed() + seconds > self.seconds_budget:
+            return f"time budget: {self.elapsed():.0f}s elapsed + {seconds:.0f}s needed > {self.seconds_budget}s"
+        return None
+
+    def decide(self, decisions, stage, action, reason, tier='standard', **details):
+        decision = {'stage': stage, 'action': action, 'model': self.models[tier] if action == 'run' else None,
+                    'tier': tier if action == 'run' else None, 'reason': reason, **details}
+        decisions.append(decision)
+        if action == 'skip':
+            self.skipped += 1
+            self.tokens_saved += details.get('estimated_tokens') or 0
+            self.seconds_saved += details.get('estimated_seconds') or 0.0
+        return decision
+
+    def plan_stage(self, decisions, stage, reason="required"):
+        """A stage that always runs on the standard model (initial generation, redrafts)"""
+        return self.decide(decisions, stage, 'run', reason)
+
+    def plan_repair(self, decisions, stage, name=None):
+        """Run a repair, on the cheap model if it is mechanical and still trusted to it"""
+        escalate_after = self.policy['escalate_after']
+        name = name or stage
+        if not self.policy['cheap_repairs'] or stage not in MECHANICAL_STAGES:
+            return self.decide(decisions, name, 'run', "needs the standard model")
+        if escalate_after is not None and self.cheap_failures.get(stage, 0) >= escalate_after:
+            return self.decide(decisions, name, 'run',
+                               f"escalated: the cheap model left {self.cheap_failures[stage]} {stage} repairs unresolved this run")
+        return self.decide(decisions, name, 'run', "mechanical repair", tier='cheap')
+
+    def plan_followup(self, decisions, stage):
+        """Chain a repair onto the winning candidate for a problem it still has, unless over budget"""
+        budget = self.over_budget()
+        if budget:
+            return self.decide(decisions, f"{stage}_followup", 'skip', f"over the {budget}")
+        return self.plan_repair(decisions, stage, name=f"{stage}_followup")
+
+    def plan_escalation(self, decisions, stage, candidate):
+        """After a repair ran on the cheap model: retry it on the standard model if it did not resolve its problem.
+
+        `candidate` is the re-validated result, or None if the repair failed
+        outright. Returns the escalation decision, or None when none is needed.
+        """
+        if candidate is not None and REPAIR_RESOLVED[stage](candidate):
+            return None
+        self.cheap_failures[stage] = self.cheap_failures.get(stage, 0) + 1
+        budget = self.over_budget()
+        if budget:
+            return self.decide(decisions, f"{stage}_escalated", 'skip', f"over the {budget}")
+        return self.decide(decisions, f"{stage}_escalated", 'run', "the cheap model did not resolve it")
+
+    def plan_improve(self, decisions, candidate):
+        """Run the visuals and audio improvement unless the game is already perfect (economy) or it would break the budget"""
+        initial = next((decision for decision in decisions if decision['stage'] == 'initial' and 'tokens' in decision), None)
+        estimate = {}
+        if initial and initial['tokens']:
+            estimate['estimated_tokens'] = round(initial['tokens'] * IMPROVE_TOKEN_FACTOR)
+        if initial and not initial.get('cached'):
+            estimate['estimated_seconds'] = round(initial['seconds'] * IMPROVE_SECONDS_FACTOR, 3)
+        if self.policy['skip_perfect_improve'] and is_perfect(candidate):
+            return self.decide(decisions, 'improve', 'skip', "the repaired game passes every validator with full marks", **estimate)
+        budget = self.over_budget(estimate.get('estimated_tokens', 0), estimate.get('estimated_seconds', 0))
+        if budget:
+            return self.decide(decisions, 'improve', 'skip', f"over the {budget}", **estimate)
+        return self.decide(decisions, 'improve', 'run', "optional stage within budget")
+
+    async def track(self, decision, awaitable):
+        """Await a stage's call, recording its tokens and seconds in `decision` and against the budget.
+
+        Stage functions return a tuple with the model response second.
+        """
+        started = time.perf_counter()
+        try:
+            result = await awaitable
+        except BaseException as e:
+            decision['error'] = repr(e)[:200]
+            raise
+        finally:
+            decision['seconds'] = round(time.perf_counter() - started, 3)
+        response = result[1]
+        decision['tokens'] = _tokens(response)
+        if getattr(response, 'cached', False):
+            decision['cached'] = True
+        else:
+            self.tokens_used += decision['tokens'] or 0
+        return result
+
+    def summary(self, decisions):
+        """The metadata recorded for one game's decisions"""
+        ran = [decision for decision in decisions if decision['action'] == 'run']
+        skipped = [decision for decision in decisions if decision['action'] == 'skip']
+        return {
+            'policy': self.policy_name,
+            'token_budget': self.token_budget,
+            'seconds_budget': self.seconds_budget,
+            'model_calls': len(ran),
+            'cheap_calls': sum(decision['tier'] == 'cheap' for decision in ran),
+            'skipped_calls': len(skipped),
+            'estimated_tokens_saved': sum(decision.get('estimated_tokens') or 0 for decision in skipped),
+            'estimated_seconds_saved': round(sum(decision.get('estimated_seconds') or 0 for decision in skipped), 3),
+            'decisions': decisions,
+        }
+
+    def report(self):
+        """One line on what the scheduler did over the whole run"""
+        budget = f" of {self.token_budget}" if self.token_budget is not None else ""
+        return (f"🗓️  Scheduler ({self.policy_name}): {self.tokens_used} tokens used{budget}, {self.skipped} model calls skipped "
+                f"(about {self.tokens_saved} tokens and {self.seconds_saved:.0f}s saved), "
+                f"cheap repairs escalated {sum(self.cheap_failures.values())} times")
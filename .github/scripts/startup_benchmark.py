@@ -0,0 +1,84 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+CLI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+DEFAULT_RUNS = 10
+
+# Commands timed from process start to exit, with the budget for the imports
+# each needs before doing any work. Validation runs in CI and pre-commit hooks
+# on every change, so it gets tens of milliseconds. No command may load the
+# OpenAI SDK just to start; generate imports it when it creates the client.
+COMMANDS = {
+    'verify': (['verify'], 80),
+    'validate': (['validate'], 100),
+    'audit --help': (['audit', '--help'], 100),
+    'generate --help': (['generate', '--help'], 300),
+}
+# Modules a validation-only invocation must never import
+HEAVY_MODULES = ('openai', 'httpx', 'pydantic')
+
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def time_command(arguments, runs):
+    """Wall-clock milliseconds of `runs` fresh interpreter runs of the CLI"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, CLI_SCRIPT, *arguments], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def imported_modules(arguments):
+    """[(cumulative microseconds, module)] of the top-level imports of one run, slowest first"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', CLI_SCRIPT, *arguments],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match and not match.group(3):
+            modules.append((int(match.group(2)), match.group(4)))
+    return sorted(modules, reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure how fast each command of cli.py starts")
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help=f"runs per command (default: {DEFAULT_RUNS})")
+    parser.add_argument('--top', type=int, default=5, help="slowest top-level imports listed per command (default: 5)")
+    args = parser.parse_args(argv)
+
+    interpreter = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'])
+        interpreter.append((time.perf_counter() - started) * 1000)
+    print(f"⏱️  Bare interpreter: {statistics.median(interpreter):.0f} ms median over {args.runs} runs")
+
+    over_budget = 0
+    for name, (arguments, budget_ms) in COMMANDS.items():
+        timings = time_command(arguments, args.runs)
+        median = statistics.median(timings)
+        modules = imported_modules(arguments)
+        import_ms = sum(microseconds for microseconds, _ in modules) / 1000
+        heavy = sorted({module for _, module in modules if module.split('.')[0] in HEAVY_MODULES})
+        failed = import_ms > budget_ms or bool(heavy)
+        over_budget += failed
+        print(f"{'❌' if failed else '✅'} {name}: {median:.0f} ms median, {min(timings):.0f} ms best; "
+              f"imports {import_ms:.0f} ms (budget {budget_ms} ms){', loads ' + ', '.join(heavy) if heavy else ''}")
+        for microseconds, module in modules[:args.top]:
+            print(f"      {microseconds / 1000:6.1f} ms  {module}")
+
+    if over_budget:
+        print(f"\n❌ {over_budget} command(s) over their startup budget")
+        sys.exit(1)
+    print("\n✅ Every command starts within its budget")
+
+
+if __name__ == "__main__":
+    main()
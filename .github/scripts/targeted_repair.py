@@ -0,0 +1,130 @@
+import json
+import re
+
+CONTEXT_LINES = 2  # Lines of context kept around each offending span
+MAX_REGION_SHARE = 0.5  # Above this share of the game, a full repair is cheaper to get right
+MAX_OUTLINE_ENTRIES = 80
+
+# Declarations listed in the outline so the model knows what the regions can call
+OUTLINE_DECLARATION = re.compile(r'''
+    ^\s*(?:
+        (?:async\s+)?function\s*\*?\s*[\w$]+\s*\([^)]*\)
+      | class\s+[\w$]+(?:\s+extends\s+[\w$.]+)?
+      | (?:const|let|var)\s+[\w$]+\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[\w$]+\s*=>|class\b|\{|\[|new\s+[\w$.]+)
+    )
+''', re.VERBOSE)
+
+
+class PatchError(ValueError):
+    """Raised when a model's patch cannot be applied to the regions it was given"""
+
+
+def _line_starts(code):
+    starts = [0]
+    for match in re.finditer(r'\n', code):
+        starts.append(match.end())
+    return starts
+
+
+def build_regions(code, spans, context_lines=CONTEXT_LINES):
+    """Expand character spans to whole lines plus context and merge overlapping ones.
+
+    Returns a list of {'id', 'start_line', 'end_line', 'start', 'end', 'text'}
+    with 1-based inclusive line numbers and character offsets into `code`.
+    """
+    line_starts = _line_starts(code)
+    line_count = len(line_starts)
+
+    def line_of(offset):
+        # Index of the last line start at or before offset
+        low, high = 0, line_count - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if line_starts[middle] <= offset:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    ranges = []
+    for span in sorted(spans, key=lambda span: span['start']):
+        first = max(0, line_of(span['start']) - context_lines)
+        last = min(line_count - 1, line_of(max(span['start'], span['end'] - 1)) + context_lines)
+        if ranges and first <= ranges[-1][1] + 1:
+            ranges[-1][1] = max(ranges[-1][1], last)
+        else:
+            ranges.append([first, last])
+
+    regions = []
+    for number, (first, last) in enumerate(ranges, start=1):
+        start = line_starts[first]
+        end = line_starts[last + 1] if last + 1 < line_count else len(code)
+        regions.append({
+            'id': number,
+            'start_line': first + 1,
+            'end_line': last + 1,
+            'start': start,
+            'end': end,
+            'text': code[start:end],
+        })
+    return regions
+
+
+def region_share(code, regions):
+    """Fraction of the game's characters covered by the regions"""
+    return sum(region['end'] - region['start'] for region in regions) / max(1, len(code))
+
+
+def build_outline(code, max_entries=MAX_OUTLINE_ENTRIES):
+    """One line per top-level-looking declaration, e.g. 'L42: function drawPlayer(x, y)'"""
+    entries = []
+    for number, line in enumerate(code.splitlines(), start=1):
+        match = OUTLINE_DECLARATION.match(line)
+        if match:
+            entries.append(f"L{number}: {match.group(0).strip()}")
+            if len(entries) == max_entries:
+                entries.append("...")
+                break
+    return '\n'.join(entries)
+
+
+def format_regions(regions):
+    """The regions as delimited blocks for a prompt"""
+    return '\n'.join(
+        f"<<<REGION {region['id']} (lines {region['start_line']}-{region['end_line']})\n"
+        f"{region['text'].rstrip(chr(10))}\n>>>"
+        for region in regions
+    )
+
+
+def parse_patch(text):
+    """Parse a model reply of the form [{"region": 1, "replacement": "..."}, ...]"""
+    cleaned = text.strip()
+    if cleaned.startswith('```'):
+        cleaned = re.sub(r'^```[\w-]*\n?|\n?```$', '', cleaned).strip()
+    try:
+        patch = json.loads(cleaned)
+    except ValueError as e:
+        raise PatchError(f"Patch is not valid JSON: {e}") from None
+    if not isinstance(patch, list):
+        raise PatchError("Patch must be a JSON array")
+    replacements = {}
+    for item in patch:
+        if not (isinstance(item, dict) and isinstance(item.get('region'), int) and isinstance(item.get('replacement'), str)):
+            raise PatchError(f"Malformed patch entry: {str(item)[:200]}")
+        replacements[item['region']] = item['replacement']
+    return replacements
+
+
+def apply_patch(code, regions, replacements):
+    """Replace every region with its replacement; all regions must be covered"""
+    expected = {region['id'] for region in regions}
+    if set(replacements) != expected:
+        raise PatchError(f"Patch covers regions {sorted(replacements)}, expected {sorted(expected)}")
+    # From the end so earlier offsets stay valid
+    for region in sorted(regions, key=lambda region: region['start'], reverse=True):
+        replacement = replacements[region['id']]
+        if region['text'].endswith('\n') and not replacement.endswith('\n'):
+            replacement += '\n'
+        code = code[:region['start']] + replacement + code[region['end']:]
+    return code
@@ -1,6 +1,79 @@
 import os
+import io
 import json
-import glob
+import hashlib
+import argparse
+import contextlib
+
+from archive_pack import ArchiveError, ArchivePack, archive_path, game_dates, read_game_file
+from js_analyzer import ANALYZER_VERSION, TIMER_FUNCTIONS, analyze
+
+INPUT_EVENTS = {
+    'keydown', 'keyup', 'keypress', 'click', 'dblclick', 'mousedown', 'mouseup', 'mousemove',
+    'touchstart', 'touchend', 'touchmove', 'pointerdown', 'pointerup', 'pointermove', 'wheel',
+}
+STATE_WORDS = ('score', 'lives', 'level', 'gamestate', 'player', 'enemy')
+
+def has_input_handling(analysis):
+    """An input event registered with addEventListener or assigned to an on<event> property"""
+    types = {listener['type'].lower() for listener in analysis.listeners}
+    types |= {name[2:] for name in analysis.handler_properties}
+    return bool(types & INPUT_EVENTS)
+
+def has_error_handling(analysis):
+    return bool(analysis.try_statements or analysis.called('catch', 'console.error', 'console.warn')
+                or 'onerror' in analysis.handler_properties
+                or any(listener['type'] == 'error' for listener in analysis.listeners))
+
+# Declarative functionality checks: each one awards its points when its test
+# holds for the game's static analysis (comments and strings never count).
+FUNCTIONALITY_CHECKS = [
+    {
+        'name': 'initialization',
+        'test': lambda analysis: analysis.called('getContext') or bool(analysis.animation_loops or analysis.listeners),
+        'points': 2,
+        'severity': 'issue',
+        'found': "Game initialization detected",
+        'missing': "No game initialization found",
+        'missing_log': "No game initialization found",
+    },
+    {
+        'name': 'input',
+        'test': has_input_handling,
+        'points': 2,
+        'severity': 'issue',
+        'found': "User input handling detected",
+        'missing': "No user input handling found",
+        'missing_log': "No user input handling found",
+    },
+    {
+        'name': 'loop',
+        'test': lambda analysis: analysis.called('requestAnimationFrame', *TIMER_FUNCTIONS),
+        'points': 2,
+        'severity': 'issue',
+        'found': "Game loop/animation detected",
+        'missing': "No game loop/animation found",
+        'missing_log': "No game loop/animation found",
+    },
+    {
+        'name': 'error_handling',
+        'test': has_error_handling,
+        'points': 1,
+        'severity': 'warning',
+        'found': "Error handling detected",
+        'missing': "No error handling found",
+        'missing_log': "No error handling detected",
+    },
+    {
+        'name': 'state',
+        'test': lambda analysis: any(word in name.lower() for name in analysis.names for word in STATE_WORDS),
+        'points': 1,
+        'severity': 'warning',
+        'found': "Game state management detected",
+        'missing': "No game state management found",
+        'missing_log': "No game state management detected",
+    },
+]
 
 def validate_accessibility(game_code, game_name):
     """Validate the generated game code for basic functionality and playability"""
@@ -11,55 +84,29 @@ def validate_accessibility(game_code, game_name):
     
     print(f"\n🔍 Validating basic functionality for {game_name}...")
     
-    # 1. Game Initialization (2 points)
-    init_patterns = ['canvas', 'getContext', 'requestAnimationFrame', 'addEventListener']
-    init_found = any(pattern in game_code.lower() for pattern in init_patterns)
-    if init_found:
-        functionality_score += 2
-        print(f"✅ Game initialization detected")
-    else:
-        functionality_issues.append("No game initialization found")
-        print(f"❌ No game initialization found")
-    
-    # 2. User Input Handling (2 points)
-    input_patterns = ['keydown', 'keyup', 'keypress', 'click', 'mousedown', 'mouseup', 'touchstart']
-    input_found = any(pattern in game_code.lower() for pattern in input_patterns)
-    if input_found:
-        functionality_score += 2
-        print(f"✅ User input handling detected")
-    else:
-        functionality_issues.append("No user input handling found")
-        print(f"❌ No user input handling found")
-    
-    # 3. Game Loop/Animation (2 points)
-    loop_patterns = ['requestAnimationFrame', 'setInterval', 'setTimeout', 'update', 'draw']
-    loop_found = any(pattern in game_code.lower() for pattern in loop_patterns)
-    if loop_found:
-        functionality_score += 2
-        print(f"✅ Game loop/animation detected")
-    else:
-        functionality_issues.append("No game loop/animation found")
-        print(f"❌ No game loop/animation found")
-    
-    # 4. Error Handling (1 point)
-    error_patterns = ['try', 'catch', 'console.error', 'console.warn', 'if.*error']
-    error_handling = any(pattern in game_code.lower() for pattern in error_patterns)
-    if error_handling:
-        functionality_score += 1
-        print(f"✅ Error handling detected")
-    else:
-        functionality_warnings.append("No error handling found")
-        print(f"⚠️  No error handling detected")
-    
-    # 5. Game State Management (1 point)
-    state_patterns = ['score', 'lives', 'level', 'gameState', 'player', 'enemy', 'object']
-    state_found = any(pattern in game_code.lower() for pattern in state_patterns)
-    if state_found:
-        functionality_score += 1
-        print(f"✅ Game state management detected")
-    else:
-        functionality_warnings.append("No game state management found")
-        print(f"⚠️  No game state management detected")
+    # One parse of the source answers every check
+    analysis = analyze(game_code)
+    if analysis.parse_error:
+        functionality_issues.append(f"Game source could not be parsed: {analysis.parse_error}")
+        print(f"❌ Game source could not be parsed: {analysis.parse_error}")
+    
+    for check in FUNCTIONALITY_CHECKS:
+        if check['test'](analysis):
+            functionality_score += check['points']
+            print(f"✅ {check['found']}")
+        elif check['severity'] == 'issue':
+            functionality_issues.append(check['missing'])
+            print(f"❌ {check['missing_log']}")
+        else:
+            functionality_warnings.append(check['missing'])
+            print(f"⚠️  {check['missing_log']}")
+    
+    # Not scored: allocations every frame cost time in garbage collection on slow devices
+    if analysis.frame_allocations:
+        first = analysis.frame_allocations[0]
+        functionality_warnings.append(f"{len(analysis.frame_allocations)} allocations inside the frame loop "
+                                      f"(first: {first['kind']} in {first['function']} at line {first['line']})")
+        print(f"⚠️  {functionality_warnings[-1]}")
     
     # Calculate percentage
     functionality_percentage = (functionality_score / max_score) * 100
@@ -75,41 +122,131 @@ def validate_accessibility(game_code, game_name):
         'passing': functionality_percentage >= 60  # 60% threshold for basic functionality
     }
 
-def test_all_games():
-    """Test basic functionality for all existing games"""
+# Results of earlier audits, keyed by the SHA-256 of each game's source, so
+# historical games are only re-validated when they (or the checks) change.
+AUDIT_CACHE_FILE = "games/.audit-cache.json"
+AUDIT_CACHE_VERSION = 2
+
+GAMES_DIR = "games"
+
+def audit_fingerprint():
+    """Identify the current set of checks so stale cached results are discarded"""
+    description = json.dumps({
+        'version': AUDIT_CACHE_VERSION,
+        'analyzer': ANALYZER_VERSION,
+        'checks': [{key: value for key, value in check.items() if key != 'test'} for check in FUNCTIONALITY_CHECKS],
+    }, sort_keys=True)
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+def load_audit_cache(cache_file):
+    """Load cached audit entries, or an empty cache if missing, corrupt or stale"""
+    try:
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('fingerprint') != audit_fingerprint():
+        return {}
+    return cache.get('entries', {})
+
+def save_audit_cache(cache_file, entries):
+    """Write the audit cache atomically so an interrupted run cannot corrupt it"""
+    temp_file = f"{cache_file}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump({'fingerprint': audit_fingerprint(), 'entries': entries}, f, indent=1, sort_keys=True)
+    os.replace(temp_file, cache_file)
+
+def validate_game_source(game_name, game_code):
+    """Validate one game, capturing its report so it can be replayed in order"""
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            result = validate_accessibility(game_code, game_name)
+    except Exception as e:
+        # Reported as this game failing; the rest of the audit carries on
+        return {'name': game_name, 'error': repr(e), 'log': log.getvalue()}
+    return {'name': game_name, 'result': result, 'log': log.getvalue()}
+
+def test_all_games(jobs=None, cache_file=AUDIT_CACHE_FILE):
+    """Test basic functionality for all existing games.
+
+    Games whose content hash is in the cache at `cache_file` are not
+    re-validated (pass None to validate everything from scratch); the rest fan
+    out over `jobs` worker processes (default: one per CPU).
+    """
     print("🔍 Testing basic functionality for all games...")
     
-    # Get all game files
-    game_files = sorted(glob.glob("games/2025-*.js"))
+    cached_entries = load_audit_cache(cache_file) if cache_file else {}
+    
+    # Hash every dated game, loose or in games/archive.pack, and keep the
+    # cached entries that still apply
+    game_files = []
+    entries = {}
+    content_hashes = {}
+    pending = []
+    with ArchivePack(archive_path(GAMES_DIR)) as pack:
+        for game_date in game_dates(GAMES_DIR, pack=pack):
+            game_name = f"{game_date}.js"
+            game_files.append(game_name)
+            try:
+                game_code = read_game_file(GAMES_DIR, game_date, 'js', pack)
+            except (OSError, UnicodeDecodeError, ArchiveError) as e:
+                # One unreadable game fails on its own; the audit carries on
+                entries[game_name] = {'name': game_name, 'error': str(e)}
+                continue
+            content_hash = hashlib.sha256(game_code.encode('utf-8')).hexdigest()
+            content_hashes[game_name] = content_hash
+            cached = cached_entries.get(content_hash)
+            if cached and cached['name'] == game_name:
+                entries[game_name] = cached
+            else:
+                pending.append((game_name, game_code))
     
     if not game_files:
         print("No game files found!")
-        return
+        return {'total_games': 0, 'passing_games': 0, 'failing_games': 0, 'average_score': 0, 'all_passing': False}
+    
+    # Validate new or modified games in parallel
+    jobs = jobs or os.cpu_count() or 1
+    names = [game_name for game_name, _ in pending]
+    sources = [game_code for _, game_code in pending]
+    if jobs > 1 and len(pending) > 1:
+        # Imported here: it is slow to load and single-game validation never needs it
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+            validated = executor.map(validate_game_source, names, sources)
+            entries.update(zip(names, validated))
+    else:
+        entries.update(zip(names, map(validate_game_source, names, sources)))
     
     results = {}
     total_score = 0
     passing_games = 0
     
-    for game_file in game_files:
-        game_name = os.path.basename(game_file)
+    for game_name in game_files:
+        entry = entries[game_name]
         print(f"\n{'='*50}")
         print(f"Testing: {game_name}")
         print(f"{'='*50}")
         
-        try:
-            with open(game_file, 'r') as f:
-                game_code = f.read()
-            
-            result = validate_accessibility(game_code, game_name)
-            results[game_name] = result
-            total_score += result['percentage']
-            
-            if result['passing']:
-                passing_games += 1
-                
-        except Exception as e:
-            print(f"❌ Error reading {game_name}: {e}")
-            results[game_name] = {'error': str(e)}
+        if 'error' in entry:
+            print(entry.get('log', ''), end='')
+            print(f"❌ Error testing {game_name}: {entry['error']}")
+            results[game_name] = {'error': entry['error']}
+            continue
+        
+        print(entry['log'], end='')
+        result = entry['result']
+        results[game_name] = result
+        total_score += result['percentage']
+        
+        if result['passing']:
+            passing_games += 1
+    
+    if cache_file:
+        save_audit_cache(cache_file, {content_hashes[name]: entry for name, entry in entries.items()
+                                      if 'error' not in entry})
+        print(f"\n♻️  Reused {len(game_files) - len(pending)} cached results, validated {len(pending)} games")
     
     # Summary
     print(f"\n{'='*50}")
@@ -147,13 +284,27 @@ def test_all_games():
         'all_passing': passing_games == len(game_files)
     }
 
-if __name__ == "__main__":
-    results = test_all_games()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit basic functionality of every archived game")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--cache-file", default=AUDIT_CACHE_FILE,
+                        help=f"results cache keyed by content hash (default: {AUDIT_CACHE_FILE})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-validate every game and leave the cache untouched")
+    args = parser.parse_args(argv)
+    
+    results = test_all_games(jobs=args.jobs, cache_file=None if args.no_cache else args.cache_file)
     
     # Exit with error code if any games are failing (for CI/CD)
-    if not results['all_passing']:
+    if not results['total_games']:
+        exit(1)
+    elif not results['all_passing']:
         print(f"\n❌ {results['failing_games']} games are failing basic functionality tests!")
         exit(1)
     else:
         print(f"\n✅ All games pass basic functionality tests!")
-        exit(0) 
\ No newline at end of file
+        exit(0)
+
+if __name__ == "__main__":
+    main()
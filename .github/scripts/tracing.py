@@ -0,0 +1,174 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import time
+
+TRACE_DIR = "games/traces"
+
+# The trace (and innermost open span) of the running task. asyncio copies the
+# context into every task, so concurrent candidates keep separate parents.
+current_tracer = contextvars.ContextVar('current_tracer', default=None)
+current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def _byte_length(value):
+    """Bytes of a str (or of the str first element of a tuple), else None"""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return len(value.encode('utf-8')) if isinstance(value, str) else None
+
+
+class Span:
+    """One timed unit of work; extra fields are set with set() or record_response()"""
+
+    def __init__(self, tracer, span_id, parent_id, name, kind, attributes):
+        self.tracer = tracer
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.status = 'ok'
+        self.started = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def record_response(self, response):
+        """Record the token usage and output size of a model response"""
+        usage = getattr(response, 'usage', None)
+        self.set(
+            input_tokens=getattr(usage, 'input_tokens', None),
+            output_tokens=getattr(usage, 'output_tokens', None),
+            output_bytes=_byte_length(getattr(response, 'output_text', None)),
+            cached=getattr(response, 'cached', False) or None,
+        )
+
+    def to_dict(self):
+        return {
+            'trace': self.tracer.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_ms': round((self.started - self.tracer.started) * 1000, 3),
+            'duration_ms': round(self.duration * 1000, 3) if self.duration is not None else None,
+            'status': self.status,
+            **self.attributes,
+        }
+
+
+class _NullSpan:
+    """Stand-in used when no trace is active, so instrumented code runs unchanged"""
+
+    def set(self, **attributes):
+        pass
+
+    def record_response(self, response):
+        pass
+
+
+class Tracer:
+    """Collects the spans of one trace, e.g. every candidate generated for one date"""
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.started = time.perf_counter()
+        self.spans = []
+        self._ids = itertools.count(1)
+
+    @contextlib.contextmanager
+    def span(self, name, kind='stage', **attributes):
+        parent = current_span.get()
+        span = Span(self, next(self._ids), parent.span_id if isinstance(parent, Span) and parent.tracer is self else None,
+                    name, kind, attributes)
+        self.spans.append(span)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.set(error=repr(e)[:300])
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.started
+            current_span.reset(token)
+
+    def summary(self):
+        """Totals per span name plus overall wall time and token usage"""
+        stages = {}
+        for span in self.spans:
+            totals = stages.setdefault(span.name, {
+                'kind': span.kind, 'count': 0, 'errors': 0, 'seconds': 0.0,
+                'input_tokens': 0, 'output_tokens': 0, 'input_bytes': 0, 'output_bytes': 0,
+            })
+            totals['count'] += 1
+            totals['errors'] += span.status != 'ok'
+            totals['seconds'] += span.duration or 0.0
+            for field in ('input_tokens', 'output_tokens', 'input_bytes', 'output_bytes'):
+                totals[field] += span.attributes.get(field) or 0
+        for totals in stages.values():
+            totals['seconds'] = round(totals['seconds'], 4)
+
+        model_spans = [span for span in self.spans if span.kind == 'model']
+        return {
+            'wall_seconds': round(time.perf_counter() - self.started, 3),
+            'model_calls': len(model_spans),
+            'input_tokens': sum(span.attributes.get('input_tokens') or 0 for span in model_spans),
+            'output_tokens': sum(span.attributes.get('output_tokens') or 0 for span in model_spans),
+            'stages': stages,
+        }
+
+    def write_jsonl(self, path):
+        """Write every span as one JSON object per line"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            for span in self.spans:
+                f.write(json.dumps(span.to_dict(), default=str) + '\n')
+        os.replace(temp_path, path)
+
+
+@contextlib.contextmanager
+def span(name, kind='stage', **attributes):
+    """Open a span in the current trace, or do nothing outside a trace"""
+    tracer = current_tracer.get()
+    if tracer is None:
+        yield _NullSpan()
+        return
+    with tracer.span(name, kind, **attributes) as opened:
+        yield opened
+
+
+def traced(name, kind='stage'):
+    """Decorator wrapping every call of a function (sync or async) in a span.
+
+    The span records the bytes of the str arguments as input_bytes and of the
+    str result (or the first element of a tuple result) as output_bytes.
+    """
+    def decorate(function):
+        def input_bytes(args, kwargs):
+            sizes = [_byte_length(value) for value in (*args, *kwargs.values())]
+            return sum(size for size in sizes if size is not None)
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                with span(name, kind, input_bytes=input_bytes(args, kwargs)) as opened:
+                    result = await function(*args, **kwargs)
+                    opened.set(output_bytes=_byte_length(result))
+                    return result
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with span(name, kind, input_bytes=input_bytes(args, kwargs)) as opened:
+                    result = function(*args, **kwargs)
+                    opened.set(output_bytes=_byte_length(result))
+                    return result
+        return wrapper
+    return decorate
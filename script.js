@@ -325,18 +325,18 @@ function initializeDailyGames() {
     const today = new Date();
     const todayString = formatDateString(today); // YYYY-MM-DD format in local timezone
 
-    // Fetch all available game dates from the index.json file
-    fetch('games/index.json')
-        .then(res => res.json())
-        .then(dates => {
-            // Sort dates chronologically
-            dates.sort();
+    // Fetch all available games from the compact catalog in one request
+    loadGameCatalog()
+        .then(games => {
+            // Sort games chronologically
+            games.sort((a, b) => a.date.localeCompare(b.date));
             
             // Create cards for all available games
-            const cards = dates.map(dateString => {
-                const isToday = dateString === todayString;
+            const cards = games.map(game => {
+                const isToday = game.date === todayString;
                 return {
-                    date: dateString,
+                    date: game.date,
+                    theme: game.theme,
                     status: isToday ? 'today' : 'available',
                     isToday: isToday
                 };
@@ -352,6 +352,7 @@ function initializeDailyGames() {
                     const dateLabel = `${mm}/${dd}/${year}`;
                     return `
                         <div class="daily-game-card ${card.isToday ? 'today active' : ''}" 
+                             ${card.theme ? `title="${escapeAttribute(card.theme)}"` : ''}
                              onclick="loadDailyGame('${card.date}'); console.log('Clicked daily game: ${card.date}');">
                             <h4>${dateLabel}</h4>
                         </div>
@@ -368,6 +369,53 @@ function initializeDailyGames() {
         });
 }
 
+// Games listed in games/catalog.json, as objects keyed by the catalog's field names
+function loadGameCatalog() {
+    return fetch('games/catalog.json')
+        .then(res => {
+            if (!res.ok) {
+                throw new Error(`HTTP error! status: ${res.status}`);
+            }
+            return res.json();
+        })
+        .then(catalog => catalog.games.map(row => {
+            const game = {};
+            catalog.fields.forEach((field, index) => { game[field] = row[index]; });
+            return game;
+        }))
+        .catch(error => {
+            // Older deployments only have the list of dates
+            console.log('Catalog not available, falling back to index.json:', error);
+            return fetch('games/index.json')
+                .then(res => res.json())
+                .then(dates => dates.map(date => ({ date })));
+        });
+}
+
+// Minified builds listed in games/dist/manifest.json, fetched once per page
+let gameManifestPromise = null;
+
+function resolveGameUrl(filename) {
+    if (!gameManifestPromise) {
+        gameManifestPromise = fetch('games/dist/manifest.json')
+            .then(res => (res.ok ? res.json() : { files: {} }))
+            .catch(() => ({ files: {} }));
+    }
+    // Fall back to the readable source for games that have not been built
+    return gameManifestPromise.then(manifest => {
+        const entry = manifest.files && manifest.files[filename];
+        return entry ? `games/${entry.path}` : `games/${filename}`;
+    });
+}
+
+function escapeAttribute(text) {
+    return String(text)
+        .replace(/&/g, '&amp;')
+        .replace(/"/g, '&quot;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;');
+}
+
 function formatDateString(date) {
     // Format date as YYYY-MM-DD in local timezone
     const year = date.getFullYear();
@@ -452,7 +500,8 @@ function loadDailyGame(dateString) {
         }
 
         // Load the selected daily game using fetch and wrap in function scope
-        fetch(`games/${dateString}.js`)
+        resolveGameUrl(`${dateString}.js`)
+            .then(url => fetch(url))
             .then(response => {
                 if (!response.ok) {
                     throw new Error(`HTTP error! status: ${response.status}`);
@@ -569,7 +618,8 @@ function loadTodaysGame() {
     updateActiveCard(todayString);
     
     // Load the latest game (today's game) using fetch and wrap in function scope
-    fetch('games/latest.js')
+    resolveGameUrl('latest.js')
+        .then(url => fetch(url))
         .then(response => {
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -698,11 +748,56 @@ function hideMetadata() {
     modal.style.display = 'none';
 }
 
+// Month bundles of prerendered metadata panels (games/details/YYYY-MM.json), by month
+const detailBundles = new Map();
+
+function loadDetailBundle(month) {
+    if (!detailBundles.has(month)) {
+        detailBundles.set(month, fetch(`games/details/${month}.json`)
+            .then(res => (res.ok ? res.json() : {}))
+            .catch(() => ({})));
+    }
+    return detailBundles.get(month);
+}
+
 function loadMetadata(dateString) {
     const content = document.getElementById('metadata-content');
-    
+    const month = dateString.slice(0, 7);
+
     console.log('Loading metadata for:', dateString);
-    
+
+    // Once a month's bundle is loaded, other days of that month open without a request
+    const bundled = detailBundles.has(month)
+        ? loadDetailBundle(month).then(bundle => bundle[dateString])
+        : Promise.resolve(undefined);
+
+    bundled
+        .then(fragment => {
+            if (fragment !== undefined) {
+                return fragment;
+            }
+            // One small fetch for this day, while the month's bundle loads for the next click
+            loadDetailBundle(month);
+            return fetch(`games/details/${dateString}.html`).then(response => {
+                if (response.ok) {
+                    return response.text();
+                }
+                throw new Error('Prerendered metadata not found');
+            });
+        })
+        .then(fragment => {
+            content.innerHTML = fragment;
+        })
+        .catch(error => {
+            console.log('Prerendered metadata not found, rendering from source:', error);
+            loadMetadataSource(dateString);
+        });
+}
+
+// Days not yet prerendered (e.g. before the details build has run) are rendered here
+function loadMetadataSource(dateString) {
+    const content = document.getElementById('metadata-content');
+
     // Try to load the markdown metadata first
     fetch(`games/${dateString}.meta.md`)
         .then(response => {